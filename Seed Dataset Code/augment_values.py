@@ -0,0 +1,207 @@
+# augment_values.py
+# -*- coding: utf-8 -*-
+"""
+엔티티 값 치환 증강: 각 행의 엔티티 값을 라벨에 맞는 새 가짜 값(fake_values.fake)으로 바꿔
+행 하나당 N개 변형을 만든다(시드 행 2,000개 → 수만~수십만 행).
+
+  - 값 교체 편집을 모아 text_edits.apply_edits/rebase_entities 로 한 번에 적용
+    → 오프셋은 한 번 훑기로 재계산, 재탐색 없음(text[begin:end] == value 유지)
+  - 가짜 값은 check_dataset.py --format-checks 통과 형식(카드·IMEI Luhn, 주민등록번호
+    검증번호, IBAN mod-97, 010-####-#### 등)
+  - 같은 행에서 (라벨, 값)이 같은 엔티티는 같은 새 값으로 바꿈(반복 언급 일관성)
+  - 서로 겹치는 엔티티, fake_values 에 없는 라벨은 원래 값 유지
+  - 언어: 원래 값에 한글이 있으면 ko, 영문자만 있으면 en, 그 외는 행 텍스트 기준
+  - 결정적: 변형 k의 난수 = random.Random(f"{seed}:{원래 id}:{k}")(id 없는 행은 입력 전체 기준 줄 번호)
+    → --workers, 청크 크기와 무관하게 같은 입력·시드면 같은 출력
+  - 프로세스 풀로 청크 단위 병렬 처리, 입력 순서대로 스트리밍 기록(메모리는 청크 몇 개분)
+  - 새 id는 --id-start 부터 연번(--keep-original 이면 원본 행도 같이 기록)
+  - 오프셋이 값과 안 맞거나 user ≠ 정답 text 인 행은 건너뜀(먼저 autofix_offsets.py)
+
+예)
+  python augment_values.py id1-id320_fix2.jsonl aug.jsonl --variants 50
+  python augment_values.py seed.jsonl.gz aug.jsonl.zst --variants 100 --workers 8 --keep-original --seed 7
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from fake_values import FAKERS
+from jsonl_io import open_text_auto, open_text_write
+from text_edits import Edit, apply_edits, rebase_entities
+
+HANGUL_RE = re.compile(r"[가-힣]")
+ASCII_ALPHA_RE = re.compile(r"[A-Za-z]")
+
+def value_lang(value: str, row_lang: str) -> str:
+    if HANGUL_RE.search(value):
+        return "ko"
+    if ASCII_ALPHA_RE.search(value):
+        return "en"
+    return row_lang
+
+def plan_row(text: str, ents: list) -> Optional[List[Tuple[dict, str]]]:
+    """
+    치환 대상 (엔티티, 언어) 목록. 오프셋이 값과 안 맞으면 None.
+    겹치는 엔티티 묶음과 모르는 라벨은 대상에서 뺀다.
+    """
+    spans = []
+    for e in ents:
+        if not isinstance(e, dict):
+            return None
+        b, en, v = e.get("begin"), e.get("end"), e.get("value")
+        if not (isinstance(b, int) and isinstance(en, int) and 0 <= b < en <= len(text)) or text[b:en] != v:
+            return None
+        spans.append(e)
+    spans.sort(key=lambda e: (e["begin"], e["end"]))
+    row_lang = "ko" if HANGUL_RE.search(text) else "en"
+    plan = []
+    n = len(spans)
+    reach = -1          # 앞 엔티티들의 최대 end
+    for i, e in enumerate(spans):
+        overlaps = e["begin"] < reach or (i + 1 < n and spans[i + 1]["begin"] < e["end"])
+        reach = max(reach, e["end"])
+        if overlaps or e.get("label") not in FAKERS:
+            continue
+        plan.append((e, value_lang(e["value"], row_lang)))
+    return plan
+
+def make_variant(ans: dict, plan: List[Tuple[dict, str]], rng: random.Random) -> dict:
+    """변형 하나: 대상 엔티티 값을 새 가짜 값으로 바꾼 정답 dict."""
+    chosen: Dict[Tuple[str, str], str] = {}
+    edits = []
+    for e, lang in plan:
+        k = (e["label"], e["value"])
+        v = chosen.get(k)
+        if v is None:
+            v = chosen[k] = FAKERS[e["label"]](rng, lang)
+        edits.append(Edit(e["begin"], e["end"], v))
+    new_text, ordered = apply_edits(ans["text"], edits)
+    ents, _ = rebase_entities(ans["entities"], ordered, new_text)
+    return {"text": new_text, "has_sensitive": bool(ents), "entities": ents}
+
+def augment_chunk(lines: List[str], opts: dict, first_line: int = 1) -> Tuple[List[str], dict]:
+    """
+    워커: 입력 줄 묶음 → id를 뺀 출력 JSON 문자열 목록 + 통계.
+    first_line: 묶음 첫 줄의 입력 전체 기준 줄 번호(id 없는 행의 시드 키).
+    id는 메인 프로세스가 기록 순서대로 붙인다(청크 크기와 무관한 연번).
+    """
+    stats = {"rows": 0, "augmented": 0, "skipped": 0, "replaced": 0, "kept": 0}
+    out: List[str] = []
+    dumps = json.dumps
+    seed, variants, keep = opts["seed"], opts["variants"], opts["keep_original"]
+    for ln, line in enumerate(lines, first_line):
+        s = line.strip()
+        if not s:
+            continue
+        stats["rows"] += 1
+        try:
+            row = json.loads(s)
+            msgs = row["messages"]
+            user = msgs[1]["content"]
+            ans = json.loads(msgs[2]["content"])
+            text = ans["text"]
+            ents = ans["entities"]
+        except Exception:
+            stats["skipped"] += 1
+            continue
+        plan = plan_row(text, ents) if isinstance(ents, list) and user == text else None
+        if plan is None:
+            stats["skipped"] += 1
+            continue
+        stats["augmented"] += 1
+        stats["replaced"] += len(plan) * variants
+        stats["kept"] += (len(ents) - len(plan)) * variants
+        rid = row.pop("id", f"line{ln}")
+        if keep:
+            out.append(dumps(row, ensure_ascii=False))
+        for k in range(variants):
+            new_ans = make_variant(ans, plan, random.Random(f"{seed}:{rid}:{k}"))
+            msgs[1]["content"] = new_ans["text"]
+            msgs[2]["content"] = dumps(new_ans, ensure_ascii=False)
+            out.append(dumps(row, ensure_ascii=False))
+    return out, stats
+
+def read_chunks(f, size: int):
+    """(첫 줄 번호, 줄 묶음) — 줄 번호는 입력 전체 기준 1부터."""
+    buf: List[str] = []
+    start = 1
+    for line in f:
+        buf.append(line)
+        if len(buf) >= size:
+            yield start, buf
+            start += len(buf)
+            buf = []
+    if buf:
+        yield start, buf
+
+def main():
+    ap = argparse.ArgumentParser(description="Entity-value substitution augmenter: N label-appropriate fake-value variants per row with rebased offsets")
+    ap.add_argument("input", help="입력 JSONL(.gz/.zst 자동 인식)")
+    ap.add_argument("output", help="출력 JSONL(확장자 .gz/.zst면 압축)")
+    ap.add_argument("--variants", type=int, default=10, help="행당 변형 수")
+    ap.add_argument("--keep-original", action="store_true", help="원본 행도 함께 기록")
+    ap.add_argument("--id-start", type=int, default=1, help="출력 첫 행 id")
+    ap.add_argument("--seed", type=int, default=0, help="난수 시드(같은 시드·입력이면 같은 결과)")
+    ap.add_argument("--workers", type=int, default=0, help="프로세스 수(기본: CPU 수, 1이면 풀 없이 실행)")
+    ap.add_argument("--chunk-rows", type=int, default=500, help="워커 한 번에 넘기는 입력 행 수")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    if args.variants < 0:
+        ap.error("--variants must be >= 0")
+
+    opts = {"seed": args.seed, "variants": args.variants, "keep_original": args.keep_original}
+    workers = max(1, args.workers or (os.cpu_count() or 1))
+    total = {"rows": 0, "augmented": 0, "skipped": 0, "replaced": 0, "kept": 0}
+    nid = args.id_start
+
+    def write(fout, res):
+        nonlocal nid
+        out, st = res
+        for k, v in st.items():
+            total[k] += v
+        if out:
+            # '{"messages": ...' → '{"id": N, "messages": ...' (json.dumps 출력과 동일)
+            fout.write("".join(f'{{"id": {nid + i}, {s[1:]}\n' if s != "{}" else f'{{"id": {nid + i}}}\n'
+                               for i, s in enumerate(out)))
+            nid += len(out)
+
+    t0 = time.perf_counter()
+    with open_text_auto(args.input) as fin, open_text_write(args.output) as fout:
+        chunks = read_chunks(fin, max(1, args.chunk_rows))
+        if workers == 1:
+            for start, lines in chunks:
+                write(fout, augment_chunk(lines, opts, start))
+        else:
+            # 순서 보존 + 진행 중 청크 수 제한(입력 전체를 메모리에 올리지 않음)
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                inflight: deque = deque()
+                for start, lines in chunks:
+                    inflight.append(ex.submit(augment_chunk, lines, opts, start))
+                    if len(inflight) >= workers * 4:
+                        write(fout, inflight.popleft().result())
+                while inflight:
+                    write(fout, inflight.popleft().result())
+    dt = time.perf_counter() - t0
+
+    written = nid - args.id_start
+    print(f"[augment] rows={total['rows']} augmented={total['augmented']} skipped={total['skipped']} "
+          f"variants={args.variants} written={written} ids={args.id_start}-{nid - 1} "
+          f"entities_replaced={total['replaced']} entities_kept={total['kept']} workers={workers}")
+    print(f"[augment] elapsed={dt:.2f}s ({written / dt * 60 if dt > 0 else 0:,.0f} rows/min) -> {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
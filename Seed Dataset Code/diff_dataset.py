@@ -0,0 +1,276 @@
+# diff_dataset.py
+# -*- coding: utf-8 -*-
+"""
+두 데이터셋 버전의 엔티티 단위 스트리밍 diff (예: 원본 → _fix → _fix2).
+
+  - 두 파일을 동시에 한 줄씩 읽으며 id로 맞춤. 같은 위치의 id가 다르면 짝이 나올 때까지
+    대기열에 보관(메모리는 "순서가 어긋난 행 수"에 비례, 같은 순서면 상수)
+  - 바이트 모드로 읽어 id는 줄 앞부분 정규식으로만 뽑고, 두 줄이 바이트 단위로 같으면(대부분)
+    디코딩·파싱 없이 건너뜀(행마다 긴 system 프롬프트가 있어 디코딩만으로도 시간의 대부분)
+  - 다른 줄만 파싱해 엔티티를 비교:
+      span_moved    : 같은 라벨·값, 위치 변경(또는 같은 라벨로 겹치는 구간의 경계 조정)
+      label_changed : 같은 구간, 라벨 변경
+      added/dropped : 짝이 없는 엔티티
+    + has_sensitive 반전, user/정답 text 변경, 행 추가/삭제
+  - 직렬화만 다른 행(공백·이스케이프 차이)은 reformatted로 따로 셈
+  - 요약은 stdout, 행별 상세는 --details JSONL(.gz/.zst 가능)
+
+예)
+  python diff_dataset.py "../Seed Dataset Fix/2/id321-id960_fix.jsonl" "../Seed Dataset Fix/2/id321-id960_fix2.jsonl" --details diff.jsonl
+"""
+
+import io
+import re
+import sys
+import json
+import argparse
+from itertools import zip_longest
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from jsonl_io import open_binary, open_text_auto, open_text_write, sniff_encoding
+
+KINDS = ("span_moved", "label_changed", "added", "dropped")
+ID_RE = re.compile(rb'\{\s*"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")\s*[,}]')
+
+Ent = Tuple[int, int, str, str]   # (begin, end, label, value)
+
+def decode_line(b: bytes) -> str:
+    try:
+        return b.decode("utf-8")
+    except UnicodeDecodeError:
+        return b.decode("cp949", errors="replace")
+
+def row_key(line: bytes) -> Optional[bytes]:
+    """줄 앞의 "id" 값 원문 바이트(정렬 키). 첫 키가 id가 아니면 전체 파싱으로 폴백."""
+    m = ID_RE.match(line)
+    if m:
+        return m.group(1)
+    try:
+        rid = json.loads(decode_line(line)).get("id")
+    except Exception:
+        return None
+    return None if rid is None else json.dumps(rid, ensure_ascii=False).encode("utf-8")
+
+def iter_rows(path: str) -> Iterator[Tuple[Optional[bytes], bytes]]:
+    """(id 키, UTF-8 줄 바이트) — 빈 줄 제외. id를 못 읽은 줄은 키=None."""
+    with open_binary(path) as fb:
+        enc = sniff_encoding(fb.peek(4)[:4])
+        if not enc.startswith("utf-16"):
+            if enc == "utf-8-sig":
+                fb.read(3)
+            for line in fb:
+                s = line.strip()
+                if s:
+                    yield row_key(s), s
+            return
+    # 드문 경우(UTF-16): 텍스트로 디코딩 후 UTF-8 바이트로 맞춤
+    with open_text_auto(path) as f:
+        for line in f:
+            s = line.strip().encode("utf-8", "surrogatepass")
+            if s:
+                yield row_key(s), s
+
+def align_by_id(old_path: str, new_path: str, stats: dict) -> Iterator[Tuple[bytes, Optional[bytes], Optional[bytes]]]:
+    """
+    두 파일을 id로 맞춰 (id 키, old 줄, new 줄) 생성. 한쪽에만 있는 행은 다른 쪽이 None
+    (파일 끝에서 한꺼번에 나옴). stats의 no_id_old/no_id_new/dup_id를 올림.
+    """
+    pend = {"old": {}, "new": {}}
+    for ra, rb in zip_longest(iter_rows(old_path), iter_rows(new_path)):
+        if ra is not None and rb is not None and ra[0] == rb[0] and ra[0] is not None:
+            yield ra[0], ra[1], rb[1]
+            continue
+        for side, r, other in (("old", ra, "new"), ("new", rb, "old")):
+            if r is None:
+                continue
+            key, line = r
+            if key is None:
+                stats["no_id_" + side] = stats.get("no_id_" + side, 0) + 1
+            elif key in pend[other]:
+                o = pend[other].pop(key)
+                yield (key, line, o) if side == "old" else (key, o, line)
+            elif key in pend[side]:
+                stats["dup_id"] = stats.get("dup_id", 0) + 1
+            else:
+                pend[side][key] = line
+    for key, line in pend["old"].items():
+        yield key, line, None
+    for key, line in pend["new"].items():
+        yield key, None, line
+
+def parse_answer(line: bytes) -> Optional[Tuple[str, str, bool, List[Ent]]]:
+    """→ (user, text, has_sensitive, entities). 깨진 줄이면 None."""
+    try:
+        msgs = json.loads(decode_line(line))["messages"]
+        user = msgs[1]["content"]
+        ans = json.loads(msgs[2]["content"])
+        ents = [
+            (e.get("begin"), e.get("end"), e.get("label"), e.get("value"))
+            for e in ans.get("entities", []) if isinstance(e, dict)
+        ]
+        return user, ans.get("text"), ans.get("has_sensitive"), ents
+    except Exception:
+        return None
+
+def _ent(e: Ent) -> dict:
+    return {"label": e[2], "value": e[3], "begin": e[0], "end": e[1]}
+
+def _overlap(a: Ent, b: Ent) -> bool:
+    return (isinstance(a[0], int) and isinstance(a[1], int) and isinstance(b[0], int) and isinstance(b[1], int)
+            and a[0] < b[1] and b[0] < a[1])
+
+def _pair_off(olds: List[Ent], news: List[Ent], key, kind: str, changes: List[dict], accept=None):
+    """key가 같은 old/new 엔티티를 begin 가까운 순으로 짝지어 changes에 기록, 짝 지은 것은 제거."""
+    buckets: Dict[object, List[Ent]] = {}
+    for e in news:
+        buckets.setdefault(key(e), []).append(e)
+    rest_old = []
+    used = set()
+    for o in olds:
+        cands = [n for n in buckets.get(key(o), ()) if id(n) not in used and (accept is None or accept(o, n))]
+        if not cands:
+            rest_old.append(o)
+            continue
+        ref = o[0] if isinstance(o[0], int) else 0
+        n = min(cands, key=lambda x: abs((x[0] if isinstance(x[0], int) else 0) - ref))
+        used.add(id(n))
+        if kind == "label_changed":
+            changes.append({"kind": kind, "begin": o[0], "end": o[1], "value": n[3], "old_label": o[2], "new_label": n[2]})
+        else:
+            changes.append({"kind": kind, "label": n[2], "old": [o[0], o[1], o[3]], "new": [n[0], n[1], n[3]]})
+    olds[:] = rest_old
+    news[:] = [n for n in news if id(n) not in used]
+
+def diff_entities(old: List[Ent], new: List[Ent]) -> List[dict]:
+    """엔티티 목록 두 개 → 변경 목록(kind별 dict)."""
+    # 완전히 같은 엔티티(다중집합) 제거
+    pool: Dict[Ent, int] = {}
+    for e in old:
+        pool[e] = pool.get(e, 0) + 1
+    new_rest = []
+    for e in new:
+        if pool.get(e, 0):
+            pool[e] -= 1
+        else:
+            new_rest.append(e)
+    old_rest = []
+    for e in old:
+        if pool.get(e, 0):
+            pool[e] -= 1
+            old_rest.append(e)
+    if not old_rest and not new_rest:
+        return []
+
+    changes: List[dict] = []
+    _pair_off(old_rest, new_rest, lambda e: (e[0], e[1]), "label_changed", changes)
+    _pair_off(old_rest, new_rest, lambda e: (e[2], e[3]), "span_moved", changes)
+    _pair_off(old_rest, new_rest, lambda e: e[2], "span_moved", changes, accept=_overlap)
+    changes.extend({"kind": "dropped", **_ent(e)} for e in old_rest)
+    changes.extend({"kind": "added", **_ent(e)} for e in new_rest)
+    return changes
+
+class Differ:
+    def __init__(self, details=None):
+        self.details = details
+        self.stats = {
+            "identical": 0, "reformatted": 0, "changed_rows": 0,
+            "only_old": 0, "only_new": 0, "no_id_old": 0, "no_id_new": 0,
+            "dup_id": 0, "unparsable": 0,
+            "has_sensitive_flipped": 0, "text_changed": 0, "user_changed": 0,
+        }
+        self.kinds = {k: 0 for k in KINDS}
+        self.by_label: Dict[str, Dict[str, int]] = {}
+
+    def _emit(self, rec: dict):
+        if self.details is not None:
+            self.details.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def compare(self, key: bytes, la: bytes, lb: bytes):
+        if la == lb:
+            self.stats["identical"] += 1
+            return
+        rid = json.loads(key)
+        a = parse_answer(la)
+        b = parse_answer(lb)
+        if a is None or b is None:
+            self.stats["unparsable"] += 1
+            self._emit({"id": rid, "unparsable": "old" if a is None else "new"})
+            return
+        rec = {"id": rid}
+        if a[0] != b[0]:
+            rec["user_changed"] = True
+            self.stats["user_changed"] += 1
+        if a[1] != b[1]:
+            rec["text_changed"] = True
+            self.stats["text_changed"] += 1
+        if bool(a[2]) != bool(b[2]):
+            rec["has_sensitive"] = [a[2], b[2]]
+            self.stats["has_sensitive_flipped"] += 1
+        changes = diff_entities(a[3], b[3])
+        if changes:
+            rec["changes"] = changes
+            for c in changes:
+                self.kinds[c["kind"]] += 1
+                lab = c.get("label") or c.get("new_label")
+                d = self.by_label.setdefault(str(lab), {k: 0 for k in KINDS})
+                d[c["kind"]] += 1
+        if len(rec) == 1:
+            self.stats["reformatted"] += 1
+            return
+        self.stats["changed_rows"] += 1
+        self._emit(rec)
+
+    def run(self, old_path: str, new_path: str):
+        for key, la, lb in align_by_id(old_path, new_path, self.stats):
+            if la is None:
+                self.stats["only_new"] += 1
+                self._emit({"id": json.loads(key), "row": "added"})
+            elif lb is None:
+                self.stats["only_old"] += 1
+                self._emit({"id": json.loads(key), "row": "dropped"})
+            else:
+                self.compare(key, la, lb)
+
+def main():
+    ap = argparse.ArgumentParser(description="Streaming entity-level diff between two dataset versions, aligned by id")
+    ap.add_argument("old", help="이전 버전 JSONL(.gz/.zst 자동 인식)")
+    ap.add_argument("new", help="새 버전 JSONL(.gz/.zst 자동 인식)")
+    ap.add_argument("--details", default=None, help="행별 변경 상세 JSONL 출력 경로(확장자 .gz/.zst면 압축)")
+    ap.add_argument("--top", type=int, default=20, help="요약에 표시할 라벨 수(변경 많은 순)")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    details = open_text_write(args.details) if args.details else None
+    d = Differ(details)
+    try:
+        d.run(args.old, args.new)
+    finally:
+        if details is not None:
+            details.close()
+
+    st = d.stats
+    print(f"# {args.old} → {args.new}")
+    print(f"- 동일 행: {st['identical']}  (직렬화만 다름: {st['reformatted']})")
+    print(f"- 변경 행: {st['changed_rows']}  (has_sensitive 반전 {st['has_sensitive_flipped']}, "
+          f"정답 text 변경 {st['text_changed']}, user 변경 {st['user_changed']})")
+    print(f"- 행 삭제: {st['only_old']}  행 추가: {st['only_new']}")
+    if st["dup_id"] or st["no_id_old"] or st["no_id_new"] or st["unparsable"]:
+        print(f"- 중복 id: {st['dup_id']}  id 없음(old/new): {st['no_id_old']}/{st['no_id_new']}  파싱 실패: {st['unparsable']}")
+    print("\n# 엔티티 변경")
+    for k in KINDS:
+        print(f"- {k}: {d.kinds[k]}")
+    if d.by_label:
+        print(f"\n# 라벨별 (상위 {args.top}) " + " / ".join(KINDS))
+        ranked = sorted(d.by_label.items(), key=lambda kv: (-sum(kv[1].values()), kv[0]))
+        for lab, c in ranked[:args.top]:
+            print(f"- {lab}: " + " / ".join(str(c[k]) for k in KINDS))
+    if args.details:
+        print(f"\n[diff] details → {args.details}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+# eval_detector.py
+# -*- coding: utf-8 -*-
+"""
+탐지기 출력 채점기: 정답 JSONL과 예측 JSONL을 id로 맞춰 스트리밍 채점.
+
+  - 스팬 일치 두 가지(라벨이 같아야 함):
+      exact   : (label, begin, end) 완전 일치(다중집합)
+      overlap : 같은 라벨 스팬과 한 글자라도 겹치면 일치
+                (정밀도 = 겹치는 정답이 있는 예측 비율, 재현율 = 겹치는 예측이 있는 정답 비율)
+  - 라벨별 / README 카테고리별 / 전체(micro) P·R·F1 + 라벨 macro F1, has_sensitive 정확도
+  - 스팬 매칭은 이중 루프 대신 정렬 후 한 번 훑기:
+      exact   = (label, begin, end) 정렬 목록 두 개의 병합
+      overlap = 상대편을 (label, begin) 정렬 + end 누적 최댓값 → 스팬마다 bisect 한 번
+  - 예측 행 형식(어느 것이든): {"id", "messages":[..., assistant]} / {"id", "content": "<JSON 문자열>"}
+    / {"id", "prediction": {...} 또는 "<JSON 문자열>"}. JSON 앞뒤 군더더기(코드펜스 등)는 잘라냄
+  - 예측이 없거나 JSON이 깨진 행은 "엔티티 없음 + has_sensitive 오답"으로 채점(--skip-missing 시 제외)
+  - 속도: 행 전체(긴 system 프롬프트 포함)를 json.loads 하지 않고 줄 원문에서 assistant content
+    문자열만 잘라 그 JSON만 파싱(모양이 다르면 전체 파싱으로 폴백). 정답·예측 줄이 바이트까지
+    같으면 한 번만 파싱
+
+예)
+  python eval_detector.py gold.jsonl predictions.jsonl --json-out report.json
+"""
+
+import io
+import re
+import sys
+import json
+import argparse
+from bisect import bisect_left
+from json.decoder import scanstring
+from typing import Dict, List, Optional, Tuple
+
+from seed_schema import CATEGORIES, LABEL_CATEGORY
+from diff_dataset import align_by_id, decode_line
+
+Span = Tuple[str, int, int]   # (label, begin, end)
+FIELDS = ("gold", "pred", "tp", "gold_hit", "pred_hit")
+# JSON 문자열 값 안의 따옴표는 \" 로 이스케이프되므로 이 토큰은 실제 키/값에서만 맞음
+ASSISTANT_TAIL_RE = re.compile(r'"assistant"\s*,\s*"content"\s*:\s*"')
+ROW_END_RE = re.compile(r'\s*\}\s*\]\s*\}\s*$')
+
+def assistant_content(s: str) -> Optional[str]:
+    """
+    줄 원문 → {"role": "assistant", "content": "..."} 의 content(앞쪽 메시지는 파싱 안 함).
+    assistant 토큰이 하나뿐이고 그 메시지로 줄이 끝나는(… "}]}) 경우만, 아니면 None
+    (두 행이 붙은 줄, 다른 키가 뒤에 오는 줄 등 → 호출 측이 전체 파싱).
+    """
+    i = s.rfind('"assistant"')
+    if i < 0 or s.rfind('"assistant"', 0, i) >= 0:
+        return None
+    m = ASSISTANT_TAIL_RE.match(s, i)
+    if not m:
+        return None
+    try:
+        content, end = scanstring(s, m.end())
+    except ValueError:
+        return None
+    return content if ROW_END_RE.match(s, end) else None
+
+def gold_answer(line: bytes) -> Optional[Tuple[List[tuple], object]]:
+    """정답 행 → ((label, begin, end) 목록, has_sensitive). 깨진 줄이면 None."""
+    s = decode_line(line)
+    try:
+        content = assistant_content(s)
+        if content is None:
+            content = json.loads(s)["messages"][2]["content"]
+        ans = json.loads(content)
+        ents = ans.get("entities", [])
+        return [(e.get("label"), e.get("begin"), e.get("end")) for e in ents if isinstance(e, dict)], ans.get("has_sensitive")
+    except Exception:
+        return None
+
+def extract_prediction(line: bytes) -> Optional[dict]:
+    """예측 행 → 정답 스키마 dict(text/has_sensitive/entities). 해석 불가면 None."""
+    s = decode_line(line)
+    content = assistant_content(s)
+    if content is None:
+        try:
+            row = json.loads(s)
+        except Exception:
+            return None
+        if not isinstance(row, dict):
+            return None
+        if isinstance(row.get("messages"), list) and row["messages"]:
+            content = row["messages"][-1].get("content") if isinstance(row["messages"][-1], dict) else None
+        elif "prediction" in row:
+            content = row["prediction"]
+        else:
+            content = row.get("content")
+    if isinstance(content, dict):
+        return content
+    if not isinstance(content, str):
+        return None
+    try:
+        obj = json.loads(content)
+    except Exception:
+        i, j = content.find("{"), content.rfind("}")
+        if i < 0 or j <= i:
+            return None
+        try:
+            obj = json.loads(content[i:j + 1])
+        except Exception:
+            return None
+    return obj if isinstance(obj, dict) else None
+
+def entity_triples(ents) -> List[tuple]:
+    """예측 entities(dict 목록) → (label, begin, end) 목록."""
+    if not isinstance(ents, list):
+        return []
+    return [(e.get("label"), e.get("begin"), e.get("end")) if isinstance(e, dict) else (None, None, None)
+            for e in ents]
+
+def to_spans(triples) -> Tuple[List[Span], int]:
+    """(label, begin, end) 목록 → 유효한 것만 정렬한 목록, 버린 잘못된 스팬 수."""
+    spans = []
+    bad = 0
+    for lab, b, en in triples:
+        if isinstance(lab, str) and isinstance(b, int) and isinstance(en, int) and 0 <= b < en:
+            spans.append((lab, b, en))
+        else:
+            bad += 1
+    spans.sort()
+    return spans, bad
+
+def exact_hits(gold: List[Span], pred: List[Span]) -> Dict[str, int]:
+    """정렬된 두 목록을 병합하며 완전 일치 수를 라벨별로 셈."""
+    hits: Dict[str, int] = {}
+    i = j = 0
+    while i < len(gold) and j < len(pred):
+        g, p = gold[i], pred[j]
+        if g == p:
+            hits[g[0]] = hits.get(g[0], 0) + 1
+            i += 1
+            j += 1
+        elif g < p:
+            i += 1
+        else:
+            j += 1
+    return hits
+
+def overlap_hits(spans: List[Span], other: List[Span]) -> Dict[str, int]:
+    """spans 중 같은 라벨의 other 스팬과 겹치는 것의 수(라벨별). 두 목록 모두 정렬돼 있어야 함."""
+    # other를 라벨별 (begins, end 누적 최댓값) 배열로
+    index: Dict[str, Tuple[List[int], List[int]]] = {}
+    for lab, b, e in other:
+        begins, maxend = index.setdefault(lab, ([], []))
+        begins.append(b)
+        maxend.append(max(e, maxend[-1]) if maxend else e)
+    hits: Dict[str, int] = {}
+    for lab, b, e in spans:
+        ix = index.get(lab)
+        if ix is None:
+            continue
+        k = bisect_left(ix[0], e)   # begin < e 인 접두부
+        if k and ix[1][k - 1] > b:
+            hits[lab] = hits.get(lab, 0) + 1
+    return hits
+
+class Scorer:
+    def __init__(self):
+        self.labels: Dict[str, Dict[str, int]] = {}
+        self.rows = 0
+        self.hs_correct = 0
+        self.hs_conf = {"tp": 0, "fp": 0, "fn": 0, "tn": 0}
+        self.missing = 0
+        self.invalid_json = 0
+        self.extra = 0
+        self.bad_spans = 0
+        self.bad_gold = 0
+
+    def _bump(self, counts: Dict[str, int], field: str):
+        for lab, n in counts.items():
+            c = self.labels.get(lab)
+            if c is None:
+                c = self.labels[lab] = dict.fromkeys(FIELDS, 0)
+            c[field] += n
+
+    def add(self, gold_triples, gold_hs, pred: Optional[dict]):
+        gold, _ = to_spans(gold_triples)
+        if pred is None:
+            pred_spans, pred_hs = [], None
+        else:
+            triples = pred.get("triples")
+            pred_spans, bad = to_spans(triples if triples is not None else entity_triples(pred.get("entities")))
+            self.bad_spans += bad
+            pred_hs = pred.get("has_sensitive")
+        self.rows += 1
+
+        g_hs = bool(gold_hs) if isinstance(gold_hs, bool) else bool(gold)
+        if isinstance(pred_hs, bool):
+            self.hs_correct += pred_hs == g_hs
+            self.hs_conf[("t" if pred_hs == g_hs else "f") + ("p" if pred_hs else "n")] += 1
+        else:
+            # 예측 없음/형식 오류 → 오답(양성 정답이면 fn, 음성이면 fp로 봄)
+            self.hs_conf["fn" if g_hs else "fp"] += 1
+
+        if gold == pred_spans:
+            # 완전 일치(잘 학습된 모델에서 대부분): 모든 필드가 라벨별 정답 수와 같음
+            for lab, _, _ in gold:
+                c = self.labels.get(lab)
+                if c is None:
+                    c = self.labels[lab] = dict.fromkeys(FIELDS, 0)
+                for f in FIELDS:
+                    c[f] += 1
+            return
+        tally: Dict[str, int] = {}
+        for lab, _, _ in gold:
+            tally[lab] = tally.get(lab, 0) + 1
+        self._bump(tally, "gold")
+        tally = {}
+        for lab, _, _ in pred_spans:
+            tally[lab] = tally.get(lab, 0) + 1
+        self._bump(tally, "pred")
+        self._bump(exact_hits(gold, pred_spans), "tp")
+        self._bump(overlap_hits(gold, pred_spans), "gold_hit")
+        self._bump(overlap_hits(pred_spans, gold), "pred_hit")
+
+    def groups(self) -> Dict[str, Dict[str, int]]:
+        """README 카테고리별 합계(카테고리 밖 라벨은 "기타")."""
+        out: Dict[str, Dict[str, int]] = {}
+        for lab, c in self.labels.items():
+            cat = LABEL_CATEGORY.get(lab)
+            name = f"{cat}. {CATEGORIES[cat][0]}" if cat else "기타"
+            g = out.setdefault(name, dict.fromkeys(FIELDS, 0))
+            for f in FIELDS:
+                g[f] += c[f]
+        return dict(sorted(out.items()))
+
+    def total(self) -> Dict[str, int]:
+        t = dict.fromkeys(FIELDS, 0)
+        for c in self.labels.values():
+            for f in FIELDS:
+                t[f] += c[f]
+        return t
+
+def _prf(num_p: int, den_p: int, num_r: int, den_r: int) -> Tuple[float, float, float]:
+    p = num_p / den_p if den_p else 0.0
+    r = num_r / den_r if den_r else 0.0
+    return p, r, (2 * p * r / (p + r) if p + r else 0.0)
+
+def metrics(c: Dict[str, int]) -> dict:
+    ep, er, ef = _prf(c["tp"], c["pred"], c["tp"], c["gold"])
+    op, orr, of = _prf(c["pred_hit"], c["pred"], c["gold_hit"], c["gold"])
+    return {**c, "exact": {"p": ep, "r": er, "f1": ef}, "overlap": {"p": op, "r": orr, "f1": of}}
+
+def _line(name: str, m: dict) -> str:
+    e, o = m["exact"], m["overlap"]
+    return (f"{name:<28} {m['gold']:>7} {m['pred']:>7}  "
+            f"{e['p']:.3f} {e['r']:.3f} {e['f1']:.3f}  {o['p']:.3f} {o['r']:.3f} {o['f1']:.3f}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Span-level evaluator for detector outputs (exact/overlap P/R/F1, has_sensitive accuracy)")
+    ap.add_argument("gold", help="정답 JSONL(messages 스키마, .gz/.zst 자동 인식)")
+    ap.add_argument("pred", help="예측 JSONL(id + messages/content/prediction, .gz/.zst 자동 인식)")
+    ap.add_argument("--skip-missing", action="store_true", help="예측이 없거나 깨진 행은 채점에서 제외")
+    ap.add_argument("--json-out", default=None, help="전체 지표를 JSON으로 저장할 경로")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    sc = Scorer()
+    align_stats: Dict[str, int] = {}
+    for key, gl, pl in align_by_id(args.gold, args.pred, align_stats):
+        if gl is None:
+            sc.extra += 1
+            continue
+        gold = gold_answer(gl)
+        if gold is None:
+            sc.bad_gold += 1
+            continue
+        pred = None
+        if pl is None:
+            sc.missing += 1
+        elif pl == gl:
+            # 같은 줄: 예측 = 정답(다시 파싱하지 않음)
+            pred = {"has_sensitive": gold[1], "triples": gold[0]}
+        else:
+            pred = extract_prediction(pl)
+            if pred is None:
+                sc.invalid_json += 1
+        if pred is None and args.skip_missing:
+            continue
+        sc.add(gold[0], gold[1], pred)
+
+    label_m = {lab: metrics(c) for lab, c in sorted(sc.labels.items(), key=lambda kv: (-kv[1]["gold"], kv[0]))}
+    group_m = {name: metrics(c) for name, c in sc.groups().items()}
+    total_m = metrics(sc.total())
+    scored = [m for m in label_m.values() if m["gold"]]
+    macro = {k: sum(m[k]["f1"] for m in scored) / len(scored) if scored else 0.0 for k in ("exact", "overlap")}
+    hs_acc = sc.hs_correct / sc.rows if sc.rows else 0.0
+
+    head = f"{'':<28} {'gold':>7} {'pred':>7}  {'exact P/R/F1':<17}  overlap P/R/F1"
+    print("# 라벨별")
+    print(head)
+    for lab, m in label_m.items():
+        print(_line(lab, m))
+    print("\n# 카테고리별")
+    print(head)
+    for name, m in group_m.items():
+        print(_line(name, m))
+    print("\n# 전체")
+    print(head)
+    print(_line("micro", total_m))
+    print(f"macro F1 (정답 있는 라벨 {len(scored)}개): exact {macro['exact']:.3f} / overlap {macro['overlap']:.3f}")
+    hc = sc.hs_conf
+    print(f"has_sensitive 정확도: {hs_acc:.4f}  (tp {hc['tp']} fp {hc['fp']} fn {hc['fn']} tn {hc['tn']})")
+    print(f"\n[eval] rows={sc.rows} missing_pred={sc.missing} invalid_json={sc.invalid_json} "
+          f"extra_pred={sc.extra} bad_spans={sc.bad_spans} bad_gold={sc.bad_gold} "
+          f"dup_id={align_stats.get('dup_id', 0)} no_id={align_stats.get('no_id_old', 0) + align_stats.get('no_id_new', 0)}")
+
+    if args.json_out:
+        report = {
+            "rows": sc.rows, "labels": label_m, "categories": group_m, "micro": total_m,
+            "macro_f1": macro, "has_sensitive": {"accuracy": hs_acc, **hc},
+            "missing_pred": sc.missing, "invalid_json": sc.invalid_json, "extra_pred": sc.extra,
+            "bad_spans": sc.bad_spans, "bad_gold": sc.bad_gold,
+        }
+        with open(args.json_out, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
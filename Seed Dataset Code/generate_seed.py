@@ -0,0 +1,385 @@
+# generate_seed.py
+# -*- coding: utf-8 -*-
+"""
+템플릿 기반 조합 시드 생성기: README의 31가지 카테고리 조합(⁵C₁ ~ ⁵C₅)별 할당량을
+채우는 행을 만들어 샤드 단위로 병렬 기록한다.
+
+  - 카테고리별 문장 조각(한국어/영어)에 타입 슬롯({LABEL})을 두고
+    조합에 속한 카테고리마다 조각을 1~2개 골라 하나의 요청문으로 잇는다.
+  - 슬롯 값은 fake_values.fake()로 채우고, 문자열을 이어 붙이면서 오프셋을 바로 계산
+    (구조적으로 text[begin:end] == value, 겹침 없음).
+  - 할당량: 1~2개 조합 64개, 3~5개 조합 65개(README) × --scale, 또는 --per-combo N
+  - 음성 예시(has_sensitive: false)는 --negative-ratio 비율만큼 추가
+  - 각 샤드에는 모든 조합이 비례 배분되고 샤드 안에서 섞인다(시드 고정 → 재현 가능).
+
+예)
+  python generate_seed.py --out-dir ./gen --scale 500 --workers 8
+  python check_dataset.py ./gen/seed_gen_00000.jsonl --format-checks
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple, Union
+
+from seed_schema import COMBOS, SYSTEM_PROMPT, combo_key, combo_quota, make_answer
+from fake_values import fake
+from jsonl_io import open_text_write
+
+# -------------------- 템플릿 --------------------
+# 카테고리 번호 → 언어 → 조각 목록. 슬롯은 해당 카테고리 라벨만 사용해야 조합이 유지된다.
+FRAGMENTS: Dict[int, Dict[str, List[str]]] = {
+    1: {
+        "ko": [
+            "고객 {NAME}님의 연락처는 {PHONE}",
+            "{NAME} 씨 이메일 {EMAIL}, 주소 {ADDRESS} (우편번호 {POSTAL_CODE})",
+            "생년월일 {DATE_OF_BIRTH}, 주민등록번호 {RESIDENT_ID}",
+            "여권번호 {PASSPORT}와 운전면허번호 {DRIVER_LICENSE}",
+            "외국인 등록번호 {FOREIGNER_ID} 소지자 {NAME}",
+            "건강보험번호 {HEALTH_INSURANCE_ID}",
+            "사업자 등록번호 {BUSINESS_ID}, TIN {TAX_ID}",
+            "미국 SSN {SSN}",
+            "비상연락망 {EMERGENCY_CONTACT}",
+            "비상전화 {EMERGENCY_PHONE}",
+        ],
+        "en": [
+            "customer {NAME} (phone {PHONE})",
+            "email {EMAIL}, mailing address {ADDRESS} {POSTAL_CODE}",
+            "DOB {DATE_OF_BIRTH} and SSN {SSN}",
+            "passport {PASSPORT}, driver's license {DRIVER_LICENSE}",
+            "TIN {TAX_ID} for business registration {BUSINESS_ID}",
+            "emergency contact {EMERGENCY_CONTACT}",
+            "health insurance no. {HEALTH_INSURANCE_ID}",
+            "after-hours emergency line {EMERGENCY_PHONE}",
+        ],
+    },
+    2: {
+        "ko": [
+            "로그인 계정 {USERNAME} / 비밀번호 {PASSWORD}",
+            "닉네임 {NICKNAME}, 권한 {ROLE}, 소속 그룹 {GROUP}",
+            "비밀번호 해시 {PASSWORD_HASH}",
+            "보안질문 {SECURITY_QA}, OTP 시크릿 {MFA_SECRET}, 백업코드 {BACKUP_CODE}",
+            "최근 로그인 {LAST_LOGIN_AT} / IP {LAST_LOGIN_IP} / 기기 {LAST_LOGIN_DEVICE} / 브라우저 {LAST_LOGIN_BROWSER}",
+            "세션ID {SESSION_ID}, 쿠키 {COOKIE}",
+            "JWT {JWT}",
+            "액세스 토큰 {ACCESS_TOKEN}, 리프레시 토큰 {REFRESH_TOKEN}",
+            "OAuth 클라이언트 ID {OAUTH_CLIENT_ID}와 시크릿 {OAUTH_CLIENT_SECRET}",
+            "API 키 {API_KEY}",
+            "서버 SSH 키 {SSH_PRIVATE_KEY}",
+            "TLS 개인키 {TLS_PRIVATE_KEY}",
+            "PGP 개인키 {PGP_PRIVATE_KEY}",
+            "지갑 복구 니모닉 {MNEMONIC}",
+            "클라우드 임시자격증명 {TEMP_CLOUD_CREDENTIAL}",
+            "디바이스 ID {DEVICE_ID}, IMEI {IMEI}, 시리얼 {SERIAL_NUMBER}",
+            "브라우저 지문 {BROWSER_FINGERPRINT}",
+            "SAML Assertion {SAML_ASSERTION}, ID 토큰 {OIDC_ID_TOKEN}",
+            "내부 접속 URL {INTERNAL_URL}, DB 연결 문자열 {CONNECTION_STRING}",
+        ],
+        "en": [
+            "login {USERNAME} with password {PASSWORD}",
+            "nickname {NICKNAME}, role {ROLE}, group {GROUP}",
+            "stored hash {PASSWORD_HASH}",
+            "security question {SECURITY_QA}, TOTP secret {MFA_SECRET}, backup code {BACKUP_CODE}",
+            "last login {LAST_LOGIN_AT} from {LAST_LOGIN_IP} on {LAST_LOGIN_DEVICE} ({LAST_LOGIN_BROWSER})",
+            "session {SESSION_ID}, cookie {COOKIE}",
+            "bearer JWT {JWT}",
+            "access token {ACCESS_TOKEN}, refresh token {REFRESH_TOKEN}",
+            "OAuth client {OAUTH_CLIENT_ID} / secret {OAUTH_CLIENT_SECRET}",
+            "API key {API_KEY}",
+            "deploy key {SSH_PRIVATE_KEY}",
+            "TLS key {TLS_PRIVATE_KEY}",
+            "signing key {PGP_PRIVATE_KEY}",
+            "seed phrase {MNEMONIC}",
+            "temporary credential {TEMP_CLOUD_CREDENTIAL}",
+            "device {DEVICE_ID}, IMEI {IMEI}, serial {SERIAL_NUMBER}",
+            "browser fingerprint {BROWSER_FINGERPRINT}",
+            "SAML assertion {SAML_ASSERTION}, ID token {OIDC_ID_TOKEN}",
+            "admin page {INTERNAL_URL}, DSN {CONNECTION_STRING}",
+        ],
+    },
+    3: {
+        "ko": [
+            "{BANK_NAME} {BANK_BRANCH} 계좌 {BANK_ACCOUNT} (예금주 {ACCOUNT_HOLDER})",
+            "잔액 {BALANCE} ({CURRENCY})",
+            "카드번호 {CARD_NUMBER}, 유효기간 {CARD_EXPIRY}, CVC {CARD_CVV}",
+            "카드 소유자 {CARD_HOLDER}, 결제 비밀번호 {PAYMENT_PIN}",
+            "증권계좌 {SECURITIES_ACCOUNT}, 가상계좌 {VIRTUAL_ACCOUNT}",
+            "가상자산 지갑주소 {WALLET_ADDRESS}",
+            "IBAN {IBAN}, SWIFT {SWIFT_BIC}, 라우팅 번호 {ROUTING_NUMBER}",
+            "승인번호 {PAYMENT_APPROVAL_CODE}, PG 고객ID {GATEWAY_CUSTOMER_ID}, 결제 프로필 {PAYMENT_PROFILE_ID}",
+        ],
+        "en": [
+            "{BANK_NAME} {BANK_BRANCH} account {BANK_ACCOUNT} held by {ACCOUNT_HOLDER}",
+            "balance {BALANCE} in {CURRENCY}",
+            "card {CARD_NUMBER} exp {CARD_EXPIRY} CVV {CARD_CVV}",
+            "cardholder {CARD_HOLDER}, PIN {PAYMENT_PIN}",
+            "brokerage account {SECURITIES_ACCOUNT}, virtual account {VIRTUAL_ACCOUNT}",
+            "wallet {WALLET_ADDRESS}",
+            "IBAN {IBAN}, BIC {SWIFT_BIC}, routing {ROUTING_NUMBER}",
+            "approval code {PAYMENT_APPROVAL_CODE}, gateway customer {GATEWAY_CUSTOMER_ID}, profile {PAYMENT_PROFILE_ID}",
+        ],
+    },
+    4: {
+        "ko": [
+            "거래처 {COMPANY_NAME} 담당자 {BUYER_NAME}",
+            "고객번호 {CUSTOMER_ID}, 멤버십 {MEMBERSHIP_ID}",
+            "주문번호 {ORDER_ID}, 송장번호 {INVOICE_ID}",
+            "환불ID {REFUND_ID}, 교환ID {EXCHANGE_ID}",
+            "배송지 {SHIPPING_ADDRESS}, 운송장 {TRACKING_ID}",
+            "CRM 레코드 {CRM_RECORD_ID}, 티켓 {TICKET_ID}, RMA {RMA_ID}",
+            "쿠폰 {COUPON_CODE}, 바우처 {VOUCHER_CODE}",
+            "청구지 {BILLING_ADDRESS}, 세금계산서 {TAX_INVOICE_ID}",
+            "고객 메모 {CUSTOMER_NOTE_ID}",
+        ],
+        "en": [
+            "vendor {COMPANY_NAME}, buyer {BUYER_NAME}",
+            "customer {CUSTOMER_ID}, membership {MEMBERSHIP_ID}",
+            "order {ORDER_ID}, invoice {INVOICE_ID}",
+            "refund {REFUND_ID}, exchange {EXCHANGE_ID}",
+            "ship to {SHIPPING_ADDRESS}, tracking {TRACKING_ID}",
+            "CRM record {CRM_RECORD_ID}, ticket {TICKET_ID}, RMA {RMA_ID}",
+            "coupon {COUPON_CODE}, voucher {VOUCHER_CODE}",
+            "bill to {BILLING_ADDRESS}, tax invoice {TAX_INVOICE_ID}",
+            "customer note {CUSTOMER_NOTE_ID}",
+        ],
+    },
+    5: {
+        "ko": [
+            "사번 {EMPLOYEE_ID}, {ORG_NAME} {DEPARTMENT_NAME} {JOB_TITLE}",
+            "고용형태 {EMPLOYMENT_TYPE}, 입사일 {HIRE_DATE}, 퇴사일 {LEAVE_DATE}",
+            "급여 {SALARY}, 복지 {BENEFIT_INFO}, 보험 {INSURANCE_INFO}",
+            "인사카드 메모 {PROFILE_INFO}, 내선 {OFFICE_EXT}",
+            "출입카드 {ACCESS_CARD_ID}, 리더기 {READER_ID}, 출입기록 {ACCESS_LOG}",
+            "근무지 {WORKSITE}, 사업장 {OFFICE_LOCATION}",
+            "인사평가 {PERFORMANCE_GRADE}, 자격 {EDUCATION_CERT}",
+            "{DUTY_ASSIGNMENT} 배정, 관리자 여부 {MANAGER_FLAG}",
+            "보안 교육 이수일 {TRAINING_COMPLETION_DATE}, 만료일 {TRAINING_EXPIRY}",
+        ],
+        "en": [
+            "employee {EMPLOYEE_ID}, {ORG_NAME} {DEPARTMENT_NAME}, {JOB_TITLE}",
+            "employment {EMPLOYMENT_TYPE}, hired {HIRE_DATE}, left {LEAVE_DATE}",
+            "salary {SALARY}, benefits {BENEFIT_INFO}, insurance {INSURANCE_INFO}",
+            "profile note {PROFILE_INFO}, ext. {OFFICE_EXT}",
+            "badge {ACCESS_CARD_ID}, reader {READER_ID}, log {ACCESS_LOG}",
+            "worksite {WORKSITE}, office {OFFICE_LOCATION}",
+            "review {PERFORMANCE_GRADE}, certification {EDUCATION_CERT}",
+            "{DUTY_ASSIGNMENT}, manager flag {MANAGER_FLAG}",
+            "security training done {TRAINING_COMPLETION_DATE}, expires {TRAINING_EXPIRY}",
+        ],
+    },
+}
+
+INTROS = {
+    "ko": ["", "다음 정보 확인 부탁해: ", "아래 내용으로 처리해줘. ", "고객 문의 건 정리: ", "[요청] "],
+    "en": ["", "Please check the following: ", "Ticket notes - ", "FYI: "],
+}
+JOINERS = {"ko": [", ", " / ", "; "], "en": ["; ", ", ", " / "]}
+ENDINGS = {
+    "ko": [
+        ". 위 정보를 표로 정리해줘.",
+        ". 이 내용으로 안내 메일 초안을 작성해줘.",
+        ". 누락된 항목이 있는지 검토해줘.",
+        ". 보고서에 들어갈 요약을 만들어줘.",
+        ". 확인 후 처리 결과 알려줘.",
+    ],
+    "en": [
+        ". Please summarize this in a table.",
+        ". Draft a reply email with these details.",
+        ". Can you check whether anything is missing?",
+        ". Turn this into a short incident note.",
+    ],
+}
+
+# 음성(민감정보 없음) 문장 — 슬롯 없음, {topic}/{doc}은 일반 어휘로 채움
+NEGATIVES = {
+    "ko": [
+        "{topic}에 대한 {doc} 초안을 작성해줘.",
+        "{topic} 관련해서 팀원들과 공유할 {doc}를 정리해줘.",
+        "{topic} 개선 방안을 세 가지로 요약해줘.",
+        "다음 주 {topic} 회의에서 쓸 {doc} 목차를 제안해줘.",
+        "{topic} 업무의 일반적인 절차를 단계별로 설명해줘.",
+    ],
+    "en": [
+        "Write a {doc} about {topic}.",
+        "Summarize three ways to improve {topic}.",
+        "Suggest an outline for a {doc} on {topic}.",
+        "Explain the usual steps involved in {topic}.",
+    ],
+}
+NEG_WORDS = {
+    "ko": {
+        "topic": ["신규 입사자 온보딩", "분기별 보안 점검", "재고 관리 프로세스", "장애 대응 절차", "고객 만족도 조사", "사내 교육 일정", "예산 집행 계획"],
+        "doc": ["체크리스트", "공지문", "회의록", "가이드 문서", "요약 보고서"],
+    },
+    "en": {
+        "topic": ["employee onboarding", "quarterly security reviews", "inventory management", "incident response", "customer satisfaction surveys", "release planning"],
+        "doc": ["checklist", "announcement", "meeting summary", "how-to guide", "status report"],
+    },
+}
+
+SLOT_RE = re.compile(r"\{([A-Z_]+)\}")
+
+Part = Union[str, Tuple[str]]   # 리터럴 또는 (라벨,)
+
+def compile_template(t: str) -> List[Part]:
+    """"고객 {NAME}님" → ["고객 ", ("NAME",), "님"]."""
+    parts: List[Part] = []
+    pos = 0
+    for m in SLOT_RE.finditer(t):
+        if m.start() > pos:
+            parts.append(t[pos:m.start()])
+        parts.append((m.group(1),))
+        pos = m.end()
+    if pos < len(t):
+        parts.append(t[pos:])
+    return parts
+
+COMPILED = {c: {lang: [compile_template(t) for t in ts] for lang, ts in by_lang.items()}
+            for c, by_lang in FRAGMENTS.items()}
+
+# -------------------- 행 생성 --------------------
+
+def render_positive(combo: Tuple[int, ...], rng: random.Random, lang: str) -> Tuple[str, List[dict]]:
+    """조합의 카테고리마다 조각 1~2개 → (text, entities). 오프셋은 이어 붙이며 계산."""
+    frags = []
+    for c in combo:
+        pool = COMPILED[c][lang]
+        k = 2 if rng.random() < 0.3 else 1
+        frags.extend(rng.sample(pool, k))
+    rng.shuffle(frags)
+
+    joiner = rng.choice(JOINERS[lang])
+    pieces = [rng.choice(INTROS[lang])]
+    pos = len(pieces[0])
+    ents = []
+    for j, frag in enumerate(frags):
+        if j:
+            pieces.append(joiner)
+            pos += len(joiner)
+        for part in frag:
+            if isinstance(part, str):
+                pieces.append(part)
+                pos += len(part)
+            else:
+                label = part[0]
+                v = fake(label, rng, lang)
+                ents.append({"value": v, "begin": pos, "end": pos + len(v), "label": label})
+                pieces.append(v)
+                pos += len(v)
+    pieces.append(rng.choice(ENDINGS[lang]))
+    return "".join(pieces), ents
+
+def render_negative(rng: random.Random, lang: str) -> str:
+    words = NEG_WORDS[lang]
+    return rng.choice(NEGATIVES[lang]).format(topic=rng.choice(words["topic"]), doc=rng.choice(words["doc"]))
+
+def shard_counts(quotas: List[int], n_shards: int, i: int) -> List[int]:
+    """조합별 할당량을 샤드 i에 비례 배분(모든 샤드 합 = 할당량)."""
+    return [q * (i + 1) // n_shards - q * i // n_shards for q in quotas]
+
+def write_shard(i: int, n_shards: int, quotas: List[int], id_start: int, opts: dict) -> dict:
+    """워커: 샤드 i 생성 → 파일 기록. 조합 인덱스 len(COMBOS)는 음성 예시."""
+    rng = random.Random(f"{opts['seed']}:{i}")
+    counts = shard_counts(quotas, n_shards, i)
+    plan = [k for k, n in enumerate(counts) for _ in range(n)]
+    rng.shuffle(plan)
+
+    path = os.path.join(opts["out_dir"], f"seed_gen_{i:05d}.jsonl{opts['ext']}")
+    en_ratio = opts["en_ratio"]
+    n_neg = len(COMBOS)
+    dumps = json.dumps
+    buf: List[str] = []
+    n_ent = 0
+    # 워커가 이미 프로세스별로 나뉘어 있으므로 압축 스레드는 1개(생성과 겹쳐 돌아감)
+    with open_text_write(path, threads=1) as f:
+        for j, k in enumerate(plan):
+            lang = "en" if rng.random() < en_ratio else "ko"
+            if k == n_neg:
+                text, ents = render_negative(rng, lang), []
+            else:
+                text, ents = render_positive(COMBOS[k], rng, lang)
+            n_ent += len(ents)
+            row = {
+                "id": id_start + j,
+                "messages": [
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": text},
+                    {"role": "assistant", "content": dumps(make_answer(text, ents), ensure_ascii=False)},
+                ],
+            }
+            buf.append(dumps(row, ensure_ascii=False))
+            if len(buf) >= 4096:
+                f.write("\n".join(buf) + "\n")
+                buf = []
+        if buf:
+            f.write("\n".join(buf) + "\n")
+    return {"shard": i, "path": path, "rows": len(plan), "entities": n_ent,
+            "id_range": [id_start, id_start + len(plan) - 1]}
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate template-based seed rows covering the 31 category combinations")
+    ap.add_argument("--out-dir", default="generated", help="샤드 출력 디렉터리")
+    ap.add_argument("--scale", type=int, default=1, help="README 할당량(64/65) 배수")
+    ap.add_argument("--per-combo", type=int, default=None, help="조합별 행 수를 직접 지정(지정 시 --scale 무시)")
+    ap.add_argument("--negative-ratio", type=float, default=0.05, help="양성 행 대비 음성(has_sensitive=false) 행 비율")
+    ap.add_argument("--en-ratio", type=float, default=0.3, help="영어 템플릿 비율")
+    ap.add_argument("--rows-per-shard", type=int, default=100000, help="샤드당 대략적인 행 수")
+    ap.add_argument("--workers", type=int, default=0, help="프로세스 수(기본: CPU 수)")
+    ap.add_argument("--id-start", type=int, default=1, help="첫 행 id")
+    ap.add_argument("--compress", choices=["none", "gz", "zst"], default="none", help="샤드 압축 형식")
+    ap.add_argument("--seed", type=int, default=0, help="난수 시드(같은 시드·옵션이면 같은 결과)")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    quotas = [args.per_combo if args.per_combo is not None else combo_quota(c) * args.scale for c in COMBOS]
+    positives = sum(quotas)
+    quotas.append(round(positives * args.negative_ratio))
+    total = sum(quotas)
+    if total <= 0:
+        print("[gen] nothing to generate")
+        return 1
+
+    n_shards = max(1, -(-total // max(1, args.rows_per_shard)))
+    workers = max(1, min(args.workers or (os.cpu_count() or 1), n_shards))
+    os.makedirs(args.out_dir, exist_ok=True)
+    opts = {"seed": args.seed, "en_ratio": args.en_ratio, "out_dir": args.out_dir,
+            "ext": "" if args.compress == "none" else "." + args.compress}
+
+    # 샤드별 시작 id (샤드 크기는 배분 결과로 미리 계산)
+    starts = []
+    nid = args.id_start
+    for i in range(n_shards):
+        starts.append(nid)
+        nid += sum(shard_counts(quotas, n_shards, i))
+
+    t0 = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futs = [ex.submit(write_shard, i, n_shards, quotas, starts[i], opts) for i in range(n_shards)]
+        for fut in as_completed(futs):
+            r = fut.result()
+            results.append(r)
+            print(f"[gen] {r['path']}: rows={r['rows']} entities={r['entities']} ids={r['id_range'][0]}-{r['id_range'][1]}")
+    dt = time.perf_counter() - t0
+
+    n_ent = sum(r["entities"] for r in results)
+    print(
+        f"\n[gen] combos={len(COMBOS)} rows={total} (positives={positives}, negatives={quotas[-1]}) "
+        f"entities={n_ent} shards={n_shards} workers={workers}"
+    )
+    print("[gen] per combo: " + ", ".join(f"{combo_key(c)}={q}" for c, q in zip(COMBOS, quotas)))
+    print(f"[gen] elapsed={dt:.2f}s ({total / dt if dt > 0 else 0:,.0f} rows/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
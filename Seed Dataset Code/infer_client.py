@@ -0,0 +1,311 @@
+# infer_client.py
+# -*- coding: utf-8 -*-
+"""
+비동기 배치 추론 클라이언트: 각 행의 system + user 메시지를 OpenAI 호환
+/v1/chat/completions 로 보내고 응답을 JSONL로 스트리밍 기록, 처리량/지연 분포 리포트.
+
+  - 표준 라이브러리 asyncio만 사용(HTTP/1.1 keep-alive, http/https)
+  - --concurrency 개 연결을 동시에 유지. 연결마다 --batch-size 개 요청을 한 번에 보내고
+    (파이프라이닝) 응답을 순서대로 받음 → 왕복 횟수 감소. 기본 1(요청-응답 교대)
+  - 재시도: 연결 오류/타임아웃/429/5xx는 지수 백오프(+지터, Retry-After 우선)로 --retries 회까지
+    서버가 응답 뒤 연결을 닫으면(Connection: close) 남은 요청은 시도 횟수 차감 없이 새 연결로 바로 다시 보냄
+  - 출력 행: {"id", "content": <assistant 응답 문자열>, "latency_ms", "attempts"}
+    실패 행: {"id", "error", "attempts"} → eval_detector.py 로 바로 채점 가능
+  - 출력은 완료 순서(입력 순서와 다를 수 있음, 채점기는 id로 맞춤)
+
+예)
+  python mock_detector_server.py --gold gold.jsonl --latency-ms 40 --jitter-ms 20 --error-rate 0.01 &
+  python infer_client.py gold.jsonl preds.jsonl --url http://127.0.0.1:8000/v1/chat/completions --concurrency 32
+  python eval_detector.py gold.jsonl preds.jsonl
+"""
+
+import io
+import os
+import ssl
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from urllib.parse import urlsplit
+from typing import Dict, List, Optional, Tuple
+
+from seed_schema import SYSTEM_PROMPT
+from jsonl_io import open_text_auto, open_text_write
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class HttpConn:
+    """keep-alive HTTP/1.1 연결 하나(요청 여러 개를 먼저 쓰고 응답을 순서대로 읽을 수 있음)."""
+
+    def __init__(self, url: str, timeout: float):
+        u = urlsplit(url)
+        self.https = u.scheme == "https"
+        self.host = u.hostname or "127.0.0.1"
+        self.port = u.port or (443 if self.https else 80)
+        self.path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+        self.host_header = u.netloc
+        self.timeout = timeout
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self):
+        ctx = ssl.create_default_context() if self.https else None
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ctx, limit=1 << 22), self.timeout)
+
+    def request(self, body: bytes, api_key: Optional[str]) -> bytes:
+        head = [f"POST {self.path} HTTP/1.1", f"Host: {self.host_header}",
+                "Content-Type: application/json", f"Content-Length: {len(body)}", "Connection: keep-alive"]
+        if api_key:
+            head.append(f"Authorization: Bearer {api_key}")
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+    async def read_response(self) -> Tuple[int, Dict[str, str], bytes]:
+        head = await asyncio.wait_for(self.reader.readuntil(b"\r\n\r\n"), self.timeout)
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers: Dict[str, str] = {}
+        for ln in lines[1:]:
+            if ":" in ln:
+                k, v = ln.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int((await asyncio.wait_for(self.reader.readline(), self.timeout)).split(b";")[0], 16)
+                chunk = await asyncio.wait_for(self.reader.readexactly(size + 2), self.timeout)
+                if size == 0:
+                    break
+                parts.append(chunk[:-2])
+            body = b"".join(parts)
+        elif "content-length" in headers:
+            body = await asyncio.wait_for(self.reader.readexactly(int(headers["content-length"])), self.timeout)
+        else:
+            body = await asyncio.wait_for(self.reader.read(), self.timeout)
+            headers["connection"] = "close"
+        return status, headers, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+def build_payload(row: dict, model: str, max_tokens: Optional[int]) -> Optional[bytes]:
+    """행 → chat.completions 요청 본문(system은 행의 것, 없으면 기본 프롬프트)."""
+    msgs = row.get("messages")
+    if not isinstance(msgs, list):
+        return None
+    system = next((m.get("content") for m in msgs if isinstance(m, dict) and m.get("role") == "system"), SYSTEM_PROMPT)
+    user = next((m.get("content") for m in msgs if isinstance(m, dict) and m.get("role") == "user"), None)
+    if not isinstance(user, str):
+        return None
+    req = {"model": model, "temperature": 0,
+           "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}]}
+    if max_tokens:
+        req["max_tokens"] = max_tokens
+    return json.dumps(req, ensure_ascii=False).encode("utf-8")
+
+def percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+class Job:
+    __slots__ = ("rid", "body", "attempts", "t_first", "retry_after", "error")
+
+    def __init__(self, rid, body: bytes):
+        self.rid = rid
+        self.body = body
+        self.attempts = 0
+        self.t_first = 0.0
+        self.retry_after = 0.0
+        self.error = ""
+
+class Client:
+    def __init__(self, args, out):
+        self.args = args
+        self.out = out
+        self.rng = random.Random(args.seed)
+        self.latencies: List[float] = []
+        self.status: Dict[str, int] = {}
+        self.ok = 0
+        self.failed = 0
+        self.retries = 0
+
+    def _count(self, key: str):
+        self.status[key] = self.status.get(key, 0) + 1
+
+    def _backoff(self, job: Job) -> float:
+        a = self.args
+        base = min(a.backoff_max, a.backoff * (2 ** (job.attempts - 1)))
+        return max(job.retry_after, base * (0.5 + self.rng.random()))
+
+    def _done(self, job: Job, content: str):
+        lat = (time.perf_counter() - job.t_first) * 1000.0
+        self.latencies.append(lat)
+        self.ok += 1
+        self.out.write(json.dumps({"id": job.rid, "content": content, "latency_ms": round(lat, 2),
+                                   "attempts": job.attempts}, ensure_ascii=False) + "\n")
+
+    def _fail(self, job: Job):
+        self.failed += 1
+        self.out.write(json.dumps({"id": job.rid, "error": job.error, "attempts": job.attempts},
+                                  ensure_ascii=False) + "\n")
+
+    async def _send_batch(self, conn: HttpConn, jobs: List[Job]) -> List[Job]:
+        """jobs를 한 연결로 보내고 재시도할 것만 반환."""
+        now = time.perf_counter()
+        for j in jobs:
+            j.attempts += 1
+            j.retry_after = 0.0
+            if not j.t_first:
+                j.t_first = now
+        retry: List[Job] = []
+        answered = 0
+        try:
+            if conn.writer is None:
+                await conn.connect()
+            conn.writer.write(b"".join(conn.request(j.body, self.args.api_key) for j in jobs))
+            await conn.writer.drain()
+            for j in jobs:
+                if conn.writer is None:
+                    # 서버가 응답 뒤 연결을 닫음(Connection: close / 길이 없는 본문) → 남은 요청은
+                    # 이번 시도로 치지 않고 새 연결에서 다시 보냄
+                    for rest in jobs[answered:]:
+                        rest.attempts -= 1
+                        rest.error = "conn_closed"
+                        self._count("conn_closed")
+                        retry.append(rest)
+                    break
+                status, headers, body = await conn.read_response()
+                answered += 1
+                self._count(str(status))
+                if headers.get("connection", "").lower() == "close":
+                    conn.close()
+                if status == 200:
+                    try:
+                        content = json.loads(body)["choices"][0]["message"]["content"]
+                    except Exception:
+                        j.error = "bad response body"
+                        self._fail(j)
+                        continue
+                    self._done(j, content)
+                    continue
+                j.error = f"HTTP {status}"
+                if status in RETRY_STATUS:
+                    try:
+                        j.retry_after = float(headers.get("retry-after", "0"))
+                    except ValueError:
+                        pass
+                    retry.append(j)
+                else:
+                    self._fail(j)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            conn.close()
+            kind = "timeout" if isinstance(e, asyncio.TimeoutError) else "conn_error"
+            for j in jobs[answered:]:
+                self._count(kind)
+                j.error = kind
+                retry.append(j)
+        final = []
+        for j in retry:
+            if j.attempts > self.args.retries:
+                self._fail(j)
+            else:
+                final.append(j)
+        return final
+
+    async def worker(self, queue: asyncio.Queue):
+        conn = HttpConn(self.args.url, self.args.timeout)
+        try:
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    break
+                while batch:
+                    batch = await self._send_batch(conn, batch)
+                    # 연결이 닫혀 못 보낸 요청(conn_closed)은 재시도가 아니므로 기다리지 않고 바로 보냄
+                    waits = [self._backoff(j) for j in batch if j.error != "conn_closed"]
+                    if waits:
+                        self.retries += len(waits)
+                        await asyncio.sleep(max(waits))
+        finally:
+            conn.close()
+
+async def run(args) -> Tuple[Client, int, float]:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    skipped = 0
+    with open_text_write(args.output) as out:
+        client = Client(args, out)
+        t0 = time.perf_counter()
+        workers = [asyncio.ensure_future(client.worker(queue)) for _ in range(args.concurrency)]
+        batch: List[Job] = []
+        n = 0
+        with open_text_auto(args.input) as f:
+            for line in f:
+                s = line.strip()
+                if not s:
+                    continue
+                if args.limit and n >= args.limit:
+                    break
+                try:
+                    row = json.loads(s)
+                    body = build_payload(row, args.model, args.max_tokens)
+                except Exception:
+                    body = None
+                if body is None:
+                    skipped += 1
+                    continue
+                n += 1
+                batch.append(Job(row.get("id", n), body))
+                if len(batch) >= args.batch_size:
+                    await queue.put(batch)
+                    batch = []
+        if batch:
+            await queue.put(batch)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - t0
+    return client, skipped, elapsed
+
+def main():
+    ap = argparse.ArgumentParser(description="Async batch inference client for an OpenAI-compatible chat endpoint")
+    ap.add_argument("input", help="입력 JSONL(messages: system,user[,assistant]; .gz/.zst 자동 인식)")
+    ap.add_argument("output", help="응답 JSONL(확장자 .gz/.zst면 압축)")
+    ap.add_argument("--url", default="http://127.0.0.1:8000/v1/chat/completions", help="chat completions 엔드포인트")
+    ap.add_argument("--model", default="detector", help="요청 model 필드")
+    ap.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="Bearer 토큰(기본: OPENAI_API_KEY 환경변수)")
+    ap.add_argument("--concurrency", type=int, default=16, help="동시 연결 수")
+    ap.add_argument("--batch-size", type=int, default=1, help="연결당 한 번에 보내는 요청 수(HTTP 파이프라이닝)")
+    ap.add_argument("--retries", type=int, default=3, help="행당 최대 재시도 횟수")
+    ap.add_argument("--backoff", type=float, default=0.2, help="재시도 기본 대기(초, 시도마다 2배)")
+    ap.add_argument("--backoff-max", type=float, default=10.0, help="재시도 대기 상한(초)")
+    ap.add_argument("--timeout", type=float, default=60.0, help="연결/응답 타임아웃(초)")
+    ap.add_argument("--max-tokens", type=int, default=None, help="요청 max_tokens")
+    ap.add_argument("--limit", type=int, default=0, help="앞에서부터 N행만 보냄(0 = 전체)")
+    ap.add_argument("--seed", type=int, default=0, help="백오프 지터 난수 시드")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    if args.concurrency < 1 or args.batch_size < 1:
+        ap.error("--concurrency and --batch-size must be >= 1")
+
+    client, skipped, elapsed = asyncio.run(run(args))
+    lat = sorted(client.latencies)
+    total = client.ok + client.failed
+    print(f"[infer] rows={total} ok={client.ok} failed={client.failed} retries={client.retries} "
+          f"skipped_input={skipped} elapsed={elapsed:.2f}s throughput={total / elapsed if elapsed else 0:.1f} rows/s")
+    print(f"[infer] latency_ms p50={percentile(lat, 0.5):.1f} p90={percentile(lat, 0.9):.1f} "
+          f"p99={percentile(lat, 0.99):.1f} p99.9={percentile(lat, 0.999):.1f} max={lat[-1] if lat else 0:.1f}")
+    print("[infer] responses " + " ".join(f"{k}={v}" for k, v in sorted(client.status.items())))
+    return 0 if client.failed == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
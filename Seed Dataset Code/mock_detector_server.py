@@ -0,0 +1,199 @@
+# mock_detector_server.py
+# -*- coding: utf-8 -*-
+"""
+로컬 모의 탐지기 서버: OpenAI 호환 POST /v1/chat/completions 를 정답 데이터로 응답.
+
+  - --gold JSONL의 user 텍스트 → assistant content(정답 JSON)로 조회해 그대로 돌려줌
+    (모르는 텍스트면 {"text": 원문, "has_sensitive": false, "entities": []})
+  - 지연: 기본 --latency-ms ± --jitter-ms(균등), --tail-prob 확률로 --tail-ms 추가(꼬리 지연 모사)
+  - 오류 주입(시드 고정): --error-rate 500, --rate-limit-rate 429(Retry-After),
+    --drop-rate 응답 없이 연결 끊기
+  - 표준 라이브러리 asyncio만 사용, HTTP/1.1 keep-alive·파이프라이닝
+    (한 연결에 몰려온 요청은 동시에 처리하고 응답은 받은 순서대로 씀 → 배치 추론 서버 모사)
+  - GET /health → {"ok": true, "requests": N}
+
+예)
+  python mock_detector_server.py --gold gold.jsonl --port 8000 --latency-ms 40 --jitter-ms 20 --error-rate 0.01
+  python infer_client.py gold.jsonl preds.jsonl --url http://127.0.0.1:8000/v1/chat/completions
+"""
+
+import io
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, Optional, Tuple
+
+from jsonl_io import open_text_auto
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+def load_answers(path: str) -> Dict[str, str]:
+    """정답 JSONL → {user 텍스트: assistant content}."""
+    answers: Dict[str, str] = {}
+    with open_text_auto(path) as f:
+        for line in f:
+            s = line.strip()
+            if not s:
+                continue
+            try:
+                msgs = json.loads(s)["messages"]
+                answers[msgs[1]["content"]] = msgs[2]["content"]
+            except Exception:
+                continue
+    return answers
+
+def completion_body(content: str, model: str, n: int) -> bytes:
+    return json.dumps({
+        "id": f"chatcmpl-mock-{n}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }, ensure_ascii=False).encode("utf-8")
+
+class MockServer:
+    def __init__(self, answers: Dict[str, str], args):
+        self.answers = answers
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.requests = 0
+        self.injected = {"500": 0, "429": 0, "drop": 0}
+
+    def delay(self) -> float:
+        a = self.args
+        ms = a.latency_ms + (self.rng.uniform(-a.jitter_ms, a.jitter_ms) if a.jitter_ms else 0.0)
+        if a.tail_prob and self.rng.random() < a.tail_prob:
+            ms += a.tail_ms
+        return max(ms, 0.0) / 1000.0
+
+    def answer(self, req: dict) -> str:
+        msgs = req.get("messages") or []
+        user = next((m.get("content") for m in reversed(msgs) if isinstance(m, dict) and m.get("role") == "user"), "")
+        if user in self.answers:
+            return self.answers[user]
+        return json.dumps({"text": user, "has_sensitive": False, "entities": []}, ensure_ascii=False)
+
+    async def respond(self, method: str, path: str, body: bytes) -> Optional[Tuple[int, bytes, dict]]:
+        """→ (status, body, 추가 헤더) / None(연결 끊기)."""
+        if method == "GET" and path == "/health":
+            return 200, json.dumps({"ok": True, "requests": self.requests, "injected": self.injected}).encode(), {}
+        if method != "POST" or not path.endswith("/chat/completions"):
+            return 404, b'{"error": {"message": "not found"}}', {}
+        self.requests += 1
+        n = self.requests
+        try:
+            req = json.loads(body)
+        except Exception:
+            return 400, b'{"error": {"message": "invalid JSON body"}}', {}
+        await asyncio.sleep(self.delay())
+        a = self.args
+        r = self.rng.random()
+        if r < a.drop_rate:
+            self.injected["drop"] += 1
+            return None
+        r -= a.drop_rate
+        if r < a.error_rate:
+            self.injected["500"] += 1
+            return 500, b'{"error": {"message": "injected server error"}}', {}
+        r -= a.error_rate
+        if r < a.rate_limit_rate:
+            self.injected["429"] += 1
+            return 429, b'{"error": {"message": "injected rate limit"}}', {"Retry-After": "0.05"}
+        return 200, completion_body(self.answer(req), req.get("model", "mock-detector"), n), {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """요청은 읽는 대로 동시에 처리하고 응답은 받은 순서대로 씀(파이프라이닝)."""
+        pending: asyncio.Queue = asyncio.Queue()
+        sender = asyncio.ensure_future(self._send_in_order(pending, writer))
+        try:
+            while not sender.done():
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                    lines = head.decode("latin-1").split("\r\n")
+                    method, path, _ = lines[0].split(" ", 2)
+                    headers = {}
+                    for ln in lines[1:]:
+                        if ":" in ln:
+                            k, v = ln.split(":", 1)
+                            headers[k.strip().lower()] = v.strip()
+                    body = await reader.readexactly(int(headers.get("content-length", "0")))
+                except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                    break
+                close = headers.get("connection", "").lower() == "close"
+                await pending.put((asyncio.ensure_future(self.respond(method, path, body)), close))
+                if close:
+                    break
+        finally:
+            await pending.put(None)
+            await sender
+
+    async def _send_in_order(self, pending: asyncio.Queue, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    break
+                task, close = item
+                res = await task
+                if res is None:
+                    break
+                status, payload, extra = res
+                out = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                       "Content-Type: application/json",
+                       f"Content-Length: {len(payload)}",
+                       "Connection: " + ("close" if close else "keep-alive")]
+                out += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1") + payload)
+                await writer.drain()
+                if close:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            # 남은 요청 정리 후 연결 종료
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item is not None:
+                    item[0].cancel()
+            writer.close()
+
+async def serve(args):
+    answers = load_answers(args.gold) if args.gold else {}
+    srv = MockServer(answers, args)
+    server = await asyncio.start_server(srv.handle, args.host, args.port, backlog=1024)
+    print(f"[mock] {len(answers)} answers, listening on http://{args.host}:{args.port}/v1/chat/completions", flush=True)
+    async with server:
+        await server.serve_forever()
+
+def main():
+    ap = argparse.ArgumentParser(description="Local OpenAI-compatible mock detector server answering from ground truth")
+    ap.add_argument("--gold", default=None, help="정답 JSONL(user 텍스트 → assistant 정답; .gz/.zst 자동 인식)")
+    ap.add_argument("--host", default="127.0.0.1", help="바인드 주소")
+    ap.add_argument("--port", type=int, default=8000, help="포트")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="기본 응답 지연(ms)")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="지연 흔들림 폭(±ms, 균등분포)")
+    ap.add_argument("--tail-prob", type=float, default=0.0, help="꼬리 지연이 붙을 확률")
+    ap.add_argument("--tail-ms", type=float, default=500.0, help="꼬리 지연 추가분(ms)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="500 응답 비율")
+    ap.add_argument("--rate-limit-rate", type=float, default=0.0, help="429 응답 비율(Retry-After 0.05초)")
+    ap.add_argument("--drop-rate", type=float, default=0.0, help="응답 없이 연결을 끊는 비율")
+    ap.add_argument("--seed", type=int, default=0, help="지연/오류 주입 난수 시드")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+# pack_sequences.py
+# -*- coding: utf-8 -*-
+"""
+파인튜닝 내보내기용 토큰 예산 추정 + 시퀀스 패킹(First-Fit Decreasing).
+
+  - 행마다 system / user / assistant 메시지 토큰 수를 로컬 토크나이저로 셈
+      --tokenizer auto(기본) : tiktoken 있으면 cl100k_base, 없으면 approx
+                  tiktoken:NAME / hf:경로(transformers) / approx(정규식 기반 근사치)
+    + 메시지당 --msg-overhead(채팅 템플릿 토큰), 행당 --row-overhead(BOS/EOS 등)
+  - 같은 메시지 내용(공통 system 프롬프트 등)은 한 번만 토큰화, --cache(sqlite)에 행 단위
+    결과를 남겨 다음 실행에서는 토크나이저를 부르지 않음(키: 토크나이저 + 행 메시지 해시)
+  - FFD: 길이 내림차순으로 정렬 후, "남은 용량 ≥ 길이"인 가장 앞 시퀀스에 넣음.
+    남은 용량 최대값 세그먼트 트리로 행마다 O(log n)
+  - 출력: --out-dir/packed_00000.jsonl ... 한 줄 = 한 시퀀스
+      {"pack": k, "tokens": 합계, "rows": [원본 행, ...]}
+    쓰기 전에 --out-dir 의 이전 packed_* 샤드를 지움(다시 실행해도 이번 결과만 남음)
+    압축 입력은 첫 패스에서 임시 파일로 풀어 두고, 두 번째 패스에서 오프셋으로 행을 읽음
+  - 리포트: 패킹 효율(실토큰 / 시퀀스 수×길이), 패딩 절감, 행 길이 분포, 역할별 토큰 합
+
+예)
+  python pack_sequences.py shard_*.jsonl --out-dir ./packed --seq-len 4096 --cache tokens.sqlite
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import math
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:   # 선택 의존성
+    tiktoken = None
+
+from jsonl_io import detect_compression, open_binary, open_text_write
+
+ROLES = ("system", "user", "assistant")
+
+# -------------------- 토크나이저 --------------------
+# approx: 한글 음절 1, 영문 연속은 4글자당 1, 숫자는 3자리당 1, 기타 기호 1, 줄바꿈 연속 1
+APPROX_RE = re.compile(r"[가-힣]|[A-Za-z]+|\d+|\n+|[^\sA-Za-z\d가-힣]")
+
+def approx_count(s: str) -> int:
+    n = 0
+    for m in APPROX_RE.finditer(s):
+        tok = m.group()
+        c = tok[0]
+        if "a" <= c.lower() <= "z":
+            n += (len(tok) + 3) // 4
+        elif c.isdigit():
+            n += (len(tok) + 2) // 3
+        else:
+            n += 1
+    return n
+
+def load_tokenizer(spec: str) -> Tuple[str, Callable[[str], int]]:
+    """--tokenizer 지정 → (캐시 키에 쓸 이름, 문자열→토큰 수 함수)."""
+    if spec == "auto":
+        spec = "approx" if tiktoken is None else "tiktoken:cl100k_base"
+    if spec == "approx":
+        return "approx-v1", approx_count
+    if spec.startswith("tiktoken:"):
+        if tiktoken is None:
+            raise SystemExit("[pack] tiktoken is not installed (pip install tiktoken) — use --tokenizer approx")
+        enc = tiktoken.get_encoding(spec.split(":", 1)[1])
+        return spec, lambda s: len(enc.encode(s, disallowed_special=()))
+    if spec.startswith("hf:"):
+        try:
+            from transformers import AutoTokenizer
+        except ImportError:
+            raise SystemExit("[pack] transformers is not installed — use --tokenizer approx or tiktoken:NAME")
+        path = spec.split(":", 1)[1]
+        tok = AutoTokenizer.from_pretrained(path)
+        return f"hf:{os.path.basename(os.path.normpath(path))}", lambda s: len(tok.encode(s, add_special_tokens=False))
+    raise SystemExit(f"[pack] unknown tokenizer spec: {spec}")
+
+class TokenCounter:
+    """메시지 내용 단위 메모 + 행 단위 sqlite 캐시."""
+
+    def __init__(self, name: str, count: Callable[[str], int], cache_path: Optional[str], memo_max: int = 100_000):
+        self.name = name
+        self.count = count
+        self.memo: Dict[str, int] = {}
+        self.memo_max = memo_max
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        self._new: List[Tuple[bytes, str]] = []
+        if cache_path:
+            self.db = sqlite3.connect(cache_path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS row_tokens (key BLOB PRIMARY KEY, counts TEXT) WITHOUT ROWID")
+
+    def _content(self, s: str) -> int:
+        n = self.memo.get(s)
+        if n is None:
+            n = self.count(s)
+            if len(self.memo) < self.memo_max:
+                self.memo[s] = n
+        return n
+
+    def row(self, line: bytes, msgs: list) -> Dict[str, int]:
+        """역할별 토큰 수(같은 역할이 여러 번이면 합)."""
+        key = None
+        if self.db is not None:
+            key = hashlib.blake2b(line, digest_size=16, person=self.name.encode("utf-8")[:16]).digest()
+            hit = self.db.execute("SELECT counts FROM row_tokens WHERE key = ?", (key,)).fetchone()
+            if hit:
+                self.hits += 1
+                return json.loads(hit[0])
+        self.misses += 1
+        counts = dict.fromkeys(ROLES, 0)
+        for m in msgs:
+            if isinstance(m, dict) and isinstance(m.get("content"), str):
+                role = m.get("role") if m.get("role") in counts else "user"
+                counts[role] += self._content(m["content"])
+        if key is not None:
+            self._new.append((key, json.dumps(counts)))
+            if len(self._new) >= 10_000:
+                self.flush()
+        return counts
+
+    def flush(self):
+        if self.db is not None and self._new:
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO row_tokens VALUES (?, ?)", self._new)
+            self._new = []
+
+    def close(self):
+        self.flush()
+        if self.db is not None:
+            self.db.close()
+
+# -------------------- FFD --------------------
+class FirstFitTree:
+    """
+    시퀀스(빈)별 남은 용량의 최대값 세그먼트 트리. 아직 안 연 빈은 용량 가득으로 두므로
+    "가장 앞의 들어갈 수 있는 빈"이 곧 기존 빈 또는 다음 새 빈이 된다.
+    """
+
+    def __init__(self, n_items: int, capacity: int):
+        size = 1
+        while size < max(n_items, 1):
+            size *= 2
+        self.size = size
+        self.tree = [capacity] * (2 * size)
+        self.used = 0   # 연 빈 수
+
+    def place(self, need: int) -> int:
+        tree = self.tree
+        node = 1
+        while node < self.size:
+            node = 2 * node if tree[2 * node] >= need else 2 * node + 1
+        tree[node] -= need
+        b = node - self.size
+        node //= 2
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+        if b >= self.used:
+            self.used = b + 1
+        return b
+
+def ffd(lengths: List[int], capacity: int) -> List[int]:
+    """행별 길이 → 행별 시퀀스 번호(First-Fit Decreasing). 길이는 모두 capacity 이하여야 함."""
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    tree = FirstFitTree(len(lengths), capacity)
+    assign = [0] * len(lengths)
+    for i in order:
+        assign[i] = tree.place(lengths[i])
+    return assign
+
+# -------------------- 입출력 --------------------
+def scan_inputs(paths: List[str], counter: TokenCounter, args, spool_dir: str):
+    """
+    1차 패스: 행별 (파일 번호, 오프셋, 토큰 수, 역할별 토큰). 압축 입력은 임시 파일로 풀어
+    오프셋 읽기가 가능하게 함. 반환: (읽을 파일 경로 목록, 행 목록, 역할별 토큰 합, 깨진 줄 수)
+    """
+    readable = []
+    rows: List[Tuple[int, int, int]] = []
+    role_tot = dict.fromkeys(ROLES, 0)
+    bad = 0
+    for fi, path in enumerate(paths):
+        with open(path, "rb") as fb:
+            compressed = detect_compression(fb.read(4)) is not None
+        spool = None
+        if compressed:
+            fd, spool_path = tempfile.mkstemp(suffix=".jsonl", dir=spool_dir)
+            spool = os.fdopen(fd, "wb")
+            readable.append(spool_path)
+        else:
+            readable.append(path)
+        pos = 0
+        with open_binary(path) as f:
+            for raw in f:
+                off = pos
+                pos += len(raw)
+                if spool is not None:
+                    spool.write(raw)
+                line = raw.strip()
+                if off == 0 and line.startswith(b"\xef\xbb\xbf"):
+                    line = line[3:]
+                if not line:
+                    continue
+                try:
+                    msgs = json.loads(line)["messages"]
+                except Exception:
+                    bad += 1
+                    continue
+                counts = counter.row(line, msgs)
+                n_msgs = sum(1 for m in msgs if isinstance(m, dict))
+                total = sum(counts.values()) + args.msg_overhead * n_msgs + args.row_overhead
+                for r in ROLES:
+                    role_tot[r] += counts.get(r, 0)
+                rows.append((fi, off, total))
+        if spool is not None:
+            spool.close()
+    return readable, rows, role_tot, bad
+
+def clear_old_shards(out_dir: str) -> int:
+    """이전 실행이 남긴 packed_*.jsonl* 삭제(더 큰 실행의 샤드가 새 샤드와 섞이지 않게). 반환: 삭제 수."""
+    if not os.path.isdir(out_dir):
+        return 0
+    removed = 0
+    for name in os.listdir(out_dir):
+        if name.startswith("packed_") and ".jsonl" in name:
+            path = os.path.join(out_dir, name)
+            if os.path.isfile(path):
+                os.remove(path)
+                removed += 1
+    return removed
+
+def write_packs(readable: List[str], rows: List[Tuple[int, int, int]], assign: List[int],
+                n_packs: int, args) -> int:
+    """2차 패스: 시퀀스 순서대로 행을 오프셋으로 읽어 샤드에 기록. 반환: 샤드 수."""
+    members: List[List[int]] = [[] for _ in range(n_packs)]
+    for i, b in enumerate(assign):
+        if b >= 0:
+            members[b].append(i)
+    os.makedirs(args.out_dir, exist_ok=True)
+    ext = "" if args.compress == "none" else "." + args.compress
+    files = [open(p, "rb") for p in readable]
+    shards = 0
+    out = None
+    try:
+        for k, idx in enumerate(members):
+            if k % args.packs_per_shard == 0:
+                if out is not None:
+                    out.close()
+                out = open_text_write(os.path.join(args.out_dir, f"packed_{shards:05d}.jsonl{ext}"))
+                shards += 1
+            lines = []
+            for i in idx:
+                fi, off, _ = rows[i]
+                f = files[fi]
+                f.seek(off)
+                raw = f.readline().strip()
+                if off == 0 and raw.startswith(b"\xef\xbb\xbf"):
+                    raw = raw[3:]
+                lines.append(raw.decode("utf-8", errors="replace"))
+            tokens = sum(rows[i][2] for i in idx)
+            out.write(f'{{"pack": {k}, "tokens": {tokens}, "rows": [' + ", ".join(lines) + "]}\n")
+    finally:
+        if out is not None:
+            out.close()
+        for f in files:
+            f.close()
+    return shards
+
+def main():
+    ap = argparse.ArgumentParser(description="Token-budget estimator and first-fit-decreasing sequence packer for fine-tuning export")
+    ap.add_argument("inputs", nargs="+", help="입력 JSONL(messages 스키마, .gz/.zst 자동 인식)")
+    ap.add_argument("--out-dir", default="packed", help="패킹 샤드 출력 디렉터리")
+    ap.add_argument("--seq-len", type=int, default=4096, help="학습 시퀀스 길이(토큰)")
+    ap.add_argument("--tokenizer", default="auto", help="auto / approx / tiktoken:NAME / hf:경로")
+    ap.add_argument("--msg-overhead", type=int, default=4, help="메시지당 채팅 템플릿 토큰 수")
+    ap.add_argument("--row-overhead", type=int, default=2, help="행당 추가 토큰 수(BOS/EOS 등)")
+    ap.add_argument("--cache", default=None, help="행별 토큰 수 캐시(sqlite) 경로")
+    ap.add_argument("--packs-per-shard", type=int, default=10000, help="샤드당 시퀀스 수")
+    ap.add_argument("--compress", choices=["none", "gz", "zst"], default="none", help="샤드 압축 형식")
+    ap.add_argument("--stats-only", action="store_true", help="토큰 수/패킹 효율만 계산하고 샤드는 쓰지 않음")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    name, count = load_tokenizer(args.tokenizer)
+    counter = TokenCounter(name, count, args.cache)
+    with tempfile.TemporaryDirectory(prefix="pack_spool_") as spool_dir:
+        try:
+            readable, rows, role_tot, bad = scan_inputs(args.inputs, counter, args, spool_dir)
+        finally:
+            counter.close()
+
+        fit = [i for i, r in enumerate(rows) if r[2] <= args.seq_len]
+        too_long = len(rows) - len(fit)
+        sub = ffd([rows[i][2] for i in fit], args.seq_len)
+        assign = [-1] * len(rows)
+        for i, b in zip(fit, sub):
+            assign[i] = b
+        n_packs = max(sub) + 1 if sub else 0
+
+        shards = removed = 0
+        if not args.stats_only:
+            removed = clear_old_shards(args.out_dir)
+        if not args.stats_only and n_packs:
+            shards = write_packs(readable, rows, assign, n_packs, args)
+
+    lens = sorted(rows[i][2] for i in fit)
+    packed_tokens = sum(lens)
+    slots = n_packs * args.seq_len
+    eff = packed_tokens / slots if slots else 0.0
+
+    def pct(q):
+        return lens[min(len(lens) - 1, int(q * (len(lens) - 1)))] if lens else 0
+
+    print(f"# 토큰 예산 (tokenizer={name}, 캐시 적중 {counter.hits} / 신규 {counter.misses})")
+    print("- 역할별 합계: " + ", ".join(f"{r}={role_tot[r]}" for r in ROLES))
+    print(f"- 행 길이: min={lens[0] if lens else 0} p50={pct(0.5)} p95={pct(0.95)} max={lens[-1] if lens else 0} "
+          f"mean={packed_tokens / len(lens) if lens else 0:.1f}")
+    print(f"\n# 패킹 (seq_len={args.seq_len}, FFD)")
+    print(f"- 행 {len(fit)}개 → 시퀀스 {n_packs}개 (시퀀스당 평균 {len(fit) / n_packs if n_packs else 0:.2f}행)")
+    print(f"- 효율: {eff:.2%}  (실토큰 {packed_tokens} / 슬롯 {slots})")
+    if lens:
+        naive = len(lens) * args.seq_len
+        lower = math.ceil(packed_tokens / args.seq_len)
+        print(f"- 패딩: 행마다 한 시퀀스일 때 {naive - packed_tokens} → 패킹 후 {slots - packed_tokens} "
+              f"(시퀀스 수 하한 {lower})")
+    if too_long:
+        print(f"- seq_len 초과로 제외: {too_long}행")
+    tail = "" if args.stats_only else f" -> {args.out_dir} ({shards} shards, removed {removed} old)"
+    print(f"\n[pack] rows={len(rows)} bad_lines={bad} packs={n_packs}{tail}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# redact_export.py
+# -*- coding: utf-8 -*-
+"""
+마스킹/가명 처리본 내보내기: 엔티티 값을 [LABEL] 자리표시자 또는 형식 보존 마스크로 바꾼
+같은 스키마의 데이터셋을 만든다(레닥터 학습용, 외부 공유용).
+
+  - 행의 모든 엔티티 구간을 오른쪽에서 왼쪽으로 한 번 훑으며 치환
+    → 치환 뒤쪽 길이(suffix)만 누적하면 새 오프셋이 바로 나오므로 재탐색 없음
+  - --mode label : "[CARD_NUMBER]" 처럼 라벨 자리표시자
+    --mode mask  : 길이·구분자 보존 마스크(숫자/영문/한글 → --mask-char, 기호·공백 유지),
+                   --keep-last N 이면 --keep-labels 라벨(기본: 카드·계좌 번호)만 끝 N개 영숫자를
+                   그대로(예: 카드 끝 4자리). 단, 값의 영숫자 절반 넘게는 남기지 않음
+                   (김하늘 같은 짧은 값이 통째로 새지 않게)
+  - 치환문이 원래 값과 같은 엔티티가 하나라도 있으면 그 행은 제외(unmasked; 원래 "****" 처럼
+    이미 가려진 값은 예외)
+  - 치환 후 entities의 value/begin/end는 새 텍스트 기준(text[begin:end] == value 유지),
+    user 메시지와 정답 text를 함께 바꿈
+  - 안전 우선: 오프셋이 값과 안 맞거나 user ≠ 정답 text 인 행은 값이 새어 나갈 수 있어 제외
+    (겹치는 엔티티는 합집합 구간 하나로 합쳐 치환 → 일부만 가려지는 일 없음)
+
+예)
+  python redact_export.py id1-id320_fix2.jsonl redacted.jsonl --mode label
+  python redact_export.py big.jsonl.gz masked.jsonl.gz --mode mask --keep-last 4
+"""
+
+import io
+import sys
+import json
+import time
+import argparse
+from typing import List, Optional, Set, Tuple
+
+from jsonl_io import open_text_auto, open_text_write
+
+# --keep-last 를 적용하는 기본 라벨(끝자리로 본인 확인하는 번호류)
+KEEP_LAST_LABELS = "CARD_NUMBER,BANK_ACCOUNT,VIRTUAL_ACCOUNT,SECURITIES_ACCOUNT,IBAN"
+
+def mask_value(value: str, mask_char: str, keep_last: int) -> str:
+    """
+    영숫자·한글만 mask_char로, 끝 keep_last개 영숫자는 유지. 길이·기호 보존.
+    남기는 수는 영숫자 개수의 절반 이하(항상 하나 이상 가림). 영숫자가 없는 값은 공백 외 전부 가림.
+    """
+    alnum = sum(1 for c in value if c.isalnum())
+    if not alnum:
+        return "".join(c if c.isspace() else mask_char for c in value)
+    out = list(value)
+    keep = min(keep_last, alnum // 2)
+    for i in range(len(out) - 1, -1, -1):
+        if out[i].isalnum():
+            if keep > 0:
+                keep -= 1
+            else:
+                out[i] = mask_char
+    return "".join(out)
+
+def redact_text(text: str, ents: List[dict], mode: str, mask_char: str = "*",
+                keep_last: int = 0, keep_labels: Optional[Set[str]] = None
+                ) -> Optional[Tuple[str, List[dict], int, int]]:
+    """
+    오른쪽→왼쪽 한 번에 모든 구간 치환.
+    겹치는 구간은 먼저 합집합 하나로 묶고(대표 엔티티 = 가장 긴 것) 통째로 치환한다.
+    keep_last 는 대표 엔티티 라벨이 keep_labels 에 있을 때만 적용.
+    반환: (새 텍스트, 새 entities, 합쳐진 엔티티 수, 치환문이 원래 값과 같은 구간 수)
+          / 오프셋이 값과 안 맞으면 None.
+    """
+    spans = []
+    for e in ents:
+        b, en, v = e.get("begin"), e.get("end"), e.get("value")
+        if not (isinstance(b, int) and isinstance(en, int) and 0 <= b < en <= len(text)) or text[b:en] != v:
+            return None
+        spans.append((b, en, e))
+    spans.sort(key=lambda t: (t[0], -t[1]))
+
+    groups: List[list] = []   # [begin, end, 대표 엔티티]
+    merged = 0
+    for b, en, e in spans:
+        g = groups[-1] if groups else None
+        if g is not None and b < g[1]:
+            merged += 1
+            if en - b > g[2]["end"] - g[2]["begin"]:
+                g[2] = e
+            g[1] = max(g[1], en)
+        else:
+            groups.append([b, en, e])
+
+    pieces: List[str] = []
+    placed = []          # (치환문, 뒤쪽 새 길이, 엔티티) — 오른쪽부터
+    suffix = 0           # 지금까지 만든 뒤쪽 새 텍스트 길이
+    right = len(text)    # 아직 처리 안 한 원문 구간의 오른쪽 끝
+    unmasked = 0
+    for b, en, e in reversed(groups):
+        tail = text[en:right]
+        pieces.append(tail)
+        suffix += len(tail)
+        if mode == "label":
+            rep = f"[{e.get('label', 'ENTITY')}]"
+        else:
+            keep = keep_last if keep_labels is None or e.get("label") in keep_labels else 0
+            rep = mask_value(text[b:en], mask_char, keep)
+        if rep == text[b:en] and any(c != mask_char and not c.isspace() for c in rep):
+            unmasked += 1     # 이미 가려진 값("****")이 아닌데 그대로 남음
+        pieces.append(rep)
+        placed.append((rep, suffix, e))
+        suffix += len(rep)
+        right = b
+    pieces.append(text[:right])
+    new_text = "".join(reversed(pieces))
+    n = len(new_text)
+
+    new_ents = []
+    for rep, after, e in reversed(placed):
+        end = n - after
+        ne = dict(e)
+        ne["value"] = rep
+        ne["begin"] = end - len(rep)
+        ne["end"] = end
+        new_ents.append(ne)
+    return new_text, new_ents, merged, unmasked
+
+def redact_row(row: dict, args, stats: dict) -> Optional[dict]:
+    """행 하나 치환. 제외해야 하면 None(stats에 사유 누적)."""
+    try:
+        msgs = row["messages"]
+        user = msgs[1]["content"]
+        ans = json.loads(msgs[2]["content"])
+        text = ans["text"]
+        ents = ans["entities"]
+    except Exception:
+        stats["bad_lines"] += 1
+        return None
+    if not isinstance(ents, list) or not all(isinstance(e, dict) for e in ents):
+        stats["bad_lines"] += 1
+        return None
+    if user != text:
+        stats["text_mismatch"] += 1
+        return None
+    res = redact_text(text, ents, args.mode, args.mask_char, args.keep_last, args._keep_labels)
+    if res is None:
+        stats["bad_offsets"] += 1
+        return None
+    new_text, new_ents, merged, unmasked = res
+    if unmasked:
+        stats["unmasked"] += 1
+        return None
+    stats["entities"] += len(new_ents)
+    stats["merged_overlaps"] += merged
+    ans["text"] = new_text
+    ans["entities"] = new_ents
+    msgs[1]["content"] = new_text
+    msgs[2]["content"] = json.dumps(ans, ensure_ascii=False)
+    return row
+
+def main():
+    ap = argparse.ArgumentParser(description="Streaming redacted/masked export: replace entity spans with [LABEL] or format-preserving masks")
+    ap.add_argument("input", help="입력 JSONL(.gz/.zst 자동 인식)")
+    ap.add_argument("output", help="출력 JSONL(같은 스키마; 확장자 .gz/.zst면 압축)")
+    ap.add_argument("--mode", choices=["label", "mask"], default="label", help="label: [LABEL] 자리표시자 / mask: 형식 보존 마스크")
+    ap.add_argument("--mask-char", default="*", help="mask 모드에서 영숫자·한글 대신 쓸 문자")
+    ap.add_argument("--keep-last", type=int, default=0, help="mask 모드에서 끝에 남길 영숫자 개수(값의 영숫자 절반 이하로 제한)")
+    ap.add_argument("--keep-labels", default=KEEP_LAST_LABELS,
+                    help="--keep-last 를 적용할 라벨(쉼표 구분, '*' = 모든 라벨)")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    if len(args.mask_char) != 1:
+        ap.error("--mask-char must be a single character")
+    args._keep_labels = None if args.keep_labels.strip() == "*" else {
+        lab.strip() for lab in args.keep_labels.split(",") if lab.strip()}
+
+    stats = {"rows": 0, "written": 0, "entities": 0, "merged_overlaps": 0,
+             "bad_lines": 0, "bad_offsets": 0, "text_mismatch": 0, "unmasked": 0}
+    t0 = time.perf_counter()
+    with open_text_auto(args.input) as fin, open_text_write(args.output) as fout:
+        for line in fin:
+            s = line.strip()
+            if not s:
+                continue
+            stats["rows"] += 1
+            try:
+                row = json.loads(s)
+            except Exception:
+                stats["bad_lines"] += 1
+                continue
+            out = redact_row(row, args, stats)
+            if out is None:
+                continue
+            fout.write(json.dumps(out, ensure_ascii=False) + "\n")
+            stats["written"] += 1
+    dt = time.perf_counter() - t0
+    skipped = stats["rows"] - stats["written"]
+    print(f"[redact] rows={stats['rows']} written={stats['written']} skipped={skipped} "
+          f"(bad_offsets={stats['bad_offsets']} text_mismatch={stats['text_mismatch']} unmasked={stats['unmasked']} bad_lines={stats['bad_lines']}) "
+          f"entities={stats['entities']} merged_overlaps={stats['merged_overlaps']} "
+          f"{stats['rows'] / dt if dt else 0:.0f} rows/s -> {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
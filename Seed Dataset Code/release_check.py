@@ -0,0 +1,244 @@
+# release_check.py
+# -*- coding: utf-8 -*-
+"""
+릴리스 점검 드라이버: 루트 아래의 모든 샤드에 대해 fix → validate → count를
+프로세스 풀에서 동시에 실행하고, 결과를 하나의 리포트로 합친다.
+
+  - 샤드 = 루트 하위 디렉터리의 *.jsonl / *.jsonl.gz / *.jsonl.zst (기본적으로 *_fix* 결과물은 제외)
+  - 도구(autofix_offsets / check_dataset / count_entities)는 --tools-dir 한 곳의
+    사본만 불러 쓴다(샤드 디렉터리마다 있는 사본과 동일).
+  - 큰 샤드부터 제출하므로 전체 소요 시간 ≈ 가장 큰 샤드 처리 시간.
+
+예)
+  python release_check.py --root "../Seed Dataset Fix" --out-dir ./release_out
+"""
+
+import os
+import re
+import sys
+import io
+import json
+import glob
+import time
+import argparse
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+from jsonl_io import strip_jsonl_ext
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.path.join(HERE, "..", "Seed Dataset Fix")
+
+FIX_OUTPUT_RE = re.compile(r"_fix\d*\.jsonl(?:\.gz|\.zst)?$")
+SHARD_GLOBS = ("*.jsonl", "*.jsonl.gz", "*.jsonl.zst")
+
+# 워커 프로세스에서 초기화되는 도구 모듈
+_autofix = _check = _count = None
+
+def _init_worker(tools_dir: str):
+    global _autofix, _check, _count
+    if tools_dir not in sys.path:
+        sys.path.insert(0, tools_dir)
+    import autofix_offsets as _a
+    import check_dataset as _c
+    import count_entities as _n
+    _autofix, _check, _count = _a, _c, _n
+
+def find_shards(root: str, include_fixed: bool) -> List[str]:
+    """root 하위 디렉터리의 샤드 목록(크기 내림차순)."""
+    out = []
+    for p in (f for g in SHARD_GLOBS for f in glob.glob(os.path.join(root, "**", g), recursive=True)):
+        if not include_fixed and FIX_OUTPUT_RE.search(p):
+            continue
+        out.append(p)
+    return sorted(out, key=lambda p: os.path.getsize(p), reverse=True)
+
+def find_tools_dir(root: str) -> str:
+    """autofix_offsets.py 사본이 있는 첫 디렉터리."""
+    hits = sorted(glob.glob(os.path.join(root, "**", "autofix_offsets.py"), recursive=True))
+    if not hits:
+        raise SystemExit(f"[release] no autofix_offsets.py under {root}; pass --tools-dir")
+    return os.path.dirname(hits[0])
+
+def run_shard(shard: str, root: str, out_dir: str, opts: dict) -> dict:
+    """워커: 샤드 하나에 대해 fix → validate → count."""
+    rel = os.path.relpath(shard, root)
+    stem = strip_jsonl_ext(rel)
+    fixed = os.path.join(out_dir, stem + "_fix.jsonl")
+    os.makedirs(os.path.dirname(fixed), exist_ok=True)
+    timing = {}
+
+    # 1) fix
+    t0 = time.perf_counter()
+    fix_args = Namespace(
+        drop_unknown_labels=opts["drop_unknown_labels"],
+        _label_map=_autofix.load_label_map(opts["label_map"]),
+        nfkc=opts["nfkc"],
+        casefold=opts["casefold"],
+        sync_text=opts["sync_text"],
+    )
+    stats = _autofix.fix_file(shard, fixed, fix_args, _autofix.new_stats())
+    timing["fix"] = time.perf_counter() - t0
+
+    # 2) validate (보정 결과물 기준)
+    t0 = time.perf_counter()
+    summary = _check.SummaryCollector(opts["examples"])
+    writer = _check.ReportWriter("jsonl", io.StringIO(), summary)
+    check_opts = {
+        "use_nfkc": opts["nfkc"],
+        "allow_overlap": opts["allow_overlap"],
+        "strict_entity_keys": opts["strict_entity_keys"],
+        "warn_sort": True,
+        "check_text": opts["check_text"],
+    }
+    total, bad = _check.check_file(fixed, check_opts, writer, format_checks=opts["format_checks"])
+    timing["validate"] = time.perf_counter() - t0
+
+    # 3) count
+    t0 = time.perf_counter()
+    per_id, groups, total_entities, total_rows, bad_lines = _count.count_file(fixed)
+    timing["count"] = time.perf_counter() - t0
+
+    return {
+        "shard": rel,
+        "output": fixed,
+        "bytes": os.path.getsize(shard),
+        "autofix": stats,
+        "check": {
+            "lines": total,
+            "problems": bad,
+            "codes": [{k: r[k] for k in ("code", "severity", "count", "examples")} for r in summary.records()],
+        },
+        "count": {
+            "rows": total_rows,
+            "entities": total_entities,
+            "avg": round(total_entities / total_rows, 2) if total_rows else 0,
+            "bad_lines": bad_lines,
+            "by_entity_count": {str(k): len(v) for k, v in sorted(groups.items())},
+        },
+        "ids": sorted(per_id, key=str),
+        "seconds": {k: round(v, 4) for k, v in timing.items()},
+        "pid": os.getpid(),
+    }
+
+def combine(results: List[dict], wall: float, workers: int) -> dict:
+    """샤드별 결과 → 전체 리포트(샤드 간 중복 id 포함)."""
+    owners: Dict[str, List[str]] = {}
+    for r in results:
+        for rid in r.pop("ids"):
+            owners.setdefault(str(rid), []).append(r["shard"])
+    dup_ids = {rid: shards for rid, shards in owners.items() if len(shards) > 1}
+
+    totals = {"lines": 0, "problems": 0, "entities": 0, "fixed_offsets": 0, "unmatched_offsets": 0}
+    codes: Dict[str, int] = {}
+    for r in results:
+        totals["lines"] += r["check"]["lines"]
+        totals["problems"] += r["check"]["problems"]
+        totals["entities"] += r["count"]["entities"]
+        totals["fixed_offsets"] += r["autofix"]["fixed_offsets"]
+        totals["unmatched_offsets"] += r["autofix"]["unmatched_offsets"]
+        for c in r["check"]["codes"]:
+            codes[c["code"]] = codes.get(c["code"], 0) + c["count"]
+
+    shard_seconds = [sum(r["seconds"].values()) for r in results]
+    return {
+        "shards": len(results),
+        "workers": workers,
+        "wall_seconds": round(wall, 4),
+        "sum_shard_seconds": round(sum(shard_seconds), 4),
+        "max_shard_seconds": round(max(shard_seconds, default=0.0), 4),
+        "totals": totals,
+        "problem_codes": dict(sorted(codes.items(), key=lambda kv: -kv[1])),
+        "duplicate_ids_across_shards": dup_ids,
+        "results": sorted(results, key=lambda r: r["shard"]),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Run fix/validate/count over every shard concurrently and merge the reports")
+    ap.add_argument("--root", default=DEFAULT_ROOT, help="샤드 루트(기본: ../Seed Dataset Fix)")
+    ap.add_argument("--out-dir", default="release_out", help="보정 결과/리포트 출력 디렉터리")
+    ap.add_argument("--tools-dir", default=None, help="도구 스크립트 디렉터리(기본: 루트 아래 첫 사본)")
+    ap.add_argument("--include-fixed", action="store_true", help="*_fix*.jsonl(.gz/.zst) 결과물도 샤드로 취급")
+    ap.add_argument("--workers", type=int, default=0, help="프로세스 수(기본: CPU 수, 샤드 수 이하)")
+    ap.add_argument("--examples", type=int, default=3, help="오류 코드별 예시 줄 수")
+    ap.add_argument("--nfkc", action="store_true", help="정규화 비교 시 NFKC 사용(기본 NFC)")
+    ap.add_argument("--casefold", action="store_true", help="대소문자 무시(casefold) 비교 사용")
+    ap.add_argument("--label-map", type=str, default=None, help="라벨 매핑 JSON 파일 경로")
+    ap.add_argument("--drop-unknown-labels", action="store_true", help="허용 라벨로 매핑되지 않으면 엔티티 삭제")
+    ap.add_argument("--allow-overlap", action="store_true", help="겹치는 스팬을 오류로 보지 않음")
+    ap.add_argument("--strict-entity-keys", action="store_true", help="엔티티 키 추가/누락을 오류로 처리")
+    ap.add_argument("--check-text", action="store_true", help="정답 text와 user 원문 불일치를 오류로 처리")
+    ap.add_argument("--sync-text", action="store_true", help="fix 단계에서 정규화/공백만 다른 text를 user 원문으로 동기화")
+    ap.add_argument("--format-checks", action="store_true", help="라벨별 값 형식/체크섬 검사(check_dataset --format-checks)")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    root = os.path.abspath(args.root)
+    out_dir = os.path.abspath(args.out_dir)
+    tools_dir = os.path.abspath(args.tools_dir) if args.tools_dir else find_tools_dir(root)
+    shards = [p for p in find_shards(root, args.include_fixed)
+              if not os.path.abspath(p).startswith(out_dir + os.sep)]
+    if not shards:
+        print(f"[release] no shards under {root}")
+        return 1
+
+    workers = args.workers or (os.cpu_count() or 1)
+    workers = max(1, min(workers, len(shards)))
+    opts = {
+        "nfkc": args.nfkc,
+        "casefold": args.casefold,
+        "label_map": args.label_map,
+        "drop_unknown_labels": args.drop_unknown_labels,
+        "allow_overlap": args.allow_overlap,
+        "strict_entity_keys": args.strict_entity_keys,
+        "format_checks": args.format_checks,
+        "check_text": args.check_text,
+        "sync_text": args.sync_text,
+        "examples": max(0, args.examples),
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    t0 = time.perf_counter()
+    results = []
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tools_dir,)) as ex:
+        futs = {ex.submit(run_shard, s, root, out_dir, opts): s for s in shards}
+        for fut in as_completed(futs):
+            try:
+                r = fut.result()
+            except Exception as e:
+                failed.append({"shard": os.path.relpath(futs[fut], root), "error": repr(e)})
+                print(f"[release] FAILED {futs[fut]}: {e!r}")
+                continue
+            results.append(r)
+            print(
+                f"[release] {r['shard']}: lines={r['check']['lines']} problems={r['check']['problems']} "
+                f"entities={r['count']['entities']} fixed_offsets={r['autofix']['fixed_offsets']} "
+                f"unmatched={r['autofix']['unmatched_offsets']} ({sum(r['seconds'].values()):.2f}s)"
+            )
+    wall = time.perf_counter() - t0
+
+    report = combine(results, wall, workers)
+    report["failed"] = failed
+    report_path = os.path.join(out_dir, "report.json")
+    with open(report_path, "w", encoding="utf-8", newline="\n") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    t = report["totals"]
+    print(
+        f"\n[release] shards={report['shards']} workers={workers} lines={t['lines']} problems={t['problems']} "
+        f"entities={t['entities']} duplicate_ids={len(report['duplicate_ids_across_shards'])} failed={len(failed)}"
+    )
+    print(
+        f"[release] wall={report['wall_seconds']:.2f}s (largest shard {report['max_shard_seconds']:.2f}s, "
+        f"sum {report['sum_shard_seconds']:.2f}s) report={report_path}"
+    )
+    return 0 if (t["problems"] == 0 and not failed) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# sample_balanced.py
+# -*- coding: utf-8 -*-
+"""
+카테고리 조합별 층화 스트리밍 샘플러/밸런서.
+
+  - 각 행을 엔티티 라벨로 README 31가지 조합(없으면 "none")과 라벨 버킷에 배정
+  - 조합(층)마다 목표 개수 크기의 저장소 표본(reservoir sampling, Algorithm R)을 유지
+    → 입력을 한 번만 훑고, 메모리는 목표 행 수(+ 라벨 보충분)에 비례
+  - --label-min K: 라벨별로도 K개짜리 저장소를 따로 두었다가, 조합 표본에서 K개에
+    못 미친 라벨은 그 저장소에서 보충(조합 할당량 밖에서 더해짐 → 리포트에 추가 행 수 표시)
+  - 출력 순서는 입력 순서(--shuffle 시 시드 고정 셔플)
+
+예)
+  python sample_balanced.py big_1.jsonl big_2.jsonl -o balanced.jsonl --scale 2 --negatives 100
+"""
+
+import io
+import sys
+import json
+import random
+import argparse
+from typing import Dict, List, Optional
+
+from seed_schema import COMBOS, combo_key, combo_of, combo_quota
+from jsonl_io import open_text_auto, open_text_write
+
+class Reservoir:
+    """크기 k 저장소 표본(Algorithm R). items: (key, line, labels)."""
+    __slots__ = ("k", "seen", "items")
+
+    def __init__(self, k: int):
+        self.k = k
+        self.seen = 0
+        self.items: List[tuple] = []
+
+    def offer(self, item: tuple, rng: random.Random):
+        self.seen += 1
+        if len(self.items) < self.k:
+            self.items.append(item)
+        else:
+            j = rng.randrange(self.seen)
+            if j < self.k:
+                self.items[j] = item
+
+def row_labels(line: str) -> Optional[List[str]]:
+    """JSONL 한 줄 → 엔티티 라벨 목록(깨진 줄이면 None)."""
+    try:
+        row = json.loads(line)
+        ans = json.loads(row["messages"][2]["content"])
+        ents = ans["entities"]
+    except Exception:
+        return None
+    if not isinstance(ents, list):
+        return None
+    return [e["label"] for e in ents if isinstance(e, dict) and isinstance(e.get("label"), str)]
+
+def build_targets(scale: int, per_combo: Optional[int], negatives: int) -> Dict[str, int]:
+    targets = {combo_key(c): (per_combo if per_combo is not None else combo_quota(c) * scale) for c in COMBOS}
+    targets[combo_key(())] = negatives
+    return targets
+
+def sample(paths: List[str], targets: Dict[str, int], label_min: int, rng: random.Random):
+    """
+    한 번의 스트리밍 패스로 층별/라벨별 표본 추출.
+    반환: (선택된 항목 목록, 층별 저장소, 라벨별 저장소, 라벨 보충으로 할당량 밖에서 더한 행 수, 깨진 줄 수)
+    """
+    strata = {k: Reservoir(n) for k, n in targets.items()}
+    by_label: Dict[str, Reservoir] = {}
+    bad = 0
+    for fi, path in enumerate(paths):
+        with open_text_auto(path) as f:
+            for ln, line in enumerate(f, 1):
+                s = line.strip()
+                if not s:
+                    continue
+                labels = row_labels(s)
+                if labels is None:
+                    bad += 1
+                    continue
+                item = ((fi, ln), s, labels)
+                key = combo_key(combo_of(labels))
+                res = strata.get(key)
+                if res is not None:
+                    res.offer(item, rng)
+                if label_min > 0:
+                    for lab in set(labels):
+                        r = by_label.get(lab)
+                        if r is None:
+                            r = by_label[lab] = Reservoir(label_min)
+                        r.offer(item, rng)
+
+    chosen = {it[0]: it for res in strata.values() for it in res.items}
+    extra = 0
+    if label_min > 0:
+        have: Dict[str, int] = {}
+        for it in chosen.values():
+            for lab in set(it[2]):
+                have[lab] = have.get(lab, 0) + 1
+        # 드문 라벨부터 보충
+        for lab in sorted(by_label, key=lambda l: have.get(l, 0)):
+            for it in by_label[lab].items:
+                if have.get(lab, 0) >= label_min:
+                    break
+                if it[0] in chosen:
+                    continue
+                chosen[it[0]] = it
+                extra += 1
+                for l2 in set(it[2]):
+                    have[l2] = have.get(l2, 0) + 1
+    return [chosen[k] for k in sorted(chosen)], strata, by_label, extra, bad
+
+def main():
+    ap = argparse.ArgumentParser(description="Stratified streaming sampler: balance rows by README category combination")
+    ap.add_argument("inputs", nargs="+", help="입력 JSONL 파일(여러 개 가능, 순서대로 한 번씩만 읽음; .gz/.zst 자동 인식)")
+    ap.add_argument("-o", "--output", required=True, help="출력 JSONL (확장자 .gz/.zst면 압축)")
+    ap.add_argument("--scale", type=int, default=1, help="README 할당량(64/65) 배수")
+    ap.add_argument("--per-combo", type=int, default=None, help="조합별 목표 행 수(지정 시 --scale 무시)")
+    ap.add_argument("--negatives", type=int, default=0, help="음성(엔티티 없음) 행 목표 수")
+    ap.add_argument("--label-min", type=int, default=0, help="라벨별 최소 포함 행 수(부족분은 라벨 저장소에서 보충)")
+    ap.add_argument("--shuffle", action="store_true", help="출력 순서를 섞음(기본: 입력 순서)")
+    ap.add_argument("--seed", type=int, default=0, help="난수 시드")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    rng = random.Random(args.seed)
+    targets = build_targets(args.scale, args.per_combo, args.negatives)
+    items, strata, by_label, extra, bad = sample(args.inputs, targets, args.label_min, rng)
+    if args.shuffle:
+        rng.shuffle(items)
+
+    with open_text_write(args.output) as f:
+        for it in items:
+            f.write(it[1] + "\n")
+
+    print("# 조합별 표본 (seen → selected / target)")
+    short = 0
+    for key, res in strata.items():
+        mark = ""
+        if len(res.items) < res.k:
+            short += res.k - len(res.items)
+            mark = f"  (부족 {res.k - len(res.items)})"
+        print(f"- {key}: {res.seen} → {len(res.items)} / {res.k}{mark}")
+    if args.label_min > 0:
+        counts: Dict[str, int] = {}
+        for it in items:
+            for lab in set(it[2]):
+                counts[lab] = counts.get(lab, 0) + 1
+        low = sorted((lab for lab in by_label if counts.get(lab, 0) < args.label_min), key=lambda l: counts.get(l, 0))
+        print(f"\n# 라벨 보충: 조합 할당량 밖으로 {extra}행 추가"
+              f" (조합 목표 합계 {sum(targets.values())} + 보충 {extra})")
+        print(f"# 보충 후에도 최소 {args.label_min}행 미달 라벨 {len(low)}개"
+              + (": " + ", ".join(f"{lab}={counts.get(lab, 0)}" for lab in low) if low else ""))
+    print(f"\n[sample] wrote {len(items)} rows to {args.output} (target {sum(targets.values())}, beyond quota {extra}, shortfall {short}, bad lines {bad})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
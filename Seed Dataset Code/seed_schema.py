@@ -0,0 +1,130 @@
+# seed_schema.py
+# -*- coding: utf-8 -*-
+"""
+SeedDataset 행(row) 스키마 공용 정의.
+
+  - SYSTEM_PROMPT: 모든 행의 messages[0] (add_sys_prom.py 와 동일)
+  - make_row(): (id, text, entities) → {"id", "messages":[system,user,assistant]}
+    assistant.content 는 {"text","has_sensitive","entities"} JSON 문자열
+  - CATEGORIES / COMBOS: README의 5개 라벨 카테고리와 31가지 조합(⁵C₁ ~ ⁵C₅)
+"""
+
+import json
+from itertools import combinations
+from typing import Dict, Iterable, List, Tuple
+
+# 공통 system 프롬프트
+SYSTEM_PROMPT = (
+    "You are a strict detector for sensitive entities (PII and secrets).\n"
+    "Given the user's text, return ONLY a JSON with keys\n"
+    "You must output text in JSON format.\n"
+    "Input : You receive an arbitrary text\n"
+    "Output : \n"
+    "{\n"
+    "  \"text\": \"<original input text verbatim>\",\n"
+    "  \"has_sensitive\": <boolean>,\n"
+    "  \"entities\": [\n"
+    "    {\n"
+    "      \"value\": \"<exact substring as it appears>\",\n"
+    "      \"begin\": <integer>,   // 0-based char offset (inclusive)\n"
+    "      \"end\": <integer>,     // 0-based char offset (exclusive)\n"
+    "      \"label\": \"<UPPER_SNAKE_CASE category>\"\n"
+    "    }\n"
+    "  ]\n"
+    "}\n"
+    "Example:\n"
+    "Input text:\n"
+    "{\"로그인 계정명: hong_gildong, 패스워드: Abc1234! 입력 시 실패 원인을 분석해줘.\" }\n"
+    "Expected output (offsets must match the exact input you receive):\n"
+    "{\n"
+    "  \"text\": \"로그인 계정명: hong_gildong, 패스워드: Abc1234! 입력 시 실패 원인을 분석해줘.\",\n"
+    "  \"has_sensitive\": true,\n"
+    "  \"entities\": [\n"
+    "    { \"value\": \"hong_gildong\", \"begin\": 9, \"end\": 21, \"label\": \"USERNAME\" },\n"
+    "    { \"value\": \"Abc1234!\", \"begin\": 29, \"end\": 37, \"label\": \"PASSWORD\" }\n"
+    "  ]\n"
+    "}\n"
+    "Example 2:\n"
+    "Input text:\n"
+    "{\"고객 불만 사항에 대응하기 위한 표준 절차를 정리해줘.\"}\n"
+    "Expected Output:\n"
+    "{\n"
+    "  \"text\": \"고객 불만 사항에 대응하기 위한 표준 절차를 정리해줘.\",\n"
+    "  \"has_sensitive\": false,\n"
+    "  \"entities\": []\n"
+    "}"
+)
+
+# 카테고리 번호(1~5) → (이름, 라벨) — README "라벨링 집합"의 묶음과 동일
+CATEGORIES: Dict[int, Tuple[str, Tuple[str, ...]]] = {
+    1: ("개인 식별·연락", (
+        "NAME", "PHONE", "EMAIL", "ADDRESS", "POSTAL_CODE", "DATE_OF_BIRTH", "RESIDENT_ID",
+        "PASSPORT", "DRIVER_LICENSE", "FOREIGNER_ID", "HEALTH_INSURANCE_ID", "BUSINESS_ID",
+        "TAX_ID", "SSN", "EMERGENCY_CONTACT", "EMERGENCY_PHONE")),
+    2: ("계정·인증", (
+        "USERNAME", "NICKNAME", "ROLE", "GROUP", "PASSWORD", "PASSWORD_HASH", "SECURITY_QA",
+        "MFA_SECRET", "BACKUP_CODE", "LAST_LOGIN_IP", "LAST_LOGIN_DEVICE", "LAST_LOGIN_BROWSER",
+        "SESSION_ID", "COOKIE", "JWT", "ACCESS_TOKEN", "REFRESH_TOKEN", "OAUTH_CLIENT_ID",
+        "OAUTH_CLIENT_SECRET", "API_KEY", "SSH_PRIVATE_KEY", "TLS_PRIVATE_KEY", "PGP_PRIVATE_KEY",
+        "MNEMONIC", "TEMP_CLOUD_CREDENTIAL", "DEVICE_ID", "IMEI", "SERIAL_NUMBER",
+        "BROWSER_FINGERPRINT", "SAML_ASSERTION", "OIDC_ID_TOKEN", "INTERNAL_URL",
+        "CONNECTION_STRING", "LAST_LOGIN_AT")),
+    3: ("금융·결제", (
+        "BANK_ACCOUNT", "BANK_NAME", "BANK_BRANCH", "ACCOUNT_HOLDER", "BALANCE", "CURRENCY",
+        "CARD_NUMBER", "CARD_EXPIRY", "CARD_HOLDER", "CARD_CVV", "PAYMENT_PIN",
+        "SECURITIES_ACCOUNT", "VIRTUAL_ACCOUNT", "WALLET_ADDRESS", "IBAN", "SWIFT_BIC",
+        "ROUTING_NUMBER", "PAYMENT_APPROVAL_CODE", "GATEWAY_CUSTOMER_ID", "PAYMENT_PROFILE_ID")),
+    4: ("고객·거래·지원", (
+        "COMPANY_NAME", "BUYER_NAME", "CUSTOMER_ID", "MEMBERSHIP_ID", "ORDER_ID", "INVOICE_ID",
+        "REFUND_ID", "EXCHANGE_ID", "SHIPPING_ADDRESS", "TRACKING_ID", "CRM_RECORD_ID",
+        "TICKET_ID", "RMA_ID", "COUPON_CODE", "VOUCHER_CODE", "BILLING_ADDRESS",
+        "TAX_INVOICE_ID", "CUSTOMER_NOTE_ID")),
+    5: ("조직", (
+        "EMPLOYEE_ID", "ORG_NAME", "DEPARTMENT_NAME", "JOB_TITLE", "EMPLOYMENT_TYPE",
+        "HIRE_DATE", "LEAVE_DATE", "SALARY", "BENEFIT_INFO", "INSURANCE_INFO", "PROFILE_INFO",
+        "OFFICE_EXT", "ACCESS_CARD_ID", "READER_ID", "WORKSITE", "OFFICE_LOCATION",
+        "PERFORMANCE_GRADE", "EDUCATION_CERT", "ACCESS_LOG", "DUTY_ASSIGNMENT", "MANAGER_FLAG",
+        "TRAINING_COMPLETION_DATE", "TRAINING_EXPIRY")),
+}
+
+LABEL_CATEGORY: Dict[str, int] = {lab: c for c, (_, labs) in CATEGORIES.items() for lab in labs}
+
+# 31가지 조합: 크기 순 → 사전순 ((1,), (2,), ..., (1,2), ..., (1,2,3,4,5))
+COMBOS: List[Tuple[int, ...]] = [
+    combo for k in range(1, 6) for combo in combinations(sorted(CATEGORIES), k)
+]
+
+def combo_quota(combo: Tuple[int, ...]) -> int:
+    """README 할당량: 1~2개 조합은 64개, 3~5개 조합은 65개 (합계 2000)."""
+    return 64 if len(combo) <= 2 else 65
+
+def combo_of(labels: Iterable[str]) -> Tuple[int, ...]:
+    """라벨 목록 → 카테고리 조합(정렬된 번호 튜플). 엔티티가 없으면 ()."""
+    return tuple(sorted({LABEL_CATEGORY[lab] for lab in labels if lab in LABEL_CATEGORY}))
+
+def combo_key(combo: Tuple[int, ...]) -> str:
+    """(1, 3) → "1+3", () → "none"."""
+    return "+".join(map(str, combo)) if combo else "none"
+
+def make_answer(text: str, entities: List[dict]) -> dict:
+    """정답 JSON(dict). entities는 begin 기준 정렬, has_sensitive는 entities 유무."""
+    ents = sorted(entities, key=lambda e: (e["begin"], e["end"], e["label"]))
+    return {
+        "text": text,
+        "has_sensitive": bool(ents),
+        "entities": [
+            {"value": e["value"], "begin": e["begin"], "end": e["end"], "label": e["label"]}
+            for e in ents
+        ],
+    }
+
+def make_row(rid, text: str, entities: List[dict], system_prompt: str = SYSTEM_PROMPT) -> dict:
+    """messages 스키마 한 행 생성(assistant.content 는 JSON 문자열)."""
+    return {
+        "id": rid,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text},
+            {"role": "assistant", "content": json.dumps(make_answer(text, entities), ensure_ascii=False)},
+        ],
+    }
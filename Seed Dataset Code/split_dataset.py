@@ -0,0 +1,164 @@
+# split_dataset.py
+# -*- coding: utf-8 -*-
+"""
+해시 기반 결정적 train/val/test 분할기.
+
+  - 행마다 안정 키(id 또는 정규화한 user 텍스트)를 blake2b로 해시해 [0,1) 값으로 바꾸고
+    비율 구간에 따라 분할 → 행이 추가/삭제되어도 기존 행의 분할은 바뀌지 않음
+  - 층(stratum) = 카테고리 조합 + has_sensitive. 층과 무관한 균등 해시라 층마다 기대 비율대로
+    나뉘며, 층별 실제 분할 수를 리포트하고 기대치에서 크게(3σ) 벗어난 층은 표시
+    (층을 해시 입력에 넣으면 라벨 수정만으로 행이 다른 분할로 옮겨 가므로 넣지 않음)
+  - --group-templates: 엔티티 구간을 <LABEL>로, 숫자 연속을 0으로 바꾼 "템플릿 골격"을
+    키로 써서 값만 다른 거의 같은 문장들이 같은 분할로 가게 함(누수 방지)
+  - 한 번의 스트리밍 패스, 메모리는 층 개수에 비례(행 수와 무관)
+  - Python hash() 대신 blake2b + 고정 salt → 어느 머신에서든 같은 결과
+
+예)
+  python split_dataset.py shard_*.jsonl --out-dir ./splits --key text --group-templates
+"""
+
+import io
+import os
+import re
+import math
+import sys
+import json
+import hashlib
+import argparse
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from seed_schema import combo_key, combo_of
+from jsonl_io import open_text_auto, open_text_write
+
+SPLITS = ("train", "val", "test")
+WS_RE = re.compile(r"\s+")
+DIGITS_RE = re.compile(r"\d+")
+
+def normalize_key_text(s: str) -> str:
+    """NFKC + casefold + 공백 연속 하나로 + 앞뒤 공백 제거."""
+    return WS_RE.sub(" ", unicodedata.normalize("NFKC", s).casefold()).strip()
+
+def template_skeleton(text: str, ents: List[dict]) -> str:
+    """엔티티 구간 → <LABEL>, 숫자 연속 → 0 으로 바꾼 정규화 문자열."""
+    spans = sorted(
+        (e["begin"], e["end"], e.get("label", "")) for e in ents
+        if isinstance(e, dict) and isinstance(e.get("begin"), int) and isinstance(e.get("end"), int)
+    )
+    parts = []
+    pos = 0
+    for b, en, lab in spans:
+        if b < pos or not (0 <= b < en <= len(text)):
+            continue
+        parts.append(text[pos:b])
+        parts.append(f"<{lab}>")
+        pos = en
+    parts.append(text[pos:])
+    return DIGITS_RE.sub("0", normalize_key_text("".join(parts)))
+
+def unit_hash(salt: str, key: str) -> float:
+    """salt + key → [0,1) 균등값(blake2b 64비트)."""
+    h = hashlib.blake2b(key.encode("utf-8"), digest_size=8, person=salt.encode("utf-8")[:16])
+    return int.from_bytes(h.digest(), "big") / 2.0 ** 64
+
+def pick_split(u: float, bounds: List[float]) -> str:
+    for name, hi in zip(SPLITS, bounds):
+        if u < hi:
+            return name
+    return SPLITS[-1]
+
+def parse_row(line: str) -> Optional[Tuple[object, str, str, List[dict], bool]]:
+    """→ (id, user 텍스트, 정답 text, entities, has_sensitive). 깨진 줄이면 None."""
+    try:
+        row = json.loads(line)
+        msgs = row["messages"]
+        user = msgs[1]["content"]
+        ans = json.loads(msgs[2]["content"])
+        ents = ans["entities"]
+        text = ans.get("text", user)
+    except Exception:
+        return None
+    if not isinstance(user, str) or not isinstance(text, str) or not isinstance(ents, list):
+        return None
+    return row.get("id"), user, text, ents, bool(ans.get("has_sensitive", bool(ents)))
+
+def main():
+    ap = argparse.ArgumentParser(description="Deterministic hash-based train/val/test splitter with stratification")
+    ap.add_argument("inputs", nargs="+", help="입력 JSONL 파일(.gz/.zst 자동 인식)")
+    ap.add_argument("--out-dir", default="splits", help="train/val/test JSONL 출력 디렉터리")
+    ap.add_argument("--ratios", type=float, nargs=3, default=[0.8, 0.1, 0.1], metavar=("TRAIN", "VAL", "TEST"),
+                    help="분할 비율(합이 1이 아니면 정규화)")
+    ap.add_argument("--key", choices=["id", "text"], default="id", help="안정 키: id 또는 정규화한 user 텍스트")
+    ap.add_argument("--group-templates", action="store_true", help="템플릿 골격이 같은 행을 같은 분할로")
+    ap.add_argument("--compress", choices=["none", "gz", "zst"], default="none", help="분할 출력 압축 형식")
+    ap.add_argument("--salt", default="seed-split-v1", help="해시 salt(바꾸면 전체 분할이 새로 정해짐, 최대 16바이트)")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    tot = sum(args.ratios)
+    if tot <= 0 or any(r < 0 for r in args.ratios):
+        ap.error("--ratios must be non-negative and not all zero")
+    bounds = []
+    acc = 0.0
+    for r in args.ratios:
+        acc += r / tot
+        bounds.append(acc)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    ext = "" if args.compress == "none" else "." + args.compress
+    outs = {s: open_text_write(os.path.join(args.out_dir, f"{s}.jsonl{ext}")) for s in SPLITS}
+    counts: Dict[str, Dict[str, int]] = {}   # 층 → 분할 → 행 수
+    bad = 0
+    try:
+        for path in args.inputs:
+            with open_text_auto(path) as f:
+                for line in f:
+                    s = line.strip()
+                    if not s:
+                        continue
+                    parsed = parse_row(s)
+                    if parsed is None:
+                        bad += 1
+                        continue
+                    rid, user, text, ents, sens = parsed
+                    labels = [e.get("label") for e in ents if isinstance(e, dict)]
+                    stratum = f"{combo_key(combo_of(labels))}|{'pos' if sens else 'neg'}"
+
+                    if args.group_templates:
+                        key = template_skeleton(text, ents)
+                    elif args.key == "text":
+                        key = normalize_key_text(user)
+                    else:
+                        key = json.dumps(rid, ensure_ascii=False)
+                    split = pick_split(unit_hash(args.salt, key), bounds)
+
+                    outs[split].write(s + "\n")
+                    c = counts.setdefault(stratum, {x: 0 for x in SPLITS})
+                    c[split] += 1
+    finally:
+        for f in outs.values():
+            f.close()
+
+    totals = {x: sum(c[x] for c in counts.values()) for x in SPLITS}
+    n = sum(totals.values())
+    shares = [r / tot for r in args.ratios]
+    print("# 층별 분할 (train / val / test)")
+    for stratum in sorted(counts):
+        c = counts[stratum]
+        k = sum(c.values())
+        skew = [x for x, p in zip(SPLITS, shares) if abs(c[x] - k * p) > 3 * math.sqrt(k * p * (1 - p)) + 1]
+        mark = f"  (치우침: {', '.join(skew)})" if skew else ""
+        print(f"- {stratum}: {c['train']} / {c['val']} / {c['test']}{mark}")
+    print(
+        f"\n[split] rows={n} bad_lines={bad} "
+        + " ".join(f"{x}={totals[x]} ({totals[x] / n:.1%})" if n else f"{x}=0" for x in SPLITS)
+        + f" -> {args.out_dir}"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+# template_report.py
+# -*- coding: utf-8 -*-
+"""
+템플릿 골격 다양성 리포트: 값만 바꾼 같은 문장틀이 얼마나 반복되는지 집계.
+
+  - 골격 = split_dataset.template_skeleton(엔티티 구간 → <LABEL>, 숫자 연속 → 0, NFKC·casefold)
+  - 골격을 blake2b 64비트로 해시해 해시 맵 하나로 한 번의 스트리밍 패스에서 집계
+    (골격 문자열은 두 번째로 나올 때만 저장 → 한 번만 나온 골격은 정수 두 개만 차지)
+  - 리포트
+      전체: 행 수, 고유 골격 수, 한 번만 나온 골격, 최대/상위 10개 군집 점유율,
+            유효 템플릿 수(exp 엔트로피, 역 심프슨 지수)
+      군집 크기 분포(1, 2-4, 5-9, 10-99, 100-999, 1000+)
+      카테고리 조합별: 행 수, 골격 수, 골격당 행 수, 유효 템플릿 수
+      상위 --top 개 군집: 행 수, 조합, 골격 id, 예시 id, 골격 앞부분
+  - --json-out 으로 같은 내용을 JSON 저장(골격 id는 blake2b라 실행·머신이 달라도 같음)
+
+예)
+  python template_report.py aug.jsonl --top 20
+  python template_report.py shard_*.jsonl.zst --json-out templates.json
+"""
+
+import io
+import sys
+import json
+import math
+import time
+import hashlib
+import argparse
+from typing import Dict, List
+
+from seed_schema import combo_key, combo_of
+from split_dataset import parse_row, template_skeleton
+from jsonl_io import open_text_auto
+
+SIZE_BUCKETS = [(1, 1), (2, 4), (5, 9), (10, 99), (100, 999), (1000, None)]
+
+def skeleton_id(skel: str) -> int:
+    return int.from_bytes(hashlib.blake2b(skel.encode("utf-8"), digest_size=8).digest(), "big")
+
+def diversity(counts: List[int]) -> dict:
+    """군집 크기 목록 → 유효 템플릿 수(exp 엔트로피, 역 심프슨)."""
+    n = sum(counts)
+    if not n:
+        return {"effective_shannon": 0.0, "effective_simpson": 0.0}
+    h = 0.0
+    s = 0.0
+    for c in counts:
+        p = c / n
+        h -= p * math.log(p)
+        s += p * p
+    return {"effective_shannon": math.exp(h), "effective_simpson": 1.0 / s}
+
+class SkeletonStats:
+    """골격 해시 → [행 수, 조합 번호, 예시 id]; 골격 문자열은 두 번째 등장 시 저장."""
+
+    def __init__(self):
+        self.clusters: Dict[int, list] = {}
+        self.text: Dict[int, str] = {}
+        self.combos: Dict[str, int] = {}
+        self.combo_names: List[str] = []
+        self.rows = 0
+        self.bad = 0
+
+    def add(self, rid, text: str, ents: List[dict]):
+        self.rows += 1
+        skel = template_skeleton(text, ents)
+        h = skeleton_id(skel)
+        c = self.clusters.get(h)
+        if c is None:
+            labels = [e.get("label") for e in ents if isinstance(e, dict)]
+            key = combo_key(combo_of(labels))
+            ci = self.combos.get(key)
+            if ci is None:
+                ci = self.combos[key] = len(self.combo_names)
+                self.combo_names.append(key)
+            self.clusters[h] = [1, ci, rid]
+            return
+        if c[0] == 1:
+            self.text[h] = skel
+        c[0] += 1
+
+    def report(self, top: int) -> dict:
+        sizes = [c[0] for c in self.clusters.values()]
+        n = self.rows - self.bad
+        ordered = sorted(self.clusters.items(), key=lambda kv: (-kv[1][0], kv[0]))
+        top10 = sum(c[0] for _, c in ordered[:10])
+
+        buckets = []
+        for lo, hi in SIZE_BUCKETS:
+            sel = [s for s in sizes if s >= lo and (hi is None or s <= hi)]
+            buckets.append({"size": f"{lo}+" if hi is None else (str(lo) if lo == hi else f"{lo}-{hi}"),
+                            "clusters": len(sel), "rows": sum(sel)})
+
+        per_combo: Dict[int, List[int]] = {}
+        for c in self.clusters.values():
+            per_combo.setdefault(c[1], []).append(c[0])
+        combos = []
+        for ci, cs in per_combo.items():
+            rows = sum(cs)
+            combos.append({"combo": self.combo_names[ci], "rows": rows, "skeletons": len(cs),
+                           "rows_per_skeleton": rows / len(cs), **diversity(cs)})
+        combos.sort(key=lambda d: (-d["rows"], d["combo"]))
+
+        return {
+            "rows": n,
+            "bad_lines": self.bad,
+            "skeletons": len(sizes),
+            "unique_ratio": len(sizes) / n if n else 0.0,
+            "singletons": sum(1 for s in sizes if s == 1),
+            "largest_cluster_share": (ordered[0][1][0] / n) if ordered else 0.0,
+            "top10_share": top10 / n if n else 0.0,
+            **diversity(sizes),
+            "size_buckets": buckets,
+            "combos": combos,
+            "top_clusters": [
+                {"rows": c[0], "combo": self.combo_names[c[1]], "skeleton_id": f"{h:016x}",
+                 "example_id": c[2], "skeleton": self.text.get(h, "")}
+                for h, c in ordered[:top]
+            ],
+        }
+
+def main():
+    ap = argparse.ArgumentParser(description="Template skeleton mining: cluster rows by label-placeholder skeleton and report diversity")
+    ap.add_argument("inputs", nargs="+", help="입력 JSONL 파일(.gz/.zst 자동 인식)")
+    ap.add_argument("--top", type=int, default=10, help="출력할 상위 군집 수")
+    ap.add_argument("--width", type=int, default=100, help="골격 출력 최대 글자 수")
+    ap.add_argument("--json-out", default=None, help="리포트 JSON 저장 경로")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    st = SkeletonStats()
+    t0 = time.perf_counter()
+    for path in args.inputs:
+        with open_text_auto(path) as f:
+            for line in f:
+                s = line.strip()
+                if not s:
+                    continue
+                parsed = parse_row(s)
+                if parsed is None:
+                    st.rows += 1
+                    st.bad += 1
+                    continue
+                rid, _user, text, ents, _sens = parsed
+                st.add(rid, text, ents)
+    dt = time.perf_counter() - t0
+    rep = st.report(args.top)
+
+    n = rep["rows"]
+    print("# 전체")
+    print(f"행 수: {n}, 고유 골격: {rep['skeletons']} ({rep['unique_ratio']:.1%}), "
+          f"한 번만 나온 골격: {rep['singletons']}")
+    print(f"최대 군집 점유율: {rep['largest_cluster_share']:.1%}, 상위 10개 군집 점유율: {rep['top10_share']:.1%}")
+    print(f"유효 템플릿 수: exp(엔트로피)={rep['effective_shannon']:.1f}, 역 심프슨={rep['effective_simpson']:.1f}")
+
+    print("\n# 군집 크기 분포 (크기: 군집 수 / 행 수)")
+    for b in rep["size_buckets"]:
+        print(f"- {b['size']}: {b['clusters']} / {b['rows']}")
+
+    print("\n# 카테고리 조합별 (행 수 / 골격 수 / 골격당 행 수 / 유효 템플릿 수)")
+    for c in rep["combos"]:
+        print(f"- {c['combo']}: {c['rows']} / {c['skeletons']} / {c['rows_per_skeleton']:.1f} / {c['effective_shannon']:.1f}")
+
+    if rep["top_clusters"]:
+        print(f"\n# 상위 군집 {len(rep['top_clusters'])}개")
+        for t in rep["top_clusters"]:
+            skel = t["skeleton"] or "(한 번만 나옴)"
+            if len(skel) > args.width:
+                skel = skel[:args.width] + "…"
+            print(f"- {t['rows']}행 [{t['combo']}] {t['skeleton_id']} id={t['example_id']}: {skel}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(rep, f, ensure_ascii=False, indent=2)
+    print(f"\n[templates] rows={n} skeletons={rep['skeletons']} bad_lines={rep['bad_lines']} "
+          f"elapsed={dt:.2f}s ({st.rows / dt if dt > 0 else 0:,.0f} rows/s)"
+          + (f" -> {args.json_out}" if args.json_out else ""))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
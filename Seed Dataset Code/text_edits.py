@@ -0,0 +1,180 @@
+# text_edits.py
+# -*- coding: utf-8 -*-
+"""
+텍스트 일괄 편집 + 엔티티 오프셋 재계산 라이브러리(autofix 탐색 없이 오프셋 유지).
+
+  - Edit(begin, end, replacement): 원문 [begin, end)를 replacement로 교체
+    (삽입은 begin == end, 삭제는 replacement == "")
+  - apply_edits(): 겹치지 않는 편집 여러 개를 한 번에 적용
+  - rebase_entities(): 편집과 엔티티를 각각 정렬해 한 번 훑으며 begin/end 이동
+      편집이 엔티티 앞          → 길이 차만큼 이동
+      편집이 엔티티와 정확히 같음 → 값 교체(value = replacement)
+      편집이 엔티티 안쪽        → 값이 바뀐 것으로 보고 "changed" 표시 후 유지
+      편집이 엔티티를 덮음      → "dropped"
+      경계에 걸침              → "cut" (on_cut: drop / keep / raise)
+    엔티티 시작 위치에 삽입은 엔티티 앞, 끝 위치에 삽입은 엔티티 뒤로 본다.
+  - edit_row(): messages 행의 user 메시지와 정답 text를 함께 편집, has_sensitive 갱신
+  - 편집 생성 도우미: replace_entity(), insert(), strip_edits()
+
+예)
+  from text_edits import Edit, edit_row, replace_entity
+  res = edit_row(row, [replace_entity(ent, "010-0000-0000"), Edit(0, 0, "[메모] ")])
+  res.flags  # [(kind, entity), ...]
+"""
+
+import json
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+CUT = "cut"
+DROPPED = "dropped"
+CHANGED = "changed"
+
+class Edit(NamedTuple):
+    begin: int
+    end: int
+    replacement: str
+
+    @property
+    def delta(self) -> int:
+        return len(self.replacement) - (self.end - self.begin)
+
+class EditResult(NamedTuple):
+    row: dict
+    text: str
+    flags: List[Tuple[str, dict]]   # (CUT / DROPPED / CHANGED, 원래 엔티티)
+
+def insert(pos: int, s: str) -> Edit:
+    return Edit(pos, pos, s)
+
+def replace_entity(ent: dict, new_value: str) -> Edit:
+    """엔티티 값 교체 편집(엔티티는 새 값 구간으로 그대로 유지됨)."""
+    return Edit(ent["begin"], ent["end"], new_value)
+
+def strip_edits(text: str) -> List[Edit]:
+    """앞뒤 공백 제거 편집."""
+    n = len(text)
+    lead = n - len(text.lstrip())
+    trail = n - len(text.rstrip())
+    edits = []
+    if lead and lead < n:
+        edits.append(Edit(0, lead, ""))
+    if trail and trail < n:
+        edits.append(Edit(n - trail, n, ""))
+    if lead == n and n:
+        edits.append(Edit(0, n, ""))
+    return edits
+
+def sort_edits(edits: Sequence[Edit], n: int) -> List[Edit]:
+    """정렬 + 범위/겹침 검사. 같은 위치 삽입 여러 개는 주어진 순서대로."""
+    out = sorted((Edit(*e) for e in edits), key=lambda e: (e.begin, e.end))
+    prev_end = 0
+    for e in out:
+        if not (0 <= e.begin <= e.end <= n):
+            raise ValueError(f"edit out of range: {e.begin}..{e.end} (len {n})")
+        if e.begin < prev_end:
+            raise ValueError(f"overlapping edits at {e.begin}")
+        prev_end = e.end
+    return out
+
+def apply_edits(text: str, edits: Sequence[Edit]) -> Tuple[str, List[Edit]]:
+    """편집 적용 → (새 텍스트, 정렬된 편집)."""
+    ordered = sort_edits(edits, len(text))
+    parts = []
+    pos = 0
+    for e in ordered:
+        parts.append(text[pos:e.begin])
+        parts.append(e.replacement)
+        pos = e.end
+    parts.append(text[pos:])
+    return "".join(parts), ordered
+
+def rebase_entities(ents: List[dict], ordered: List[Edit], new_text: str,
+                    on_cut: str = "drop") -> Tuple[List[dict], List[Tuple[str, dict]]]:
+    """
+    정렬된 편집(apply_edits 결과)에 맞춰 엔티티 begin/end/value 재계산. 한 번 훑기:
+    엔티티를 begin 순으로 돌며, 엔티티 앞에서 끝나는 편집의 길이 차는 누적값으로 넘기고
+    엔티티와 겹치는 편집만 따로 본다. 반환: (새 entities(begin 순), 표시 목록)
+    """
+    valid = [e for e in ents if isinstance(e, dict) and isinstance(e.get("begin"), int) and isinstance(e.get("end"), int)]
+    others = [e for e in ents if not (isinstance(e, dict) and isinstance(e.get("begin"), int) and isinstance(e.get("end"), int))]
+    valid.sort(key=lambda e: (e["begin"], e["end"]))
+    flags: List[Tuple[str, dict]] = []
+    out: List[dict] = []
+    i = 0          # 엔티티 begin 이전에 끝나는 편집 포인터
+    shift = 0      # 그 편집들의 길이 차 합
+    m = len(ordered)
+    for ent in valid:
+        b, e = ent["begin"], ent["end"]
+        while i < m and ordered[i].end <= b:
+            shift += ordered[i].delta
+            i += 1
+        nb = b + shift
+        ne = None
+        kind = None
+        j = i
+        inner = 0      # 엔티티와 겹치는 편집의 길이 차 합
+        while j < m and ordered[j].begin < e:
+            ed = ordered[j]
+            if ed.begin == b and ed.end == e:
+                pass                                   # 값 교체
+            elif ed.begin <= b and ed.end >= e:
+                kind = DROPPED
+            elif b <= ed.begin and ed.end <= e:
+                kind = kind or CHANGED                 # 엔티티 안쪽 편집
+            elif ed.begin < b:                         # 앞 경계에 걸침: 편집 결과 뒤부터
+                kind = CUT
+                nb = ed.begin + shift + len(ed.replacement)
+            else:                                      # 뒤 경계에 걸침: 편집 시작 전까지
+                kind = CUT
+                ne = ed.begin + shift + inner
+            inner += ed.delta
+            j += 1
+        if ne is None:
+            ne = e + shift + inner
+        if kind == DROPPED or nb >= ne:
+            flags.append((DROPPED, ent))
+            continue
+        if kind == CUT:
+            flags.append((CUT, ent))
+            if on_cut == "raise":
+                raise ValueError(f"edit cuts entity {ent.get('label')} at {b}..{e}")
+            if on_cut == "drop":
+                continue
+        elif kind == CHANGED:
+            flags.append((CHANGED, ent))
+        ne_ent = dict(ent)
+        ne_ent["begin"], ne_ent["end"] = nb, ne
+        ne_ent["value"] = new_text[nb:ne]
+        out.append(ne_ent)
+    return out + others, flags
+
+def edit_answer(ans: dict, edits: Sequence[Edit], on_cut: str = "drop") -> Tuple[str, List[Tuple[str, dict]]]:
+    """정답 dict(text/entities/has_sensitive)에 편집 적용. 반환: (새 text, 표시 목록)"""
+    new_text, ordered = apply_edits(ans["text"], edits)
+    ents, flags = rebase_entities(ans.get("entities") or [], ordered, new_text, on_cut)
+    ans["text"] = new_text
+    ans["entities"] = ents
+    ans["has_sensitive"] = bool(ents)
+    return new_text, flags
+
+def edit_row(row: dict, edits: Sequence[Edit], on_cut: str = "drop") -> EditResult:
+    """
+    messages 행 편집: user 메시지와 정답 text를 함께 바꾸고 오프셋 재계산.
+    user ≠ 정답 text 이면 편집 좌표가 모호하므로 ValueError.
+    """
+    msgs = row["messages"]
+    ans = json.loads(msgs[2]["content"])
+    if msgs[1]["content"] != ans.get("text"):
+        raise ValueError(f"user message and answer text differ (id={row.get('id')})")
+    new_text, flags = edit_answer(ans, edits, on_cut)
+    msgs[1]["content"] = new_text
+    msgs[2]["content"] = json.dumps(ans, ensure_ascii=False)
+    return EditResult(row, new_text, flags)
+
+def check_offsets(ans: dict) -> Optional[str]:
+    """모든 엔티티가 text[begin:end] == value 인지 확인(불일치 첫 엔티티 설명 / None)."""
+    text = ans.get("text", "")
+    for e in ans.get("entities") or []:
+        if text[e["begin"]:e["end"]] != e.get("value"):
+            return f"{e.get('label')} {e['begin']}..{e['end']}"
+    return None
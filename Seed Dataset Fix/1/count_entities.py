@@ -2,28 +2,79 @@
 # -*- coding: utf-8 -*-
 import sys, json, argparse, io, unicodedata
 
-def read_text_safely(path: str) -> str:
-    with open(path, "rb") as fb:
-        data = fb.read()
-    # BOM 감지
-    if data.startswith(b'\xef\xbb\xbf'):
-        return data.decode('utf-8-sig')
-    if data.startswith(b'\xff\xfe'):
-        return data.decode('utf-16')      # LE
-    if data.startswith(b'\xfe\xff'):
-        return data.decode('utf-16-be')   # BE
-    # 기본 UTF-8, 실패 시 CP949 폴백
+from stage_profile import clock, add_profile_args, make_profiler
+from jsonl_io import read_text_safely
+from answer_scan import count_entities, scan_spans
+
+def count_line(s: str, prof=None, lazy=True, labels=None):
+    """
+    JSONL 한 줄 → (id, 엔티티 수). 깨진/형식 불일치 줄이면 None.
+    lazy=True면 assistant content는 answer_scan으로 엔티티 수만 읽고,
+    판단이 안 되는 경우에만 json.loads로 전체 파싱한다(이때 content의 entities 밖
+    영역이 깨져 있어도 알아채지 못함 → 엄격 검사는 lazy=False 또는 check_dataset).
+    labels(dict)를 주면 라벨별 개수도 누적한다.
+    """
+    t0 = clock() if prof else 0.0
     try:
-        return data.decode('utf-8')
-    except UnicodeDecodeError:
-        return data.decode('cp949', errors='replace')
+        row = json.loads(s)
+    except Exception:
+        return None
+    finally:
+        if prof:
+            prof.add("outer_json_loads", t0)
 
-def main():
-    ap = argparse.ArgumentParser(description="JSONL에서 id별 중요정보(entities) 개수 집계")
-    ap.add_argument("input", help="입력 JSONL 파일 경로")
-    args = ap.parse_args()
+    rid = row.get("id")
+    msgs = row.get("messages")
+    if rid is None or not isinstance(msgs, list) or len(msgs) < 3:
+        return None
+
+    ac = msgs[2].get("content", "")
+    if lazy and isinstance(ac, str):
+        t0 = clock() if prof else 0.0
+        if labels is None:
+            n = count_entities(ac)
+        else:
+            spans = scan_spans(ac)
+            n = None if spans is None else len(spans)
+        if prof:
+            prof.add("inner_scan", t0)
+        if n is not None:
+            if labels is not None:
+                for _, _, lab in spans:
+                    labels[lab] = labels.get(lab, 0) + 1
+            return rid, n
+        if prof:
+            prof.count("scan_fallback")
+
+    t0 = clock() if prof else 0.0
+    try:
+        ans = json.loads(ac)
+    except Exception:
+        return None
+    finally:
+        if prof:
+            prof.add("inner_json_loads", t0)
 
-    text = read_text_safely(args.input)
+    ents = ans.get("entities") if isinstance(ans, dict) else None
+    if not isinstance(ents, list):
+        return None
+    if labels is not None:
+        for e in ents:
+            lab = e.get("label") if isinstance(e, dict) else None
+            if isinstance(lab, str):
+                labels[lab] = labels.get(lab, 0) + 1
+    return rid, len(ents)
+
+def count_file(path: str, prof=None, lazy=True, labels=None):
+    """
+    파일 전체 집계.
+    반환: (per_id: id→개수, groups: 개수→[ids], 총 엔티티 수, 총 라인 수, 깨진 라인 수)
+    labels(dict)를 주면 라벨별 엔티티 수를 채운다.
+    """
+    t0 = clock() if prof else 0.0
+    text = read_text_safely(path)
+    if prof:
+        prof.add("read_decode", t0)
 
     per_id = {}           # id -> count
     groups = {}           # count -> [ids]
@@ -35,36 +86,32 @@ def main():
         s = line.strip()
         if not s:
             continue
-        try:
-            row = json.loads(s)
-        except Exception:
+        res = count_line(s, prof, lazy, labels)
+        if res is None:
             bad_lines += 1
             continue
 
-        rid = row.get("id")
-        msgs = row.get("messages")
-        if rid is None or not isinstance(msgs, list) or len(msgs) < 3:
-            bad_lines += 1
-            continue
-
-        ac = msgs[2].get("content", "")
-        try:
-            ans = json.loads(ac)
-        except Exception:
-            bad_lines += 1
-            continue
-
-        ents = ans.get("entities")
-        if not isinstance(ents, list):
-            bad_lines += 1
-            continue
-
-        cnt = len(ents)
+        rid, cnt = res
         per_id[rid] = cnt
         groups.setdefault(cnt, []).append(rid)
         total_entities += cnt
         total_rows += 1
 
+    return per_id, groups, total_entities, total_rows, bad_lines
+
+def main():
+    ap = argparse.ArgumentParser(description="JSONL에서 id별 중요정보(entities) 개수 집계")
+    ap.add_argument("input", help="입력 JSONL 파일 경로(.gz/.zst 압축 자동 인식)")
+    ap.add_argument("--full-parse", action="store_true", help="assistant content를 항상 json.loads로 전체 파싱(지연 스캔 끔)")
+    ap.add_argument("--by-label", action="store_true", help="라벨별 엔티티 수도 출력")
+    add_profile_args(ap)
+    args = ap.parse_args()
+
+    prof = make_profiler(args, "count")
+    labels = {} if args.by_label else None
+    per_id, groups, total_entities, total_rows, bad_lines = count_file(
+        args.input, prof, lazy=not args.full_parse, labels=labels)
+
     # 1) id별 개수 출력
     print("# id별 중요정보 엔티티 개수")
     for rid in sorted(per_id):
@@ -94,6 +141,17 @@ def main():
             ids = sorted(groups[k])
             print(f"- {k}개: {len(ids)}개 라인 | ids: {', '.join(map(str, ids))}")
 
+    if labels is not None:
+        print("\n# 라벨별 엔티티 수")
+        for lab, k in sorted(labels.items(), key=lambda kv: (-kv[1], kv[0])):
+            print(f"- {lab}: {k}")
+
+    if prof:
+        prof.count("lines", total_rows)
+        prof.count("entities", total_entities)
+        prof.count("bad_lines", bad_lines)
+        prof.emit(args.profile_out)
+
 if __name__ == "__main__":
     # Windows 콘솔에서 출력 깨짐 방지(옵션)
     try:
@@ -0,0 +1,152 @@
+# jsonl_io.py
+# -*- coding: utf-8 -*-
+"""
+압축 JSONL 투명 입출력(gzip / zstd).
+
+  - 읽기: 확장자가 아니라 파일 앞부분 매직 바이트로 판별(gzip 1f 8b, zstd 28 b5 2f fd)
+          → 스트리밍 해제 후 기존과 같은 BOM 감지/CP949 폴백 적용
+          여러 멤버 gzip, 여러 프레임 zstd(cat a.zst b.zst, pzstd 출력)도 끝까지 읽음
+  - 쓰기: 출력 경로 확장자(.gz / .zst)로 압축 여부 결정
+          gzip은 블록 단위로 스레드 풀에서 압축해 멀티 멤버 gzip으로 이어 씀(zlib은 GIL 해제)
+          zstd는 zstandard 패키지의 멀티스레드 압축 사용
+  - zstandard는 선택 의존성: 없으면 .zst 를 읽거나 쓸 때만 오류
+"""
+
+import io
+import os
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:   # 선택 의존성
+    zstandard = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSED_EXTS = (".gz", ".zst")
+GZIP_BLOCK = 1 << 20
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+def detect_compression(head: bytes) -> Optional[str]:
+    """매직 바이트 → "gzip" / "zstd" / None."""
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+def _need_zstd():
+    if zstandard is None:
+        raise SystemExit("[jsonl_io] zstd file needs the 'zstandard' package (pip install zstandard)")
+
+def open_binary(path: str):
+    """압축이면 해제 스트림, 아니면 일반 바이너리 파일."""
+    with open(path, "rb") as fb:
+        kind = detect_compression(fb.read(4))
+    if kind == "gzip":
+        return gzip.open(path, "rb")
+    if kind == "zstd":
+        _need_zstd()
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True), GZIP_BLOCK)
+    return open(path, "rb")
+
+def sniff_encoding(head: bytes) -> str:
+    if head.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    if head.startswith(b'\xff\xfe'):
+        return 'utf-16'      # LE
+    if head.startswith(b'\xfe\xff'):
+        return 'utf-16-be'   # BE
+    return 'utf-8'
+
+def open_text_auto(path: str):
+    """압축/BOM 감지로 텍스트 모드 오픈(스트리밍)."""
+    fb = open_binary(path)
+    if not isinstance(fb, io.BufferedReader):
+        fb = io.BufferedReader(fb, GZIP_BLOCK)
+    return io.TextIOWrapper(fb, encoding=sniff_encoding(fb.peek(4)[:4]), newline=None)
+
+def read_text_safely(path: str) -> str:
+    """UTF-8 / UTF-8-SIG / UTF-16LE/BE 자동 인식, 실패시 CP949 폴백(압축 파일도 동일)."""
+    with open_binary(path) as fb:
+        data = fb.read()
+    if data.startswith(b'\xef\xbb\xbf'):
+        return data.decode('utf-8-sig')
+    if data.startswith(b'\xff\xfe'):
+        return data.decode('utf-16')      # LE
+    if data.startswith(b'\xfe\xff'):
+        return data.decode('utf-16-be')   # BE
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('cp949', errors='replace')
+
+class ParallelGzipWriter(io.RawIOBase):
+    """
+    블록(기본 1 MiB)마다 독립 gzip 멤버로 압축해 순서대로 기록(pigz 방식).
+    멤버를 이어 붙인 파일은 표준 gzip 리더(gzip 모듈, zcat)로 그대로 읽힌다.
+    """
+
+    def __init__(self, fileobj, threads: int = 0, level: int = GZIP_LEVEL, block: int = GZIP_BLOCK):
+        self._f = fileobj
+        self._level = level
+        self._block = block
+        self._buf = bytearray()
+        threads = threads or (os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(max_workers=threads)
+        self._pending = []
+        self._max_pending = 2 * threads
+        self._members = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b) -> int:
+        self._buf += b
+        while len(self._buf) >= self._block:
+            self._submit(bytes(self._buf[:self._block]))
+            del self._buf[:self._block]
+        return len(b)
+
+    def _submit(self, chunk: bytes):
+        self._members += 1
+        self._pending.append(self._pool.submit(gzip.compress, chunk, self._level, mtime=0))
+        while len(self._pending) > self._max_pending:
+            self._f.write(self._pending.pop(0).result())
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._buf or not self._members:
+                self._submit(bytes(self._buf))
+                self._buf = bytearray()
+            for fut in self._pending:
+                self._f.write(fut.result())
+            self._pending = []
+        finally:
+            self._pool.shutdown()
+            self._f.close()
+            super().close()
+
+def open_text_write(path: str, threads: int = 0):
+    """경로 확장자로 압축 방식을 정해 UTF-8(LF) 텍스트 쓰기 스트림 반환. threads=0 → CPU 수."""
+    if path.endswith(".gz"):
+        raw = ParallelGzipWriter(open(path, "wb"), threads)
+        return io.TextIOWrapper(io.BufferedWriter(raw, GZIP_BLOCK), encoding="utf-8", newline="\n")
+    if path.endswith(".zst"):
+        _need_zstd()
+        cctx = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=threads or -1)
+        return io.TextIOWrapper(cctx.stream_writer(open(path, "wb"), closefd=True), encoding="utf-8", newline="\n")
+    return open(path, "w", encoding="utf-8", newline="\n", buffering=GZIP_BLOCK)
+
+def strip_jsonl_ext(path: str) -> str:
+    """"a.jsonl.gz" / "a.jsonl.zst" / "a.jsonl" → "a"."""
+    for ext in COMPRESSED_EXTS:
+        if path.endswith(ext):
+            path = path[:-len(ext)]
+            break
+    return path[:-len(".jsonl")] if path.endswith(".jsonl") else path
@@ -0,0 +1,174 @@
+# label_formats.py
+# -*- coding: utf-8 -*-
+"""
+라벨별 값 형식 검증기(check_dataset.py --format-checks).
+
+  - 정규식은 모듈 로드 시 한 번만 컴파일
+  - 체크섬: Luhn(카드/IMEI), 주민등록번호 검증번호, IBAN mod-97
+  - VALIDATORS[label] 로 분기, FormatBatch 로 샤드 전체를 라벨별로 모아 한 번에 검사
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+# -------------------- 체크섬 --------------------
+
+def luhn_ok(digits: str) -> bool:
+    """숫자 문자열의 Luhn 검증."""
+    total = 0
+    dbl = False
+    for ch in reversed(digits):
+        d = ord(ch) - 48
+        if dbl:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+        dbl = not dbl
+    return total % 10 == 0
+
+RRN_WEIGHTS = (2, 3, 4, 5, 6, 7, 8, 9, 2, 3, 4, 5)
+
+def rrn_check_digit(first12: str) -> int:
+    """주민등록번호 앞 12자리 → 검증번호."""
+    s = sum((ord(c) - 48) * w for c, w in zip(first12, RRN_WEIGHTS))
+    return (11 - s % 11) % 10
+
+def iban_ok(iban: str) -> bool:
+    """IBAN mod-97 (앞 4자리를 뒤로 보내고 문자→숫자 변환 후 % 97 == 1)."""
+    t = iban[4:] + iban[:4]
+    num = "".join(str(int(c, 36)) for c in t)
+    return int(num) % 97 == 1
+
+# -------------------- 정규식 --------------------
+
+CARD_RE = re.compile(r"(?:\d[ -]?){12,18}\d")
+RRN_RE = re.compile(r"(\d{2})(\d{2})(\d{2})-?([1-8])(\d{6})")
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+\-]+@[A-Za-z0-9](?:[A-Za-z0-9\-]*[A-Za-z0-9])?(?:\.[A-Za-z0-9](?:[A-Za-z0-9\-]*[A-Za-z0-9])?)*\.[A-Za-z]{2,}")
+# 국내: 휴대폰/지역번호/070/050x, (+82 표기 허용) | 국제: +국가번호 8~15자리
+PHONE_KR_RE = re.compile(
+    r"(?:\+82[ -]?|0)(?:1[016789]|2|[3-6][1-5]|70|50\d)[ .)-]?\d{3,4}[ .-]?\d{4}"
+)
+PHONE_INTL_RE = re.compile(r"\+\d{1,3}(?:[ .-]?\(?\d{1,4}\)?){2,5}")
+IBAN_RE = re.compile(r"[A-Z]{2}\d{2}[A-Z0-9]{11,30}")
+IMEI_RE = re.compile(r"\d{2}[ -]?\d{6}[ -]?\d{6}[ -]?\d")
+JWT_RE = re.compile(r"eyJ[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]*")
+POSTAL_RE = re.compile(r"\d{5}(?:-\d{4})?|\d{3}-\d{3}")
+SEP_RE = re.compile(r"[ -]")
+WS_RE = re.compile(r"\s")
+
+# -------------------- 라벨별 검증기 --------------------
+# 검증기: value -> None(정상) 또는 (code, reason)
+
+def _card(v: str):
+    if not CARD_RE.fullmatch(v):
+        return "FORMAT_CARD_NUMBER", "card number must be 13-19 digits (space/- separators)"
+    if not luhn_ok(SEP_RE.sub("", v)):
+        return "CHECKSUM_CARD_NUMBER", "card number fails Luhn check"
+    return None
+
+def _rrn(v: str):
+    m = RRN_RE.fullmatch(v)
+    if not m:
+        return "FORMAT_RESIDENT_ID", "resident id must be YYMMDD-GNNNNNN"
+    mm, dd = int(m.group(2)), int(m.group(3))
+    if not (1 <= mm <= 12 and 1 <= dd <= 31):
+        return "FORMAT_RESIDENT_ID", "resident id has invalid birth date"
+    digits = m.group(1) + m.group(2) + m.group(3) + m.group(4) + m.group(5)
+    if rrn_check_digit(digits[:12]) != ord(digits[12]) - 48:
+        return "CHECKSUM_RESIDENT_ID", "resident id check digit mismatch"
+    return None
+
+def _email(v: str):
+    if not EMAIL_RE.fullmatch(v):
+        return "FORMAT_EMAIL", "malformed email address"
+    return None
+
+def _phone(v: str):
+    if PHONE_KR_RE.fullmatch(v) or PHONE_INTL_RE.fullmatch(v):
+        return None
+    return "FORMAT_PHONE", "malformed phone number"
+
+def _iban(v: str):
+    t = WS_RE.sub("", v)
+    if not IBAN_RE.fullmatch(t):
+        return "FORMAT_IBAN", "IBAN must be CC + 2 check digits + 11-30 alphanumerics"
+    if not iban_ok(t):
+        return "CHECKSUM_IBAN", "IBAN fails mod-97 check"
+    return None
+
+def _imei(v: str):
+    if not IMEI_RE.fullmatch(v):
+        return "FORMAT_IMEI", "IMEI must be 15 digits"
+    if not luhn_ok(SEP_RE.sub("", v)):
+        return "CHECKSUM_IMEI", "IMEI fails Luhn check"
+    return None
+
+def _jwt(v: str):
+    if not JWT_RE.fullmatch(v):
+        return "FORMAT_JWT", "JWT must be three base64url segments (header starts with eyJ)"
+    return None
+
+def _postal(v: str):
+    if not POSTAL_RE.fullmatch(v):
+        return "FORMAT_POSTAL_CODE", "postal code must be NNNNN, NNN-NNN or NNNNN-NNNN"
+    return None
+
+VALIDATORS: Dict[str, Callable[[str], Optional[Tuple[str, str]]]] = {
+    "CARD_NUMBER": _card,
+    "RESIDENT_ID": _rrn,
+    "EMAIL": _email,
+    "PHONE": _phone,
+    "EMERGENCY_PHONE": _phone,
+    "IBAN": _iban,
+    "IMEI": _imei,
+    "JWT": _jwt,
+    "OIDC_ID_TOKEN": _jwt,
+    "POSTAL_CODE": _postal,
+}
+
+def validate_value(label: str, value: str) -> Optional[Tuple[str, str]]:
+    """단건 검증(검증기 없는 라벨은 None)."""
+    fn = VALIDATORS.get(label)
+    return fn(value) if fn else None
+
+class FormatBatch:
+    """
+    샤드 전체의 형식 검사 대상 엔티티를 라벨별로 모았다가 한 번에 검사.
+      begin_row(ln) → add(i, label, value) ... → end_row(rid) → ... → run()
+    검증기가 있는 라벨만 보관하므로 메모리는 해당 엔티티 수에 비례.
+    """
+
+    def __init__(self):
+        self.by_label: Dict[str, List[Tuple[int, object, int, str]]] = {}
+        self.checked = 0
+        self._ln = 0
+        self._pending: List[Tuple[int, str, str]] = []
+
+    def begin_row(self, ln: int):
+        self._ln = ln
+        self._pending = []
+
+    def add(self, i: int, label: str, value: str):
+        if label in VALIDATORS:
+            self._pending.append((i, label, value))
+
+    def end_row(self, rid):
+        """row id가 정해진 뒤 현재 줄의 대상 엔티티를 확정."""
+        for i, label, value in self._pending:
+            self.by_label.setdefault(label, []).append((self._ln, rid, i, value))
+        self._pending = []
+
+    def run(self) -> List[Tuple[int, object, int, str, str, str]]:
+        """→ [(ln, rid, entity_index, label, code, reason)] (줄 순서)."""
+        out = []
+        for label, items in self.by_label.items():
+            fn = VALIDATORS[label]
+            self.checked += len(items)
+            for ln, rid, i, value in items:
+                r = fn(value)
+                if r is not None:
+                    out.append((ln, rid, i, label, r[0], r[1]))
+        out.sort(key=lambda t: (t[0], t[2]))
+        self.by_label = {}
+        return out
@@ -0,0 +1,96 @@
+# stage_profile.py
+# -*- coding: utf-8 -*-
+"""
+스크립트 공용 단계별 프로파일러(--profile).
+
+사용 규약: 프로파일이 꺼져 있으면 prof 자리에 None을 넘긴다.
+호출부는 `t0 = clock() if prof else 0.0` / `if prof: prof.add(...)` 형태로만
+접근하므로 꺼져 있을 때 비용은 분기 한 번뿐이다.
+"""
+
+import json
+import sys
+from time import perf_counter as clock
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+class StageProfiler:
+    """단계별 누적 시간(wall) / 호출 수 + 임의 카운터."""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.t_start = clock()
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+
+    def __bool__(self):
+        return True
+
+    def add(self, stage: str, t0: float, calls: int = 1):
+        """t0(clock())부터 지금까지를 stage에 누적."""
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + (clock() - t0)
+        self.calls[stage] = self.calls.get(stage, 0) + calls
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def timed(self, stage: str, fn: Callable) -> Callable:
+        """fn을 감싸 호출마다 stage에 누적하는 래퍼 반환."""
+        def wrapper(*a, **kw):
+            t0 = clock()
+            try:
+                return fn(*a, **kw)
+            finally:
+                self.add(stage, t0)
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    def iter_timed(self, stage: str, it: Iterable) -> Iterator:
+        """이터레이터의 next() 시간(예: 스트리밍 디코딩)을 stage에 누적."""
+        it = iter(it)
+        while True:
+            t0 = clock()
+            try:
+                x = next(it)
+            except StopIteration:
+                self.add(stage, t0, calls=0)
+                return
+            self.add(stage, t0)
+            yield x
+
+    def report(self) -> dict:
+        total = clock() - self.t_start
+        stages = {}
+        for k in sorted(self.seconds, key=self.seconds.get, reverse=True):
+            sec = self.seconds[k]
+            n = self.calls.get(k, 0)
+            stages[k] = {
+                "seconds": round(sec, 6),
+                "calls": n,
+                "us_per_call": round(sec / n * 1e6, 3) if n else 0.0,
+                "pct_of_total": round(sec / total * 100, 2) if total > 0 else 0.0,
+            }
+        return {
+            "tool": self.tool,
+            "total_seconds": round(total, 6),
+            "stages": stages,
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def emit(self, out_path: Optional[str] = None):
+        """out_path가 있으면 JSON 파일로, 없으면 stderr에 한 줄 JSON."""
+        rep = self.report()
+        if out_path:
+            with open(out_path, "w", encoding="utf-8", newline="\n") as f:
+                json.dump(rep, f, ensure_ascii=False, indent=2)
+            sys.stderr.write(f"[{self.tool}] profile written to {out_path}\n")
+        else:
+            sys.stderr.write(f"[{self.tool}] profile " + json.dumps(rep, ensure_ascii=False) + "\n")
+
+def add_profile_args(ap):
+    """--profile / --profile-out 공통 정의."""
+    ap.add_argument("--profile", action="store_true", help="단계별 시간/호출 수 프로파일을 JSON으로 출력(stderr)")
+    ap.add_argument("--profile-out", type=str, default=None, help="프로파일 JSON을 저장할 파일 경로(--profile 함의)")
+
+def make_profiler(args, tool: str) -> Optional[StageProfiler]:
+    return StageProfiler(tool) if (args.profile or args.profile_out) else None
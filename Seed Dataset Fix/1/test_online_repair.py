@@ -0,0 +1,47 @@
+# test_online_repair.py
+# -*- coding: utf-8 -*-
+"""
+online_repair.OutputRepairer: 형식이 깨졌지만 JSON으로는 읽히는 모델 출력 처리.
+
+예)
+  python -m pytest -q test_online_repair.py
+"""
+
+import copy
+import json
+
+from online_repair import OutputRepairer
+
+TEXT = "이름 kim 입니다"
+
+def _repair(entities):
+    return OutputRepairer().repair(TEXT, json.dumps({"entities": entities}, ensure_ascii=False))
+
+def test_non_string_label_is_dropped():
+    for label in (["a"], {"x": 1}, None, 3):
+        fixed = _repair([{"value": "kim", "begin": 3, "end": 6, "label": label}])
+        assert fixed["entities"] == []
+        assert fixed["has_sensitive"] is False
+
+def test_missing_label_is_dropped():
+    assert _repair([{"value": "kim", "begin": 3, "end": 6}])["entities"] == []
+
+def test_non_string_value_is_dropped():
+    repairer = OutputRepairer()
+    fixed = repairer.repair(TEXT, {"entities": [{"value": 123, "begin": 3, "end": 6, "label": "NAME"}]})
+    assert fixed["entities"] == []
+    assert repairer.last["dropped_malformed"] == 1
+
+def test_missing_value_is_filled_from_offsets():
+    fixed = _repair([{"begin": 3, "end": 6, "label": "NAME"}, {"value": None, "begin": "3", "end": "6", "label": "USERNAME"}])
+    assert [(e["label"], e["value"], e["begin"], e["end"]) for e in fixed["entities"]] == [
+        ("NAME", "kim", 3, 6), ("USERNAME", "kim", 3, 6)]
+
+def test_caller_dict_is_not_modified():
+    output = {"text": "이름  kim 입니다", "has_sensitive": True,
+              "entities": [{"value": "kim", "begin": "1", "end": 4, "label": "NAME"}]}
+    before = copy.deepcopy(output)
+    fixed = OutputRepairer().repair(TEXT, output)
+    assert output == before
+    assert fixed["text"] == TEXT
+    assert [(e["begin"], e["end"]) for e in fixed["entities"]] == [(3, 6)]
@@ -0,0 +1,90 @@
+# answer_scan.py
+# -*- coding: utf-8 -*-
+"""
+assistant content(정답 JSON 문자열)를 json.loads 없이 훑어 entities 정보만 읽는 지연 스캐너.
+
+  - entities_bounds(): "entities" 배열의 [ ... ] 범위(원문 인덱스)
+  - count_entities() : 엔티티 수 (str.count 몇 번으로 끝남)
+  - scan_spans()     : 엔티티별 (begin, end, label)
+
+JSON 문자열 안의 따옴표는 항상 \" 로 이스케이프되므로 "label" 같은 키 토큰은
+문자열 값 내부에 그대로 나타날 수 없다. 이를 이용해 키 토큰 개수만 센다.
+모양이 예상과 다르면(키 누락/추가, 값에 중괄호 등) None을 반환하며,
+호출 측은 그때만 json.loads로 전체 파싱한다.
+"""
+
+import re
+from json.decoder import scanstring
+from typing import List, Optional, Tuple
+
+ENTITIES_KEY = '"entities"'
+SPAN_RE = re.compile(
+    r'"begin"\s*:\s*(-?\d+)\s*,\s*"end"\s*:\s*(-?\d+)\s*,\s*"label"\s*:\s*"((?:[^"\\]|\\.)*)"'
+)
+
+def entities_bounds(ac: str) -> Optional[Tuple[int, int]]:
+    """
+    "entities" 배열의 범위 (여는 '[' 위치, 닫는 ']' 다음 위치).
+    entities가 최상위 객체의 마지막 키가 아니면 None(전체 파싱으로 폴백).
+    """
+    i = ac.find(ENTITIES_KEY)
+    if i < 0:
+        return None
+    n = len(ac)
+    j = i + len(ENTITIES_KEY)
+    while j < n and ac[j] in " \t\r\n":
+        j += 1
+    if j >= n or ac[j] != ":":
+        return None
+    j += 1
+    while j < n and ac[j] in " \t\r\n":
+        j += 1
+    if j >= n or ac[j] != "[":
+        return None
+    # 끝: ... ] } (뒤쪽 공백 허용)
+    k = len(ac.rstrip())
+    if k == 0 or ac[k - 1] != "}":
+        return None
+    k = len(ac[:k - 1].rstrip())
+    if k == 0 or ac[k - 1] != "]":
+        return None
+    return j, k
+
+def _scan(ac: str) -> Optional[Tuple[int, int, int]]:
+    """(배열 시작, 배열 끝, 엔티티 수). 배열 안의 '{' / '}' / "begin" / "end" / "label"
+    개수가 모두 같을 때만 신뢰한다(값에 중괄호가 있거나 키가 빠진 엔티티가 있으면 None)."""
+    b = entities_bounds(ac)
+    if b is None:
+        return None
+    s, e = b
+    n = ac.count('"label"', s, e)
+    if (ac.count("{", s, e) != n or ac.count("}", s, e) != n
+            or ac.count('"begin"', s, e) != n or ac.count('"end"', s, e) != n):
+        return None
+    if n == 0 and ac[s + 1:e - 1].strip():
+        return None
+    return s, e, n
+
+def count_entities(ac: str) -> Optional[int]:
+    """엔티티 수, 판단할 수 없으면 None."""
+    r = _scan(ac)
+    return None if r is None else r[2]
+
+def scan_spans(ac: str) -> Optional[List[Tuple[int, int, str]]]:
+    """
+    엔티티별 (begin, end, label). 키 순서가 value, begin, end, label(json.dumps 기본 순서)인
+    경우만 처리하고, 매칭 수가 엔티티 수와 다르면 None.
+    """
+    r = _scan(ac)
+    if r is None:
+        return None
+    s, e, n = r
+    out = []
+    for m in SPAN_RE.finditer(ac, s, e):
+        lab = m.group(3)
+        if "\\" in lab:
+            lab = scanstring(ac, m.start(3))[0]
+        out.append((int(m.group(1)), int(m.group(2)), lab))
+    if len(out) != n:
+        return None
+    return out
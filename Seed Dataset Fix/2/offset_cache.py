@@ -0,0 +1,121 @@
+# offset_cache.py
+# -*- coding: utf-8 -*-
+"""
+autofix 오프셋 보정 결과의 디스크 캐시(sqlite3, 표준 라이브러리만 사용).
+
+  - 키: blake2b(text) + value + 기존 begin + 정규화 플래그(nfkc/casefold)
+    → fix_entity_offsets 결과는 이 네 가지로만 정해지므로, 같은 키면 탐색 없이 재사용
+  - 값: 보정된 (begin, end) 또는 "찾지 못함"(NULL)도 그대로 저장(실패도 다시 풀지 않음)
+  - 로컬 윈도우 정확매칭(µs 단위)보다 캐시 조회가 비싸므로, autofix는 그 단계가 실패한
+    엔티티(전역 탐색/정규화 근사 탐색 대상)만 캐시를 거친다
+  - LRU 만료: 조회/저장할 때마다 증가하는 tick을 기록하고, 닫을 때 max_entries를
+    넘는 만큼 가장 오래 안 쓴 항목부터 삭제
+  - 쓰기는 메모리에 모았다가 닫을 때 한 트랜잭션으로 반영(행마다 커밋하지 않음)
+  - CACHE_VERSION이 다르면(보정 알고리즘 변경) 기존 항목을 모두 버림
+"""
+
+import os
+import sqlite3
+import hashlib
+from typing import Dict, Optional, Tuple
+
+CACHE_VERSION = "1"
+DEFAULT_MAX_ENTRIES = 500_000
+MISS = object()   # get() 결과: 캐시에 없음(None은 "찾지 못함"이 캐시된 것)
+
+def text_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+class OffsetCache:
+    """fix_entity_offsets 결과 캐시. with 문 또는 close()로 반영/만료."""
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._touched: Dict[bytes, int] = {}
+        self._new: Dict[bytes, Tuple[Optional[int], Optional[int], int]] = {}
+        self._last_text: Optional[str] = None   # 같은 행의 엔티티끼리 text 해시 재사용
+        self._last_digest = b""
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS offsets "
+            "(key BLOB PRIMARY KEY, b INTEGER, e INTEGER, used INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS offsets_used ON offsets(used)")
+        meta = dict(self._db.execute("SELECT k, v FROM meta"))
+        if meta.get("version") != CACHE_VERSION:
+            self._db.execute("DELETE FROM offsets")
+            meta = {"version": CACHE_VERSION, "tick": "0"}
+        self._tick = int(meta.get("tick", "0"))
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (CACHE_VERSION,))
+        self._db.commit()
+
+    @staticmethod
+    def key(digest: bytes, value: str, begin, use_nfkc: bool, use_casefold: bool) -> bytes:
+        """text 다이제스트 + value + 기존 begin + 플래그 → 16바이트 키."""
+        h = hashlib.blake2b(digest, digest_size=16)
+        h.update(f"\0{begin!r}\0{int(use_nfkc)}{int(use_casefold)}\0".encode("ascii"))
+        h.update(value.encode("utf-8", "surrogatepass"))
+        return h.digest()
+
+    def key_for(self, text: str, value: str, begin, use_nfkc: bool, use_casefold: bool) -> bytes:
+        if text is not self._last_text:
+            self._last_text = text
+            self._last_digest = text_digest(text)
+        return self.key(self._last_digest, value, begin, use_nfkc, use_casefold)
+
+    def get(self, key: bytes):
+        """캐시된 (begin, end) / None(찾지 못함) / MISS."""
+        self._tick += 1
+        hit = self._new.get(key)
+        if hit is not None:
+            self._new[key] = (hit[0], hit[1], self._tick)
+            self.hits += 1
+            return None if hit[0] is None else (hit[0], hit[1])
+        row = self._db.execute("SELECT b, e FROM offsets WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return MISS
+        self._touched[key] = self._tick
+        self.hits += 1
+        return None if row[0] is None else (row[0], row[1])
+
+    def put(self, key: bytes, result: Optional[Tuple[int, int]]):
+        self._tick += 1
+        b, e = result if result else (None, None)
+        self._new[key] = (b, e, self._tick)
+
+    def close(self):
+        if self._db is None:
+            return
+        db = self._db
+        self._db = None
+        try:
+            with db:
+                db.executemany("UPDATE offsets SET used = ? WHERE key = ?",
+                               ((t, k) for k, t in self._touched.items()))
+                db.executemany("INSERT OR REPLACE INTO offsets VALUES (?, ?, ?, ?)",
+                               ((k, b, e, t) for k, (b, e, t) in self._new.items()))
+                n = db.execute("SELECT COUNT(*) FROM offsets").fetchone()[0]
+                if n > self.max_entries:
+                    db.execute(
+                        "DELETE FROM offsets WHERE key IN "
+                        "(SELECT key FROM offsets ORDER BY used LIMIT ?)",
+                        (n - self.max_entries,),
+                    )
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('tick', ?)", (str(self._tick),))
+        finally:
+            db.close()
+            self._touched.clear()
+            self._new.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,243 @@
+# online_repair.py
+# -*- coding: utf-8 -*-
+"""
+서빙 경로용 탐지기 출력 보정 라이브러리(autofix_offsets 의 행 단위 로직을 프로세스 안에서 호출).
+
+  - OutputRepairer.repair(입력 텍스트, 모델 출력) → 보정된 정답 dict
+    (repair_json() 은 같은 결과를 JSON 문자열로)
+      1) 모델 출력 파싱: dict 그대로 / 문자열이면 json → 실패 시 코드펜스·앞뒤 잡음 잘라 재시도
+      2) text는 항상 입력 텍스트로. 모델이 되돌려 준 text가 정규화/공백만 다르면
+         text_sync.rebase_to_user 로 오프셋을 먼저 옮김
+      3) 엔티티 정리(각 엔티티는 복사해서 다룸): dict 아닌 항목, label이 문자열이 아닌 항목,
+         value가 문자열 아닌 값(123 등)인 항목 제거. "12" 같은 숫자 문자열 오프셋은 정수로,
+         value 키가 없거나 null이면 begin/end 구간으로 채움
+      4) 입력 어디에도(정규화 비교 포함) 없는 값은 근사 탐색 전에 버림 → 환각 값이
+         brute_force_norm_match 의 최악 경로를 타지 않게 함
+      5) autofix_offsets.sanitize_entities(라벨 매핑/필터, fix_entity_offsets,
+         같은 행 공동 배치, 중복 제거, 정렬, has_sensitive 보정)
+  - 파일 I/O·디스크 캐시 없음. 라벨 매핑, 통계 dict, JSON 디코더는 생성 시 한 번 만들어 재사용
+    (repairer.stats 는 누적 카운터, last 는 마지막 호출의 카운터)
+  - 반환 dict는 항상 text / has_sensitive / entities 세 키(모델이 붙인 다른 키는 버림)
+  - 호출자가 넘긴 dict·엔티티는 바꾸지 않음(얕은 복사본에서 보정)
+  - 해석할 수 없는 출력은 {"text": 입력, "has_sensitive": false, "entities": []} + parse_errors 집계
+
+예)
+  from online_repair import OutputRepairer
+  repairer = OutputRepairer()
+  fixed = repairer.repair(prompt, model_content)
+
+  python online_repair.py id1-id320_fix2.jsonl --rows 5000       # 지연 벤치마크(p50/p99)
+"""
+
+import io
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Dict, List, Optional
+
+from autofix_offsets import sanitize_entities, normalize_for_compare, new_stats
+from text_sync import compare_texts, rebase_to_user, SAME, DIFFERENT
+from jsonl_io import open_text_auto
+
+_DECODER = json.JSONDecoder()
+
+def _int_or_none(x):
+    if isinstance(x, int) and not isinstance(x, bool):
+        return x
+    if isinstance(x, str) and x.strip().isdigit():
+        return int(x)
+    return None
+
+class OutputRepairer:
+    def __init__(self, label_map: Optional[Dict[str, str]] = None, drop_unknown: bool = False,
+                 nfkc: bool = False, casefold: bool = False, joint: bool = True):
+        self.label_map = dict(label_map or {})
+        self.drop_unknown = drop_unknown
+        self.nfkc = nfkc
+        self.casefold = casefold
+        self.joint = joint
+        self.stats = new_stats()
+        self.stats.update(calls=0, parse_errors=0, rebased_text=0, dropped_malformed=0, dropped_absent=0)
+        self.last = dict.fromkeys(self.stats, 0)
+
+    def parse(self, output) -> Optional[dict]:
+        """모델 출력 → 새 dict(입력 dict는 얕은 복사). 해석 불가면 None."""
+        if isinstance(output, dict):
+            return dict(output)
+        if not isinstance(output, str):
+            return None
+        try:
+            obj = _DECODER.decode(output)
+        except ValueError:
+            i, j = output.find("{"), output.rfind("}")
+            if i < 0 or j <= i:
+                return None
+            try:
+                obj = _DECODER.decode(output[i:j + 1])
+            except ValueError:
+                return None
+        return obj if isinstance(obj, dict) else None
+
+    def _clean_entities(self, text: str, ents) -> List[dict]:
+        """형식 정리 + 입력에 없는 값 제거(근사 탐색 전 거르기)."""
+        if not isinstance(ents, list):
+            return []
+        n = len(text)
+        out = []
+        norm_text = None
+        last = self.last
+        for e in ents:
+            if not isinstance(e, dict) or not isinstance(e.get("label"), str):
+                last["dropped_malformed"] += 1
+                continue
+            v = e.get("value")
+            if v is not None and not isinstance(v, str):
+                last["dropped_malformed"] += 1
+                continue
+            e = dict(e)
+            b, en = _int_or_none(e.get("begin")), _int_or_none(e.get("end"))
+            if b is not None:
+                e["begin"] = b
+            if en is not None:
+                e["end"] = en
+            if v is None:
+                if b is None or en is None or not (0 <= b < en <= n):
+                    last["dropped_malformed"] += 1
+                    continue
+                v = e["value"] = text[b:en]
+            if not v:
+                continue
+            if b is not None and en is not None and 0 <= b < en <= n and text[b:en] == v:
+                out.append(e)
+                continue
+            if v in text:
+                out.append(e)
+                continue
+            if norm_text is None:
+                norm_text = normalize_for_compare(text, self.nfkc, self.casefold)
+            if normalize_for_compare(v, self.nfkc, self.casefold) in norm_text:
+                out.append(e)
+                continue
+            last["dropped_absent"] += 1
+        return out
+
+    def repair(self, text: str, output) -> dict:
+        """(입력 텍스트, 모델 출력 문자열/dict) → 보정된 정답 dict."""
+        last = self.last
+        for k in last:
+            last[k] = 0
+        last["calls"] = 1
+        ans = self.parse(output)
+        if ans is None:
+            last["parse_errors"] += 1
+            ans = {"text": text, "has_sensitive": False, "entities": []}
+        else:
+            mt = ans.get("text")
+            if isinstance(mt, str) and mt != text and isinstance(ans.get("entities"), list):
+                if compare_texts(text, mt) not in (SAME, DIFFERENT):
+                    # rebase_to_user 는 엔티티를 제자리에서 고치므로 호출자 것 대신 복사본에
+                    ans["entities"] = [dict(e) if isinstance(e, dict) else e for e in ans["entities"]]
+                    if rebase_to_user(ans, text) is not None:
+                        last["rebased_text"] += 1
+            ans["text"] = text
+            ans["entities"] = self._clean_entities(text, ans.get("entities"))
+            sanitize_entities(ans, self.drop_unknown, self.label_map, self.nfkc, self.casefold,
+                              last, joint=self.joint)
+        st = self.stats
+        for k, v in last.items():
+            if v:
+                st[k] = st.get(k, 0) + v
+        ents = ans["entities"]
+        return {"text": text, "has_sensitive": bool(ents), "entities": ents}
+
+    def repair_json(self, text: str, output) -> str:
+        return json.dumps(self.repair(text, output), ensure_ascii=False)
+
+# -------------------- 지연 벤치마크 --------------------
+
+def perturb(ans: dict, rng: random.Random, rate: float, shift_max: int) -> str:
+    """정답 → 오프셋이 조금씩 틀린 모델 출력 흉내(JSON 문자열)."""
+    ents = []
+    for e in ans["entities"]:
+        e = dict(e)
+        if rng.random() < rate:
+            d = rng.randint(-shift_max, shift_max) or 1
+            e["begin"] += d
+            e["end"] += d
+        ents.append(e)
+    return json.dumps({"text": ans["text"], "has_sensitive": ans["has_sensitive"], "entities": ents}, ensure_ascii=False)
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(p / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+def main():
+    ap = argparse.ArgumentParser(description="Latency benchmark for the in-process detector output repair library")
+    ap.add_argument("input", help="정답 JSONL(.gz/.zst 자동 인식) — 오프셋을 흔든 모델 출력을 만들어 보정")
+    ap.add_argument("--rows", type=int, default=5000, help="측정할 호출 수(입력 행을 반복 사용)")
+    ap.add_argument("--perturb-rate", type=float, default=0.5, help="엔티티마다 오프셋을 흔들 확률")
+    ap.add_argument("--shift-max", type=int, default=3, help="오프셋 흔들기 최대 폭(±글자)")
+    ap.add_argument("--warmup", type=int, default=200, help="측정 전 워밍업 호출 수")
+    ap.add_argument("--seed", type=int, default=0, help="흔들기 난수 시드")
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    golds = []
+    with open_text_auto(args.input) as f:
+        for line in f:
+            s = line.strip()
+            if not s:
+                continue
+            try:
+                ans = json.loads(json.loads(s)["messages"][2]["content"])
+            except Exception:
+                continue
+            if isinstance(ans, dict) and isinstance(ans.get("text"), str) and isinstance(ans.get("entities"), list):
+                golds.append(ans)
+    if not golds:
+        print("[repair] no usable rows")
+        return 1
+
+    rng = random.Random(args.seed)
+    cases = []
+    for i in range(args.rows):
+        g = golds[i % len(golds)]
+        cases.append((g, perturb(g, rng, args.perturb_rate, args.shift_max)))
+
+    repairer = OutputRepairer()
+    for g, out in cases[:args.warmup]:
+        repairer.repair(g["text"], out)
+
+    repairer = OutputRepairer()
+    lat = []
+    exact = 0
+    clock = time.perf_counter_ns
+    for g, out in cases:
+        t0 = clock()
+        fixed = repairer.repair(g["text"], out)
+        lat.append((clock() - t0) / 1000.0)
+        want = sorted((e["label"], e["begin"], e["end"]) for e in g["entities"])
+        got = sorted((e["label"], e["begin"], e["end"]) for e in fixed["entities"])
+        exact += want == got
+    lat.sort()
+    n = len(lat)
+    avg_len = sum(len(g["text"]) for g, _ in cases) / n
+    st = repairer.stats
+    print(f"[repair] calls={n} avg_text_len={avg_len:.0f} fixed_offsets={st['fixed_offsets']} "
+          f"unmatched={st['unmatched_offsets']} reassigned={st['reassigned']} parse_errors={st['parse_errors']}")
+    print(f"[repair] latency_us p50={percentile(lat, 50):.1f} p90={percentile(lat, 90):.1f} "
+          f"p99={percentile(lat, 99):.1f} p99.9={percentile(lat, 99.9):.1f} max={lat[-1]:.1f} "
+          f"mean={sum(lat) / n:.1f}")
+    print(f"[repair] rows matching gold exactly: {exact}/{n} ({exact / n:.1%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
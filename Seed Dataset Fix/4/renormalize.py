@@ -0,0 +1,143 @@
+# renormalize.py
+# -*- coding: utf-8 -*-
+"""
+user 메시지와 정답 text를 NFC(--nfkc 면 NFKC)로 일괄 정규화하고 엔티티 오프셋을 재매핑.
+(check_dataset.py 의 TEXT_NOT_NFC 경고 대상 정리)
+
+  - 이미 정규형인 행(unicodedata.is_normalized)은 파싱한 그대로 다시 쓰지 않고 원문 줄 통과
+  - 정규화가 필요한 행: text_sync.renormalize_answer 로 원문→정규화 위치 배열을 만들어
+    begin/end/value를 옮김(탐색 없음). 결합 단위 안을 자르던 엔티티는 단위 전체로 넓힘
+  - user 메시지도 같은 형식으로 정규화(정답 text와 같았으면 계속 같음)
+  - 결합 단위를 넘는 합성으로 매핑을 못 만드는 행, 정답 JSON을 해석 못 하는 행은
+    user까지 그대로 두고(unmappable 은 따로 집계) 원문 줄 통과
+
+예)
+  python renormalize.py id1-id320_fix2.jsonl id1-id320_nfc.jsonl
+  python renormalize.py big.jsonl.gz big_nfkc.jsonl.gz --nfkc
+"""
+
+import json
+import sys
+import argparse
+import unicodedata
+import io
+
+from stage_profile import clock, add_profile_args, make_profiler
+from text_sync import renormalize_answer
+from jsonl_io import open_text_auto, open_text_write
+
+# --- Windows stderr UTF-8 safeguard (stdout은 파일로만 씀) ---
+try:
+    sys.stderr.reconfigure(encoding='utf-8')
+except Exception:
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# -------------------------------------------------------------
+
+def renormalize_row(row: dict, form: str, stats: dict, prof=None) -> bool:
+    """
+    행 하나 정규화(제자리). 바뀌었으면 True.
+    정답을 해석 못 하거나 text 매핑을 못 만들면 user도 건드리지 않고 False(행 그대로 유지).
+    """
+    msgs = row.get("messages")
+    if not isinstance(msgs, list) or len(msgs) != 3 or not all(isinstance(m, dict) for m in msgs):
+        return False
+    user = msgs[1].get("content")
+    ac = msgs[2].get("content")
+    if not isinstance(ac, str):
+        return False
+    t0 = clock() if prof else 0.0
+    try:
+        ans = json.loads(ac)
+    except Exception:
+        return False
+    finally:
+        if prof:
+            prof.add("inner_json_loads", t0)
+    text = ans.get("text") if isinstance(ans, dict) else None
+    if not isinstance(text, str):
+        return False
+    changed = False
+    if not unicodedata.is_normalized(form, text):
+        t0 = clock() if prof else 0.0
+        res = renormalize_answer(ans, form)
+        if prof:
+            prof.add("renormalize_answer", t0)
+        if res is None:
+            stats["unmappable"] += 1
+            return False
+        moved, widened = res
+        stats["text_normalized"] += 1
+        stats["remapped_offsets"] += moved
+        stats["widened_entities"] += widened
+        msgs[2]["content"] = json.dumps(ans, ensure_ascii=False)
+        changed = True
+    # text 매핑이 끝난 뒤에만 user 정규화(둘이 같았으면 계속 같음)
+    if isinstance(user, str) and not unicodedata.is_normalized(form, user):
+        msgs[1]["content"] = unicodedata.normalize(form, user)
+        stats["user_normalized"] += 1
+        changed = True
+    return changed
+
+def renormalize_file(input_path: str, output_path: str, form: str, stats: dict, prof=None):
+    with open_text_auto(input_path) as fin, open_text_write(output_path) as fout:
+        lines = prof.iter_timed("read_decode", fin) if prof else fin
+        for line in lines:
+            raw = line.rstrip("\n")
+            if not raw.strip():
+                fout.write(raw + "\n")
+                continue
+            stats["lines"] += 1
+            # 줄 전체가 정규형이면 user/text도 정규형 → 파싱 없이 통과(\u 이스케이프가 있으면 확인 불가)
+            if "\\u" not in raw and unicodedata.is_normalized(form, raw):
+                stats["already_normalized"] += 1
+                fout.write(raw + "\n")
+                continue
+            t0 = clock() if prof else 0.0
+            try:
+                row = json.loads(raw)
+            except Exception:
+                fout.write(raw + "\n")
+                continue
+            finally:
+                if prof:
+                    prof.add("outer_json_loads", t0)
+            unmappable = stats["unmappable"]
+            if not renormalize_row(row, form, stats, prof):
+                if stats["unmappable"] == unmappable:
+                    stats["already_normalized"] += 1
+                fout.write(raw + "\n")
+                continue
+            t0 = clock() if prof else 0.0
+            fout.write(json.dumps(row, ensure_ascii=False) + "\n")
+            if prof:
+                prof.add("outer_json_dumps", t0)
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Normalize user/answer texts to NFC (or NFKC) and remap entity offsets without searching."
+    )
+    ap.add_argument("input", help="입력 JSONL (.gz/.zst 압축 자동 인식)")
+    ap.add_argument("output", help="출력 JSONL (항상 UTF-8 저장, 확장자 .gz/.zst면 압축)")
+    ap.add_argument("--nfkc", action="store_true", help="NFC 대신 NFKC로 정규화(전각·합자 등 호환 문자도 펼침)")
+    add_profile_args(ap)
+    args = ap.parse_args()
+
+    prof = make_profiler(args, "renorm")
+    form = "NFKC" if args.nfkc else "NFC"
+    stats = {"lines": 0, "already_normalized": 0, "text_normalized": 0, "user_normalized": 0,
+             "remapped_offsets": 0, "widened_entities": 0, "unmappable": 0}
+    renormalize_file(args.input, args.output, form, stats, prof)
+    sys.stderr.write(
+        "[renorm] form={form} lines={lines} already_normalized={already_normalized} "
+        "text_normalized={text_normalized} user_normalized={user_normalized} "
+        "remapped_offsets={remapped_offsets} widened_entities={widened_entities} "
+        "unmappable={unmappable}\n".format(form=form, **stats)
+    )
+    if prof:
+        for k, v in stats.items():
+            prof.count("stats." + k, v)
+        prof.emit(args.profile_out)
+
+if __name__ == "__main__":
+    main()
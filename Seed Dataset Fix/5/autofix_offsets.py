@@ -6,8 +6,14 @@ import sys
 import argparse
 import unicodedata
 import io
+from bisect import bisect_left, bisect_right
 from typing import Dict, Tuple, Optional, List
 
+from stage_profile import clock, add_profile_args, make_profiler
+from text_sync import compare_texts, rebase_to_user, SAME, DIFFERENT
+from jsonl_io import open_text_auto, open_text_write
+from offset_cache import OffsetCache, MISS, DEFAULT_MAX_ENTRIES
+
 # --- Windows stderr UTF-8 safeguard (stdout은 파일로만 씀) ---
 try:
     sys.stderr.reconfigure(encoding='utf-8')
@@ -140,12 +146,16 @@ def brute_force_norm_match(text: str, value: str, prefer_begin: int, use_nfkc: b
     b, e = min(b_hits, key=lambda t: (abs(t[0] - ref), (t[1]-t[0])))
     return b, e
 
-def fix_entity_offsets(text: str, entity: dict, use_nfkc: bool, use_casefold: bool) -> Optional[Tuple[int,int]]:
+def fix_entity_offsets(text: str, entity: dict, use_nfkc: bool, use_casefold: bool,
+                       prof=None, cache=None) -> Optional[Tuple[int,int]]:
     """
     엔티티 (begin,end) 자동 보정:
       1) 로컬 윈도우 정확매칭
       2) 전역 정확매칭
       3) 정규화 기반 근사 탐색
+    prof(StageProfiler)가 주어지면 전략별 시간과 해결 건수를 기록.
+    cache(OffsetCache)가 주어지면 1)이 실패했을 때 이전 실행의 2)/3) 결과를 재사용
+    (1)은 캐시 조회보다 싸므로 항상 직접 수행).
     """
     value = entity.get("value")
     b_old = entity.get("begin")
@@ -157,27 +167,184 @@ def fix_entity_offsets(text: str, entity: dict, use_nfkc: bool, use_casefold: bo
     vlen = len(value)
 
     # 1) 로컬 정확 매칭
+    t0 = clock() if prof else 0.0
     L, R = window_bounds(n, b_old, vlen, radius=96)
     locals_ = search_exact_within(text, value, L, R)
-    if locals_:
-        b_new = best_occurrence(locals_, b_old)
-        if b_new is not None:
-            return (b_new, b_new + vlen)
+    b_new = best_occurrence(locals_, b_old) if locals_ else None
+    if prof:
+        prof.add("strategy.local_exact", t0)
+    if b_new is not None:
+        if prof:
+            prof.count("resolved.local_exact")
+        return (b_new, b_new + vlen)
+
+    if cache is not None:
+        t0 = clock() if prof else 0.0
+        ck = cache.key_for(text, value, b_old, use_nfkc, use_casefold)
+        hit = cache.get(ck)
+        if prof:
+            prof.add("cache_lookup", t0)
+        if hit is not MISS:
+            if prof:
+                prof.count("resolved.cache")
+            return hit
+        fixed = _search_fallbacks(text, value, b_old, use_nfkc, use_casefold, prof)
+        cache.put(ck, fixed)
+        return fixed
+    return _search_fallbacks(text, value, b_old, use_nfkc, use_casefold, prof)
+
+def _search_fallbacks(text: str, value: str, b_old, use_nfkc: bool, use_casefold: bool,
+                      prof=None) -> Optional[Tuple[int,int]]:
+    """fix_entity_offsets의 2) 전역 정확매칭, 3) 정규화 기반 근사 탐색."""
+    vlen = len(value)
 
     # 2) 전역 정확 매칭
+    t0 = clock() if prof else 0.0
     exacts = find_all_exact(text, value)
-    if exacts:
-        b_new = best_occurrence(exacts, b_old)
-        if b_new is not None:
-            return (b_new, b_new + vlen)
+    b_new = best_occurrence(exacts, b_old) if exacts else None
+    if prof:
+        prof.add("strategy.global_exact", t0)
+    if b_new is not None:
+        if prof:
+            prof.count("resolved.global_exact")
+        return (b_new, b_new + vlen)
 
     # 3) 정규화 기반 근사 탐색
+    t0 = clock() if prof else 0.0
     bf = brute_force_norm_match(text, value, b_old, use_nfkc, use_casefold)
+    if prof:
+        prof.add("strategy.norm_search", t0)
+        prof.count("resolved.norm_search" if bf else "resolved.none")
     if bf:
         return bf
 
     return None
 
+def _overlaps_static(starts: List[int], max_end: List[int], b: int, e: int) -> bool:
+    """시작점 정렬 목록 + 접두 최대 end로 [b,e)와 겹치는 구간이 있는지(O(log k))."""
+    i = bisect_left(starts, e)          # start < e 인 구간 수
+    return i > 0 and max_end[i - 1] > b
+
+def _overlaps_taken(taken_b: List[int], taken_e: List[int], b: int, e: int) -> bool:
+    """서로 겹치지 않는 배치 구간 목록(begin 정렬)에서 [b,e)와 겹치는지 — 양옆만 보면 됨."""
+    i = bisect_right(taken_b, b)
+    if i > 0 and taken_e[i - 1] > b:
+        return True
+    return i < len(taken_b) and taken_b[i] < e
+
+# 공동 배치 때 엔티티마다 보는 후보 수(원래 위치에서 가까운 정확매칭 위치부터)
+ASSIGN_MAX_CANDIDATES = 16
+
+def _nearest_occurrences(occ: List[int], ref: int, k: int) -> List[int]:
+    """정렬된 위치 목록에서 ref에 가까운 k개(bisect 후 양방향 확장, O(log n + k))."""
+    if len(occ) <= k:
+        return occ
+    hi = bisect_left(occ, ref)
+    lo = hi - 1
+    out = []
+    while len(out) < k:
+        if hi < len(occ) and (lo < 0 or occ[hi] - ref < ref - occ[lo]):
+            out.append(occ[hi])
+            hi += 1
+        else:
+            out.append(occ[lo])
+            lo -= 1
+    return out
+
+def assign_occurrences(text: str, items: List[list], anchored: List[Tuple[str, int, int]], prof=None) -> int:
+    """
+    한 행의 보정 엔티티 위치를 함께 정함(라벨 구분 없는 전역 비중첩 배치).
+      items   : [label, value, b_old, b, e] 목록 — b/e는 엔티티별 최근접 결과, 제자리 갱신
+      anchored: 원래 오프셋이 맞는 엔티티 (label, begin, end) — 라벨과 무관하게 막힌 구간
+    보정 엔티티가 다른 엔티티(라벨 무관)와 겹치지 않으면(대부분의 행) 최근접 결과 그대로.
+    겹치면(같은 값이 한 자리로 몰림, 한 값이 다른 값을 포함 — 예: EMAIL kim@a.com 안의
+    USERNAME kim) 보정 엔티티 전체의 후보를 (후보 수, 이동 거리, 엔티티 순서, 위치) 순으로
+    훑으며 고정 구간·이미 놓인 구간과 겹치지 않는 첫 후보를 배정(그리디).
+      - 후보 = 값별로 한 번만 찾은 정확매칭 위치 중 원래 위치에서 가까운
+        ASSIGN_MAX_CANDIDATES 개 → 후보 쌍 P = O(k), 정렬·배치 O(k log k)
+      - 후보가 적은 엔티티부터 놓아야 긴 값의 유일한 자리를 그 안에 든 짧은 값이 뺏지 않음
+    배정 못 한 엔티티는 최근접 결과 유지(→ 이전처럼 중복 제거될 수 있음).
+    같은 (값, 원래 begin) 엔티티는 라벨이 달라도 한 묶음으로 같은 위치를 줌
+    (같은 라벨이면 진짜 중복이라 그대로 제거).
+    반환: 위치가 바뀐 엔티티 수
+    """
+    fixed_spans = sorted((b, e) for _, b, e in anchored)
+    spans = sorted([(b, e, False) for b, e in fixed_spans] + [(it[3], it[4], True) for it in items])
+    conflict = False
+    reach, reach_repaired = -1, False
+    for b, e, rep in spans:
+        if b < reach and (rep or reach_repaired):
+            conflict = True
+            break
+        if e > reach:
+            reach, reach_repaired = e, rep
+    if not conflict:
+        return 0
+
+    t0 = clock() if prof else 0.0
+    starts = [b for b, _ in fixed_spans]
+    max_end = []
+    m = -1
+    for _, e in fixed_spans:
+        m = max(m, e)
+        max_end.append(m)
+
+    occ_memo: Dict[str, List[int]] = {}
+    keys: Dict[Tuple[str, Optional[int]], int] = {}
+    members: List[List[list]] = []
+    pairs = []
+    for it in items:
+        value, b_old = it[1], it[2]
+        k = (value, b_old if isinstance(b_old, int) else None)
+        gi = keys.get(k)
+        if gi is not None:
+            members[gi].append(it)
+            continue
+        gi = keys[k] = len(members)
+        members.append([it])
+        ref = b_old if isinstance(b_old, int) else 0
+        occ = occ_memo.get(value)
+        if occ is None:
+            occ = occ_memo[value] = find_all_exact(text, value) if value else []
+        if occ:
+            vlen = len(value)
+            nc = len(occ)
+            pairs.extend((nc, abs(c - ref), gi, c, c + vlen)
+                         for c in _nearest_occurrences(occ, ref, ASSIGN_MAX_CANDIDATES))
+        else:
+            pairs.append((1, abs(it[3] - ref), gi, it[3], it[4]))   # 정규화 탐색 결과(후보 하나)
+    pairs.sort()
+
+    placed: List[Optional[Tuple[int, int]]] = [None] * len(members)
+    left = len(members)
+    taken_b: List[int] = []
+    taken_e: List[int] = []
+    for _, _, gi, b, e in pairs:
+        if placed[gi] is not None:
+            continue
+        if _overlaps_static(starts, max_end, b, e) or _overlaps_taken(taken_b, taken_e, b, e):
+            continue
+        placed[gi] = (b, e)
+        i = bisect_left(taken_b, b)
+        taken_b.insert(i, b)
+        taken_e.insert(i, e)
+        left -= 1
+        if not left:
+            break
+
+    moved = 0
+    for gi, span in enumerate(placed):
+        if span is None:
+            continue
+        for it in members[gi]:
+            if (it[3], it[4]) != span:
+                it[3], it[4] = span
+                moved += 1
+    if prof:
+        prof.add("assign_occurrences", t0)
+        prof.count("assign.conflict_rows")
+    return moved
+
 def apply_label_mapping(label: str, label_map: Dict[str,str]) -> str:
     """라벨 매핑 적용."""
     if not isinstance(label, str):
@@ -185,9 +352,10 @@ def apply_label_mapping(label: str, label_map: Dict[str,str]) -> str:
     return label_map.get(label, label)
 
 def sanitize_entities(ans: dict, drop_unknown: bool, label_map: Dict[str,str],
-                      use_nfkc: bool, use_casefold: bool, stats: dict):
+                      use_nfkc: bool, use_casefold: bool, stats: dict, prof=None, cache=None,
+                      joint: bool = True):
     """
-    - 오프셋 보정
+    - 오프셋 보정(joint=True면 같은 행의 보정 엔티티끼리 겹치지 않게 함께 배치)
     - 라벨 매핑/필터링
     - 중복 제거, begin 기준 정렬
     - has_sensitive 일관성 보정
@@ -197,9 +365,7 @@ def sanitize_entities(ans: dict, drop_unknown: bool, label_map: Dict[str,str],
     if not isinstance(text, str) or not isinstance(ents, list):
         return
 
-    new_ents = []
-    seen = set()  # (label, begin, end)
-
+    kept = []       # [ent, label, begin, end, 보정 항목 | None]
     for ent in ents:
         if not isinstance(ent, dict):
             continue
@@ -223,18 +389,38 @@ def sanitize_entities(ans: dict, drop_unknown: bool, label_map: Dict[str,str],
 
         ok = (isinstance(b, int) and isinstance(e, int) and isinstance(v, str)
               and 0 <= b < e <= len(text) and text[b:e] == v)
+        if prof:
+            prof.count("entities")
+        item = None
         if not ok:
-            fixed = fix_entity_offsets(text, ent, use_nfkc, use_casefold)
+            fixed = fix_entity_offsets(text, ent, use_nfkc, use_casefold, prof, cache)
             if fixed:
                 b2, e2 = fixed
                 if normalize_for_compare(text[b2:e2], use_nfkc, use_casefold) == normalize_for_compare(v, use_nfkc, use_casefold):
+                    item = [lab2, v, b, b2, e2]
                     b, e = b2, e2
                     stats["fixed_offsets"] += 1
                 else:
                     stats["unmatched_offsets"] += 1
                     # 품질 위해 오프셋 못 맞춘 엔티티는 버림
                     continue
+        kept.append([ent, lab2, b, e, item])
+
+    # 4) 같은 행 보정 엔티티 함께 배치(라벨과 무관하게 서로·고정 엔티티와 겹치지 않게)
+    if joint:
+        items = [k[4] for k in kept if k[4] is not None]
+        if items:
+            anchored = [(k[1], k[2], k[3]) for k in kept if k[4] is None]
+            moved = assign_occurrences(text, items, anchored, prof)
+            if moved:
+                stats["reassigned"] = stats.get("reassigned", 0) + moved
+                for k in kept:
+                    if k[4] is not None:
+                        k[2], k[3] = k[4][3], k[4][4]
 
+    new_ents = []
+    seen = set()  # (label, begin, end)
+    for ent, lab2, b, e, _ in kept:
         tup = (lab2, b, e)
         if tup in seen:
             stats["dedup"] += 1
@@ -256,106 +442,183 @@ def sanitize_entities(ans: dict, drop_unknown: bool, label_map: Dict[str,str],
         ans["has_sensitive"] = hs
         stats["fixed_has_sensitive"] += 1
 
-def open_text_auto(path: str):
-    """BOM 감지로 텍스트 모드 오픈(스트리밍). 실패 시 CP949 폴백."""
-    with open(path, "rb") as fb:
-        head = fb.read(4)
-    if head.startswith(b'\xef\xbb\xbf'):
-        enc = 'utf-8-sig'
-    elif head.startswith(b'\xff\xfe'):
-        enc = 'utf-16'      # LE
-    elif head.startswith(b'\xfe\xff'):
-        enc = 'utf-16-be'   # BE
-    else:
-        enc = 'utf-8'
-    try:
-        return open(path, "r", encoding=enc, newline=None)
-    except UnicodeError:
-        return open(path, "r", encoding="cp949", errors="replace", newline=None)
-
-def process_row(row: dict, args, stats: dict) -> dict:
+def process_row(row: dict, args, stats: dict, prof=None) -> dict:
     msgs = row.get("messages")
     if not isinstance(msgs, list) or len(msgs) != 3:
         return row
 
     ac = msgs[2].get("content", "")
+    t0 = clock() if prof else 0.0
     try:
         ans = json.loads(ac)
     except Exception:
         return row
+    finally:
+        if prof:
+            prof.add("inner_json_loads", t0)
 
     if not isinstance(ans, dict):
         return row
 
+    t0 = clock() if prof else 0.0
     sanitize_entities(
         ans,
         drop_unknown=args.drop_unknown_labels,
         label_map=(args._label_map or {}),
         use_nfkc=args.nfkc,
         use_casefold=args.casefold,
-        stats=stats
+        stats=stats,
+        prof=prof,
+        cache=getattr(args, "_cache", None),
+        joint=getattr(args, "occurrence", "joint") == "joint"
     )
-
+    if prof:
+        prof.add("sanitize_entities", t0)
+
+    # user 원문과 정답 text 동기화(정규화/공백 차이만 복구)
+    if getattr(args, "sync_text", False):
+        user = msgs[1].get("content") if isinstance(msgs[1], dict) else None
+        if isinstance(user, str) and isinstance(ans.get("text"), str):
+            t0 = clock() if prof else 0.0
+            kind = compare_texts(user, ans["text"])
+            if kind == DIFFERENT:
+                stats["text_mismatch"] = stats.get("text_mismatch", 0) + 1
+            elif kind != SAME:
+                n_before = len(ans["entities"]) if isinstance(ans.get("entities"), list) else 0
+                moved = rebase_to_user(ans, user)
+                if moved is not None:
+                    stats["synced_text"] = stats.get("synced_text", 0) + 1
+                    stats["rebased_offsets"] = stats.get("rebased_offsets", 0) + moved
+                    # 매핑 못 한 엔티티는 rebase_to_user 가 버림 → 집계 + has_sensitive 재보정
+                    dropped = n_before - len(ans["entities"])
+                    if dropped:
+                        stats["sync_dropped"] = stats.get("sync_dropped", 0) + dropped
+                        hs = bool(ans["entities"])
+                        if ans.get("has_sensitive") is not hs:
+                            ans["has_sensitive"] = hs
+                            stats["fixed_has_sensitive"] += 1
+            if prof:
+                prof.add("sync_text", t0)
+
+    t0 = clock() if prof else 0.0
     msgs[2]["content"] = json.dumps(ans, ensure_ascii=False)
+    if prof:
+        prof.add("inner_json_dumps", t0)
     return row
 
-def main():
-    ap = argparse.ArgumentParser(
-        description="Fix entity offsets and optionally map/drop labels; output is always UTF-8."
-    )
-    ap.add_argument("input", help="입력 JSONL (messages: system,user,assistant)")
-    ap.add_argument("output", help="출력 JSONL (항상 UTF-8 저장)")
-    ap.add_argument("--nfkc", action="store_true", help="정규화 비교 시 NFKC 사용(기본 NFC)")
-    ap.add_argument("--casefold", action="store_true", help="대소문자 무시(casefold) 비교 사용")
-    ap.add_argument("--label-map", type=str, default=None, help="라벨 매핑 JSON 파일 경로")
-    ap.add_argument("--drop-unknown-labels", action="store_true", help="허용 라벨로 매핑되지 않으면 엔티티 삭제")
-    args = ap.parse_args()
+def load_label_map(path: Optional[str]) -> Optional[Dict[str,str]]:
+    """라벨 매핑 JSON 로드. 실패 시 경고 후 None."""
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as fm:
+            mp = json.load(fm)
+            if not isinstance(mp, dict):
+                raise ValueError("label_map must be a JSON object")
+            return mp
+    except Exception as e:
+        sys.stderr.write(f"[autofix] label-map load failed: {e}\n")
+        return None
 
-    # 라벨 매핑 로드
-    args._label_map = None
-    if args.label_map:
-        try:
-            with open(args.label_map, "r", encoding="utf-8") as fm:
-                mp = json.load(fm)
-                if not isinstance(mp, dict):
-                    raise ValueError("label_map must be a JSON object")
-                args._label_map = mp
-        except Exception as e:
-            sys.stderr.write(f"[autofix] label-map load failed: {e}\n")
-            args._label_map = None
-
-    stats = {
+def new_stats() -> dict:
+    return {
         "lines": 0,
         "fixed_offsets": 0,
         "unmatched_offsets": 0,
         "dropped_label": 0,
         "unknown_label": 0,
         "dedup": 0,
+        "reassigned": 0,
         "fixed_has_sensitive": 0,
     }
 
-    with open_text_auto(args.input) as fin, open(args.output, "w", encoding="utf-8", newline="\n") as fout:
-        for line in fin:
+def fix_file(input_path: str, output_path: str, args, stats: dict, prof=None):
+    """input_path를 한 줄씩 보정해 output_path에 UTF-8로 기록(stats 누적)."""
+    with open_text_auto(input_path) as fin, open_text_write(output_path) as fout:
+        lines = prof.iter_timed("read_decode", fin) if prof else fin
+        for line in lines:
             raw = line.rstrip("\n")
             if not raw.strip():
                 fout.write(raw + "\n")
                 continue
             stats["lines"] += 1
+            t0 = clock() if prof else 0.0
             try:
                 row = json.loads(raw)
             except Exception:
                 # JSON 깨진 줄은 그대로 통과
                 fout.write(raw + "\n")
                 continue
+            finally:
+                if prof:
+                    prof.add("outer_json_loads", t0)
+
+            row2 = process_row(row, args, stats, prof)
+            t0 = clock() if prof else 0.0
+            out = json.dumps(row2, ensure_ascii=False) + "\n"
+            if prof:
+                prof.add("outer_json_dumps", t0)
+                t0 = clock()
+            fout.write(out)
+            if prof:
+                prof.add("write", t0)
+    return stats
+
+STATS_LINE = (
+    "[autofix] lines={lines} fixed_offsets={fixed_offsets} unmatched_offsets={unmatched_offsets} "
+    "dropped_label={dropped_label} unknown_label={unknown_label} dedup={dedup} "
+    "reassigned={reassigned} fixed_has_sensitive={fixed_has_sensitive}\n"
+)
 
-            row2 = process_row(row, args, stats)
-            fout.write(json.dumps(row2, ensure_ascii=False) + "\n")
-
-    sys.stderr.write(
-        "[autofix] lines={lines} fixed_offsets={fixed_offsets} unmatched_offsets={unmatched_offsets} "
-        "dropped_label={dropped_label} unknown_label={unknown_label} dedup={dedup} "
-        "fixed_has_sensitive={fixed_has_sensitive}\n".format(**stats)
+def main():
+    ap = argparse.ArgumentParser(
+        description="Fix entity offsets and optionally map/drop labels; output is always UTF-8."
     )
+    ap.add_argument("input", help="입력 JSONL (messages: system,user,assistant; .gz/.zst 압축 자동 인식)")
+    ap.add_argument("output", help="출력 JSONL (항상 UTF-8 저장, 확장자 .gz/.zst면 압축)")
+    ap.add_argument("--nfkc", action="store_true", help="정규화 비교 시 NFKC 사용(기본 NFC)")
+    ap.add_argument("--casefold", action="store_true", help="대소문자 무시(casefold) 비교 사용")
+    ap.add_argument("--label-map", type=str, default=None, help="라벨 매핑 JSON 파일 경로")
+    ap.add_argument("--drop-unknown-labels", action="store_true", help="허용 라벨로 매핑되지 않으면 엔티티 삭제")
+    ap.add_argument("--sync-text", action="store_true", help="정답 text가 user 원문과 정규화/공백만 다르면 원문으로 교체하고 오프셋 재매핑")
+    ap.add_argument("--cache", type=str, default=None, help="오프셋 보정 결과 캐시(sqlite) 경로: 반복 실행 시 같은 엔티티는 탐색 생략")
+    ap.add_argument("--cache-max-entries", type=int, default=DEFAULT_MAX_ENTRIES, help="캐시 최대 항목 수(초과분은 오래 안 쓴 순으로 삭제)")
+    ap.add_argument("--occurrence", choices=["joint", "nearest"], default="joint",
+                    help="보정 위치 선택: joint=행 단위로 보정 엔티티가 (라벨 무관) 서로·고정 엔티티와 겹치지 않게 함께 배치(기본), nearest=엔티티별 최근접(이전 방식)")
+    add_profile_args(ap)
+    args = ap.parse_args()
+
+    prof = make_profiler(args, "autofix")
+    if prof:
+        # 정규화 비교는 여러 전략에서 호출되므로 전역 이름을 래핑해 집계
+        global normalize_for_compare
+        normalize_for_compare = prof.timed("normalize_for_compare", normalize_for_compare)
+
+    # 라벨 매핑 로드
+    args._label_map = load_label_map(args.label_map)
+
+    stats = new_stats()
+    if args.sync_text:
+        stats.update(synced_text=0, rebased_offsets=0, sync_dropped=0, text_mismatch=0)
+    args._cache = OffsetCache(args.cache, args.cache_max_entries) if args.cache else None
+    try:
+        fix_file(args.input, args.output, args, stats, prof)
+    finally:
+        if args._cache:
+            args._cache.close()
+    if args._cache:
+        stats.update(cache_hits=args._cache.hits, cache_misses=args._cache.misses)
+
+    line = STATS_LINE.format(**stats)
+    if args.sync_text:
+        line = line.rstrip("\n") + " synced_text={synced_text} rebased_offsets={rebased_offsets} sync_dropped={sync_dropped} text_mismatch={text_mismatch}\n".format(**stats)
+    if args._cache:
+        line = line.rstrip("\n") + " cache_hits={cache_hits} cache_misses={cache_misses}\n".format(**stats)
+    sys.stderr.write(line)
+    if prof:
+        for k, v in stats.items():
+            prof.count("stats." + k, v)
+        prof.emit(args.profile_out)
 
 if __name__ == "__main__":
     main()
@@ -7,6 +7,12 @@ import unicodedata
 import argparse
 import io
 import re
+import os
+
+from stage_profile import clock, add_profile_args, make_profiler
+from label_formats import FormatBatch
+from text_sync import compare_texts, SAME
+from jsonl_io import read_text_safely
 
 # -------------------- ALLOWED 라벨 (사용자 제공 버전) --------------------
 ALLOWED = {
@@ -59,22 +65,20 @@ def parse_assistant_json(s):
     except Exception as e:
         return None, f"assistant.content JSON parse error: {e}"
 
-def read_text_safely(path: str) -> str:
-    """UTF-8 / UTF-8-SIG / UTF-16LE/BE 자동 인식, 실패시 CP949 폴백."""
-    with open(path, "rb") as fb:
-        data = fb.read()
-    if data.startswith(b'\xef\xbb\xbf'):
-        return data.decode('utf-8-sig')
-    if data.startswith(b'\xff\xfe'):
-        return data.decode('utf-16')      # LE
-    if data.startswith(b'\xfe\xff'):
-        return data.decode('utf-16-be')   # BE
-    try:
-        return data.decode('utf-8')
-    except UnicodeDecodeError:
-        return data.decode('cp949', errors='replace')
+def problem(code, msg, entity=None, label=None):
+    """
+    구조화된 문제 항목.
+      code  : 기계 판독용 오류 코드(UPPER_SNAKE_CASE)
+      msg   : 사람이 읽는 메시지(기존 텍스트 출력과 동일)
+      entity: 엔티티 인덱스(해당 시)
+      label : 엔티티 라벨(해당 시)
+    """
+    return {"code": code, "msg": msg, "entity": entity, "label": label}
 
-def check_offsets(text, ents, *, use_nfkc=False, allow_overlap=False, strict_entity_keys=False, warn_sort=True):
+# 경고(문제 카운트와 무관하게 정보성) 코드
+WARNING_CODES = {"TEXT_NOT_NFC"}
+
+def check_offsets(text, ents, *, use_nfkc=False, allow_overlap=False, strict_entity_keys=False, warn_sort=True, fmt=None):
     errs = []
     norm_text = normalize_text(text, use_nfkc)
 
@@ -83,19 +87,22 @@ def check_offsets(text, ents, *, use_nfkc=False, allow_overlap=False, strict_ent
     spans_sorted = []
 
     for i, e in enumerate(ents):
+        lab_i = e.get("label") if isinstance(e, dict) else None
+        lab_i = lab_i if isinstance(lab_i, str) else None
+
         # 스키마 키 검사
         req = {"value","begin","end","label"}
         if strict_entity_keys:
             extra = set(e.keys()) - req
             missing = req - set(e.keys())
             if missing:
-                errs.append(f"entity[{i}] missing keys {sorted(missing)}")
+                errs.append(problem("ENTITY_MISSING_KEYS", f"entity[{i}] missing keys {sorted(missing)}", i, lab_i))
             if extra:
-                errs.append(f"entity[{i}] unexpected keys {sorted(extra)}")
+                errs.append(problem("ENTITY_UNEXPECTED_KEYS", f"entity[{i}] unexpected keys {sorted(extra)}", i, lab_i))
         else:
             for k in ("value","begin","end","label"):
                 if k not in e:
-                    errs.append(f"entity[{i}] missing key {k}")
+                    errs.append(problem("ENTITY_MISSING_KEYS", f"entity[{i}] missing key {k}", i, lab_i))
                     # 다음 검사 최소화
                     continue
 
@@ -103,153 +110,337 @@ def check_offsets(text, ents, *, use_nfkc=False, allow_overlap=False, strict_ent
 
         # 타입 검사
         if not isinstance(b, int) or not isinstance(en, int) or not isinstance(val, str) or not isinstance(lab, str):
-            errs.append(f"entity[{i}] bad types (begin/end/value/label)")
+            errs.append(problem("ENTITY_BAD_TYPES", f"entity[{i}] bad types (begin/end/value/label)", i, lab_i))
             continue
 
         # 범위 검사
         if not (0 <= b < en <= len(text)):
-            errs.append(f"entity[{i}] span out of range: [{b},{en}) vs len={len(text)}")
+            errs.append(problem("SPAN_OUT_OF_RANGE", f"entity[{i}] span out of range: [{b},{en}) vs len={len(text)}", i, lab))
             continue
 
         # slice 일치(정규화 기준 선택 가능)
         raw_slice = text[b:en]
         if normalize_text(raw_slice, use_nfkc) != normalize_text(val, use_nfkc):
-            errs.append(f"entity[{i}] slice mismatch: text[{b}:{en}] != value")
+            errs.append(problem("SLICE_MISMATCH", f"entity[{i}] slice mismatch: text[{b}:{en}] != value", i, lab))
 
         # 허용 라벨
         if lab not in ALLOWED:
-            errs.append(f"entity[{i}] label not allowed: {lab}")
+            errs.append(problem("LABEL_NOT_ALLOWED", f"entity[{i}] label not allowed: {lab}", i, lab))
+
+        # 값 형식 검사 대상 수집(검사는 파일 끝에서 라벨별로 일괄 수행)
+        if fmt is not None:
+            fmt.add(i, lab, val)
 
         # 공백/제어문자 경고
         if val != val.strip():
-            errs.append(f"entity[{i}] value has leading/trailing spaces")
+            errs.append(problem("VALUE_WHITESPACE", f"entity[{i}] value has leading/trailing spaces", i, lab))
         if CTRL_RE.search(val) or CTRL_RE.search(raw_slice):
-            errs.append(f"entity[{i}] value contains control chars")
+            errs.append(problem("VALUE_CONTROL_CHARS", f"entity[{i}] value contains control chars", i, lab))
 
         # 정렬 경고
         if warn_sort and b < prev_begin:
-            errs.append("entities not sorted by begin offset")
+            errs.append(problem("ENTITIES_NOT_SORTED", "entities not sorted by begin offset", i, lab))
         prev_begin = b
 
         # 중복/겹침 검사 준비
         key = (lab, b, en)
         if key in seen:
-            errs.append(f"duplicate entity (label,begin,end)={key}")
+            errs.append(problem("DUPLICATE_ENTITY", f"duplicate entity (label,begin,end)={key}", i, lab))
         seen.add(key)
-        spans_sorted.append((b, en))
+        spans_sorted.append((b, en, i))
 
     # 겹침 검사
     spans_sorted.sort()
     if not allow_overlap:
         for j in range(len(spans_sorted) - 1):
-            b1, e1 = spans_sorted[j]
-            b2, e2 = spans_sorted[j + 1]
+            b1, e1, _ = spans_sorted[j]
+            b2, e2, i2 = spans_sorted[j + 1]
             if b2 < e1:
-                errs.append(f"overlapping spans: [{b1},{e1}) & [{b2},{e2})")
+                errs.append(problem("OVERLAPPING_SPANS", f"overlapping spans: [{b1},{e1}) & [{b2},{e2})", i2))
                 break
 
     # 본문 정규화 경고
     if text != unicodedata.normalize("NFC", text):
-        errs.append("WARNING: text not NFC-normalized (may cause offset drift)")
+        errs.append(problem("TEXT_NOT_NFC", "WARNING: text not NFC-normalized (may cause offset drift)"))
     return errs
 
-def main():
-    ap = argparse.ArgumentParser(description="Dataset validator for messages JSONL")
-    ap.add_argument("path", nargs=1, help="input JSONL file")
+def check_row(row, *, use_nfkc=False, allow_overlap=False, strict_entity_keys=False, warn_sort=True, check_text=False, prof=None, fmt=None):
+    """
+    한 행(row dict) 검사.
+    반환: (problem 목록, 문제 카운트) — 메시지에는 [L..] 접두어가 붙지 않음.
+    """
+    out = []
+    bad = 0
+
+    # messages 구조
+    msgs = row.get("messages") if isinstance(row, dict) else None
+    if not isinstance(msgs, list) or len(msgs) != 3:
+        return [problem("MESSAGES_SHAPE", "messages must be list of length 3")], 1
+
+    roles = [m.get("role") for m in msgs]
+    if roles != ["system","user","assistant"]:
+        out.append(problem("ROLE_ORDER", f"role order must be system,user,assistant (got {roles})"))
+        bad += 1
+
+    for ri, m in enumerate(msgs):
+        if "content" not in m or not isinstance(m["content"], str):
+            out.append(problem("CONTENT_NOT_STRING", f"messages[{ri}] missing content or not string"))
+            bad += 1
+
+    # assistant.content 파싱
+    ac = msgs[2].get("content", "")
+    t0 = clock() if prof else 0.0
+    ans, err = parse_assistant_json(ac)
+    if prof:
+        prof.add("inner_json_loads", t0)
+    if err:
+        out.append(problem("ASSISTANT_JSON", err))
+        return out, bad + 1
+
+    # 정답 JSON 스키마 검사
+    exp_keys = {"text","has_sensitive","entities"}
+    if set(ans.keys()) != exp_keys:
+        out.append(problem("ANSWER_KEYS", f"assistant JSON keys must be {exp_keys} (got {set(ans.keys())})"))
+        bad += 1
+
+    text_body = ans.get("text")
+    hs = ans.get("has_sensitive")
+    ents = ans.get("entities")
+
+    if not isinstance(text_body, str):
+        out.append(problem("TEXT_NOT_STRING", "'text' must be string"))
+        bad += 1
+    elif check_text and isinstance(msgs[1].get("content"), str):
+        # user 원문 == 정답 text (불일치일 때만 정규화/공백 분류)
+        kind = compare_texts(msgs[1]["content"], text_body)
+        if kind != SAME:
+            out.append(problem("TEXT_MISMATCH", f"assistant text differs from user content ({kind})"))
+            bad += 1
+    if not isinstance(hs, bool):
+        out.append(problem("HAS_SENSITIVE_NOT_BOOL", "'has_sensitive' must be boolean"))
+        bad += 1
+    if not isinstance(ents, list):
+        out.append(problem("ENTITIES_NOT_LIST", "'entities' must be list"))
+        return out, bad + 1
+
+    # 오프셋/라벨 검사
+    t0 = clock() if prof else 0.0
+    errs = check_offsets(
+        text_body, ents,
+        use_nfkc=use_nfkc,
+        allow_overlap=allow_overlap,
+        strict_entity_keys=strict_entity_keys,
+        warn_sort=warn_sort,
+        fmt=fmt
+    )
+    if prof:
+        prof.add("check_offsets", t0)
+        prof.count("entities", len(ents))
+    out.extend(errs)
+    if errs:
+        bad += 1
+
+    # has_sensitive 논리 일치
+    if (len(ents) > 0) != bool(hs):
+        out.append(problem("HAS_SENSITIVE_MISMATCH", f"has_sensitive mismatch: entities={len(ents)} hs={hs}"))
+        bad += 1
+
+    return out, bad
+
+def check_line(line: str, prof=None, fmt=None, **opts):
+    """
+    JSONL 한 줄 검사.
+    빈 줄이면 None, 아니면 (row id 또는 None, problem 목록, 문제 카운트).
+    """
+    line = line.strip()
+    if not line:
+        return None
+    t0 = clock() if prof else 0.0
+    try:
+        row = json.loads(line)
+    except Exception as e:
+        return None, [problem("JSON_PARSE", f"JSON parse error: {e}")], 1
+    finally:
+        if prof:
+            prof.add("outer_json_loads", t0)
+    rid = row.get("id") if isinstance(row, dict) else None
+    problems, bad = check_row(row, prof=prof, fmt=fmt, **opts)
+    return rid, problems, bad
+
+class SummaryCollector:
+    """
+    --summary: 오류 코드별 개수 + 코드당 처음 K개 예시 줄만 보관(메모리 상한 고정).
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.counts = {}     # code -> count
+        self.examples = {}   # code -> [record, ...] (최대 k)
+
+    def add(self, code: str, rec: dict):
+        self.counts[code] = self.counts.get(code, 0) + 1
+        ex = self.examples.setdefault(code, [])
+        # 같은 줄의 반복 문제는 예시 하나로(예시는 "줄" 단위)
+        if len(ex) < self.k and not (ex and ex[-1]["line"] == rec["line"]):
+            ex.append(rec)
+
+    def records(self):
+        for code in sorted(self.counts, key=lambda c: (-self.counts[c], c)):
+            yield {
+                "type": "summary",
+                "code": code,
+                "severity": "warning" if code in WARNING_CODES else "error",
+                "count": self.counts[code],
+                "examples": self.examples[code],
+            }
+
+class ReportWriter:
+    """
+    진단 출력기. text(기존 형식) / jsonl(레코드당 한 줄)을 큰 버퍼로 기록.
+    summary가 주어지면 개별 문제는 쓰지 않고 집계만 함.
+    """
+
+    def __init__(self, fmt: str, out, summary: "SummaryCollector" = None):
+        self.fmt = fmt
+        self.out = out
+        self.summary = summary
+
+    def problem(self, ln: int, rid, p: dict):
+        if self.summary is not None:
+            self.summary.add(p["code"], {"line": ln, "id": rid, "entity": p["entity"], "label": p["label"], "msg": p["msg"]})
+            return
+        if self.fmt == "jsonl":
+            rec = {
+                "type": "problem",
+                "code": p["code"],
+                "severity": "warning" if p["code"] in WARNING_CODES else "error",
+                "line": ln,
+                "id": rid,
+                "entity": p["entity"],
+                "label": p["label"],
+                "msg": p["msg"],
+            }
+            self.out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        else:
+            self.out.write(f"[L{ln}] {p['msg']}\n")
+
+    def finish(self, total: int, bad: int):
+        if self.summary is not None:
+            for rec in self.summary.records():
+                if self.fmt == "jsonl":
+                    self.out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                else:
+                    self.out.write(f"{rec['code']}: {rec['count']}\n")
+                    for ex in rec["examples"]:
+                        self.out.write(f"  [L{ex['line']}] id={ex['id']} {ex['msg']}\n")
+        if self.fmt == "jsonl":
+            self.out.write(json.dumps({"type": "total", "lines": total, "problems": bad}) + "\n")
+        else:
+            self.out.write(f"\nChecked {total} lines. Problems: {bad}\n")
+        self.out.flush()
+
+def add_check_args(ap):
+    """검사 옵션(argparse) 공통 정의 — watch_dataset.py 등에서 재사용."""
     ap.add_argument("--nfkc", action="store_true", help="use NFKC normalization for slice comparison (default NFC)")
     ap.add_argument("--allow-overlap", action="store_true", help="do not error on overlapping entity spans")
     ap.add_argument("--strict-entity-keys", action="store_true", help="error on extra/missing keys in entity objects")
     ap.add_argument("--no-sort-warn", action="store_true", help="disable sorted-by-begin warning")
-    args = ap.parse_args()
-
-    path = args.path[0]
+    ap.add_argument("--check-text", action="store_true", help="error when assistant 'text' is not the user content verbatim")
+
+def check_opts(args) -> dict:
+    """argparse 결과 → check_row 키워드 인자."""
+    return {
+        "use_nfkc": args.nfkc,
+        "allow_overlap": args.allow_overlap,
+        "strict_entity_keys": args.strict_entity_keys,
+        "warn_sort": not args.no_sort_warn,
+        "check_text": args.check_text,
+    }
+
+REPORT_BUFFER = 1 << 20  # 1 MiB
+
+def check_file(path: str, opts: dict, writer: ReportWriter, prof=None, format_checks=False):
+    """
+    파일 전체 검사 → (검사한 줄 수, 문제 수). 문제는 writer로 전달.
+    format_checks: 라벨별 값 형식/체크섬 검사(label_formats)를 파일 끝에서 일괄 수행,
+                   형식 문제가 있는 줄마다 문제 수 +1.
+    """
     bad = 0
     total = 0
-
-    # Windows 콘솔 안전(stderr)
-    try:
-        sys.stderr.reconfigure(encoding='utf-8')
-    except Exception:
-        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
-
+    fmt = FormatBatch() if format_checks else None
+    t0 = clock() if prof else 0.0
     text = read_text_safely(path)
+    if prof:
+        prof.add("read_decode", t0)
     for ln, line in enumerate(text.splitlines(), 1):
-        line = line.strip()
-        if not line:
+        if fmt is not None:
+            fmt.begin_row(ln)
+        res = check_line(line, prof=prof, fmt=fmt, **opts)
+        if res is None:
             continue
         total += 1
-        try:
-            row = json.loads(line)
-        except Exception as e:
-            print(f"[L{ln}] JSON parse error: {e}")
-            bad += 1
-            continue
-
-        # messages 구조
-        msgs = row.get("messages")
-        if not isinstance(msgs, list) or len(msgs) != 3:
-            print(f"[L{ln}] messages must be list of length 3")
-            bad += 1
-            continue
-
-        roles = [m.get("role") for m in msgs]
-        if roles != ["system","user","assistant"]:
-            print(f"[L{ln}] role order must be system,user,assistant (got {roles})")
-            bad += 1
-
-        for ri, m in enumerate(msgs):
-            if "content" not in m or not isinstance(m["content"], str):
-                print(f"[L{ln}] messages[{ri}] missing content or not string")
-                bad += 1
+        rid, problems, nbad = res
+        if fmt is not None:
+            fmt.end_row(rid)
+        t0 = clock() if prof else 0.0
+        for p in problems:
+            writer.problem(ln, rid, p)
+        if prof and problems:
+            prof.add("report_write", t0)
+        bad += nbad
+
+    if fmt is not None:
+        t0 = clock() if prof else 0.0
+        fails = fmt.run()
+        if prof:
+            prof.add("format_checks", t0)
+            prof.count("format_checked", fmt.checked)
+        for ln, rid, i, lab, code, reason in fails:
+            writer.problem(ln, rid, problem(code, f"entity[{i}] {reason}", i, lab))
+        bad += len({t[0] for t in fails})
+    return total, bad
 
-        # assistant.content 파싱
-        ac = msgs[2].get("content", "")
-        ans, err = parse_assistant_json(ac)
-        if err:
-            print(f"[L{ln}] {err}")
-            bad += 1
-            continue
-
-        # 정답 JSON 스키마 검사
-        exp_keys = {"text","has_sensitive","entities"}
-        if set(ans.keys()) != exp_keys:
-            print(f"[L{ln}] assistant JSON keys must be {exp_keys} (got {set(ans.keys())})")
-            bad += 1
+def main():
+    ap = argparse.ArgumentParser(description="Dataset validator for messages JSONL")
+    ap.add_argument("path", nargs=1, help="input JSONL file")
+    add_check_args(ap)
+    ap.add_argument("--report", choices=["text","jsonl"], default="text", help="diagnostics format (default text)")
+    ap.add_argument("--report-out", type=str, default=None, help="write diagnostics to this file instead of stdout")
+    ap.add_argument("--summary", action="store_true", help="group problems by error code: counts + first K examples only")
+    ap.add_argument("--summary-examples", type=int, default=3, metavar="K", help="examples kept per error code in --summary (default 3)")
+    ap.add_argument("--format-checks", action="store_true", help="validate value formats/checksums per label (CARD_NUMBER Luhn, RESIDENT_ID, EMAIL, PHONE, IBAN, IMEI, JWT, POSTAL_CODE)")
+    add_profile_args(ap)
+    args = ap.parse_args()
 
-        text_body = ans.get("text")
-        hs = ans.get("has_sensitive")
-        ents = ans.get("entities")
+    prof = make_profiler(args, "check")
+    path = args.path[0]
+    opts = check_opts(args)
 
-        if not isinstance(text_body, str):
-            print(f"[L{ln}] 'text' must be string")
-            bad += 1
-        if not isinstance(hs, bool):
-            print(f"[L{ln}] 'has_sensitive' must be boolean")
-            bad += 1
-        if not isinstance(ents, list):
-            print(f"[L{ln}] 'entities' must be list")
-            bad += 1
-            continue
+    # Windows 콘솔 안전(stderr)
+    try:
+        sys.stderr.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-        # 오프셋/라벨 검사
-        errs = check_offsets(
-            text_body, ents,
-            use_nfkc=args.nfkc,
-            allow_overlap=args.allow_overlap,
-            strict_entity_keys=args.strict_entity_keys,
-            warn_sort=not args.no_sort_warn
+    # 진단 출력은 항상 UTF-8 + 큰 버퍼(문제마다 콘솔 write 하지 않도록)
+    if args.report_out:
+        out = open(args.report_out, "w", encoding="utf-8", newline="\n", buffering=REPORT_BUFFER)
+    else:
+        sys.stdout.flush()
+        out = io.TextIOWrapper(
+            io.BufferedWriter(io.FileIO(os.dup(sys.stdout.fileno()), "w"), buffer_size=REPORT_BUFFER),
+            encoding="utf-8", newline="\n", write_through=False,
         )
-        for e in errs:
-            print(f"[L{ln}] {e}")
-        if errs:
-            bad += 1
-
-        # has_sensitive 논리 일치
-        if (len(ents) > 0) != bool(hs):
-            print(f"[L{ln}] has_sensitive mismatch: entities={len(ents)} hs={hs}")
-            bad += 1
-
-    print(f"\nChecked {total} lines. Problems: {bad}")
+    summary = SummaryCollector(max(0, args.summary_examples)) if args.summary else None
+    writer = ReportWriter(args.report, out, summary)
+
+    total, bad = check_file(path, opts, writer, prof, format_checks=args.format_checks)
+    writer.finish(total, bad)
+    out.close()
+    if prof:
+        prof.count("lines", total)
+        prof.count("problems", bad)
+        prof.emit(args.profile_out)
     return 0 if bad == 0 else 1
 
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+# text_sync.py
+# -*- coding: utf-8 -*-
+"""
+user 메시지(messages[1].content)와 정답 JSON "text"의 일치 검사/복구.
+
+  - compare_texts(): 길이 → 해시 → (불일치 시에만) 정규화/공백 비교로 분류
+  - rebase_to_user(): 정규화·공백만 다른 경우 text를 user 내용으로 바꾸고
+                      엔티티 begin/end/value를 선형 1회 매핑으로 재계산(탐색 없음)
+  - normalize_with_map() / renormalize_answer(): text를 NFC(NFKC)로 바꾸면서
+                      원문 위치 → 정규화 위치 배열로 엔티티를 옮김(탐색 없음)
+
+정규형(canonical): 문자별 NFKD, 공백 연속은 ' ' 하나로, 앞뒤 공백 제거.
+두 문자열의 정규형이 같으면 "정규화/공백 차이"로 본다.
+"""
+
+import unicodedata
+from typing import List, Optional, Tuple
+
+SAME = "same"
+NORMALIZATION = "normalization"   # 유니코드 정규화만 다름
+WHITESPACE = "whitespace"         # 공백(개행/탭/연속 공백 포함)만 다름(정규화 차이 동반 가능)
+DIFFERENT = "different"
+
+def _canon_starts(s: str) -> Tuple[str, List[int]]:
+    """
+    정규형 문자열과, 각 원문 위치 i(0..len)의 정규형 시작 오프셋 배열.
+    기여 길이가 0인 위치(접힌 공백, 앞뒤 공백)는 다음 글자와 같은 오프셋을 가진다.
+    """
+    parts: List[str] = []
+    n = len(s)
+    starts = [0] * (n + 1)
+    c = 0
+    nf = unicodedata.normalize
+    i = 0
+    while i < n:
+        ch = s[i]
+        if ch.isspace():
+            j = i
+            while j < n and s[j].isspace():
+                j += 1
+            if c > 0 and j < n:
+                # 내부 공백 런 → ' ' 하나(런의 첫 위치가 담당)
+                starts[i] = c
+                parts.append(" ")
+                c += 1
+                for k in range(i + 1, j):
+                    starts[k] = c
+            else:
+                # 앞/뒤 공백은 기여 없음
+                for k in range(i, j):
+                    starts[k] = c
+            i = j
+            continue
+        starts[i] = c
+        t = nf("NFKD", ch) if ord(ch) > 0x7F else ch
+        parts.append(t)
+        c += len(t)
+        i += 1
+    starts[n] = c
+    return "".join(parts), starts
+
+def compare_texts(user: str, text: str) -> str:
+    """SAME / NORMALIZATION / WHITESPACE / DIFFERENT 분류. 일치하면 길이·해시 단계에서 끝난다."""
+    if len(user) == len(text) and hash(user) == hash(text) and user == text:
+        return SAME
+    if unicodedata.normalize("NFKC", user) == unicodedata.normalize("NFKC", text):
+        return NORMALIZATION
+    if _canon_starts(user)[0] == _canon_starts(text)[0]:
+        return WHITESPACE
+    return DIFFERENT
+
+def rebase_to_user(ans: dict, user: str) -> Optional[int]:
+    """
+    ans["text"]를 user로 교체하고 엔티티 오프셋을 정규형 오프셋 경유로 재매핑.
+    반환: 재매핑한 엔티티 수, 정규화/공백 차이가 아니면 None(ans 변경 없음).
+    매핑 후 값이 비거나 정규형이 달라진 엔티티는 제거한다(호출자가 개수 차이로 집계하고
+    has_sensitive 를 다시 맞춤).
+    """
+    text = ans.get("text")
+    ents = ans.get("entities")
+    if not isinstance(text, str) or not isinstance(ents, list):
+        return None
+    canon_old, st_old = _canon_starts(text)
+    canon_new, st_new = _canon_starts(user)
+    if canon_old != canon_new:
+        return None
+
+    # 정규형 오프셋 → 새 문자열 위치 (begin: 기여하는 첫 글자 / end: 첫 위치)
+    n_new = len(user)
+    begin_at = {}
+    end_at = {}
+    for j in range(n_new, -1, -1):
+        c = st_new[j]
+        end_at[c] = j
+        if j < n_new and st_new[j + 1] > c:
+            begin_at[c] = j
+
+    kept = []
+    moved = 0
+    for e in ents:
+        if not isinstance(e, dict):
+            kept.append(e)
+            continue
+        b, en = e.get("begin"), e.get("end")
+        if not (isinstance(b, int) and isinstance(en, int) and 0 <= b < en <= len(text)):
+            kept.append(e)
+            continue
+        cb, ce = st_old[b], st_old[en]
+        nb, ne = begin_at.get(cb), end_at.get(ce)
+        if nb is None or ne is None or nb >= ne:
+            continue
+        if _canon_starts(user[nb:ne])[0] != _canon_starts(text[b:en])[0]:
+            continue
+        if (nb, ne) != (b, en):
+            moved += 1
+        e["begin"], e["end"] = nb, ne
+        if isinstance(e.get("value"), str):
+            e["value"] = user[nb:ne]
+        kept.append(e)
+    ans["text"] = user
+    ans["entities"] = kept
+    return moved
+
+def _joins_previous(ch: str) -> bool:
+    """앞 글자와 합쳐질 수 있는 글자(결합 문자 — 결합 등급 0인 Mc/Mn 포함, 한글 중성·종성 자모)."""
+    return (unicodedata.combining(ch) != 0 or "\u1160" <= ch <= "\u11ff"
+            or unicodedata.category(ch) in ("Mn", "Mc"))
+
+def normalize_with_map(s: str, form: str = "NFC") -> Optional[Tuple[str, List[int], List[int]]]:
+    """
+    s를 form으로 정규화하면서 위치 배열 두 개를 만든다(길이 len(s)+1).
+      lo[i]: 원문 i가 속한 결합 단위(기본 글자 + 뒤따르는 결합 문자)의 정규화 시작 위치 → begin용
+      hi[i]: i 이후 첫 결합 단위 경계의 정규화 위치 → end용
+    결합 단위 안을 자르는 오프셋은 단위 전체로 넓혀진다.
+    단위별 정규화를 이은 결과가 전체 정규화와 다르면(단위를 넘는 합성) None.
+    """
+    nf = unicodedata.normalize
+    n = len(s)
+    lo = [0] * (n + 1)
+    hi = [0] * (n + 1)
+    parts: List[str] = []
+    c = 0
+    i = 0
+    while i < n:
+        j = i + 1
+        while j < n and _joins_previous(s[j]):
+            j += 1
+        seg = s[i:j]
+        t = seg if seg.isascii() else nf(form, seg)
+        hi[i] = c
+        for k in range(i, j):
+            lo[k] = c
+        c += len(t)
+        for k in range(i + 1, j):
+            hi[k] = c
+        parts.append(t)
+        i = j
+    lo[n] = hi[n] = c
+    out = "".join(parts)
+    if out != nf(form, s):
+        return None
+    return out, lo, hi
+
+def renormalize_answer(ans: dict, form: str = "NFC") -> Optional[Tuple[int, int]]:
+    """
+    ans["text"]를 form으로 정규화하고 엔티티 begin/end/value를 위치 배열로 재매핑.
+    이미 정규형이면 (0, 0), 매핑 불가면 None(ans 변경 없음).
+    오프셋이 범위 밖인 엔티티는 그대로 두고 value만 정규화(이후 autofix가 찾을 수 있게).
+    반환: (재매핑한 엔티티 수, 결합 단위로 넓혀진 엔티티 수)
+    """
+    text = ans.get("text")
+    ents = ans.get("entities")
+    if not isinstance(text, str):
+        return None
+    if unicodedata.is_normalized(form, text):
+        return 0, 0
+    m = normalize_with_map(text, form)
+    if m is None:
+        return None
+    new, lo, hi = m
+    n = len(text)
+    moved = widened = 0
+    for e in ents if isinstance(ents, list) else ():
+        if not isinstance(e, dict):
+            continue
+        b, en, v = e.get("begin"), e.get("end"), e.get("value")
+        if not (isinstance(b, int) and isinstance(en, int) and 0 <= b < en <= n):
+            if isinstance(v, str):
+                e["value"] = unicodedata.normalize(form, v)
+            continue
+        nb, ne = lo[b], hi[en]
+        if isinstance(v, str):
+            nv = new[nb:ne]
+            if v == text[b:en] and nv != unicodedata.normalize(form, v):
+                widened += 1
+            e["value"] = nv
+        if (nb, ne) != (b, en):
+            moved += 1
+        e["begin"], e["end"] = nb, ne
+    ans["text"] = new
+    return moved, widened
@@ -0,0 +1,233 @@
+# watch_dataset.py
+# -*- coding: utf-8 -*-
+"""
+데이터셋 감시 모드: JSONL 파일이 저장될 때마다 바뀐 줄만 다시 검사/집계.
+
+  - 파일 mtime/size 폴링(기본 0.25초)으로 저장 감지
+  - 줄 단위 해시(blake2b)로 변경된 줄만 check_row / count_line 재실행
+  - 결과는 콘솔 요약 + (옵션) JSON 상태 파일로 출력
+  - 지워졌거나 이름이 바뀌어 더 이상 대상이 아닌 파일은 상태에서 뺌(다시 생기면 처음부터 검사)
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import glob
+import hashlib
+import argparse
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from check_dataset import check_line, add_check_args, check_opts
+from jsonl_io import read_text_safely
+from count_entities import count_line
+from stage_profile import clock, add_profile_args, make_profiler
+
+def line_hash(s: str) -> bytes:
+    """줄 내용 해시(앞뒤 공백 무시)."""
+    return hashlib.blake2b(s.strip().encode("utf-8"), digest_size=16).digest()
+
+class LineResult:
+    """한 줄에 대한 검사/집계 결과 캐시."""
+    __slots__ = ("problems", "bad", "count")
+
+    def __init__(self, problems: List[dict], bad: int, count: Optional[Tuple[object,int]]):
+        self.problems = problems
+        self.bad = bad
+        self.count = count   # (id, 엔티티 수) 또는 None(깨진 줄)
+
+class FileState:
+    """
+    파일별 상태.
+      - hashes: 현재 줄 순서대로의 해시(빈 줄은 None)
+      - cache : 해시 → LineResult (내용 기반이라 줄이 밀려도 재검사 안 함)
+      - 합계  : 추가/삭제된 줄의 기여분만 가감
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sig = None          # (mtime_ns, size)
+        self.hashes: List[Optional[bytes]] = []
+        self.cache: Dict[bytes, LineResult] = {}
+        self.total = 0
+        self.bad = 0
+        self.bad_lines = 0
+        self.total_entities = 0
+
+    def _apply(self, res: LineResult, sign: int):
+        self.total += sign
+        self.bad += sign * res.bad
+        if res.count is None:
+            self.bad_lines += sign
+        else:
+            self.total_entities += sign * res.count[1]
+
+    def refresh(self, opts: dict, prof=None) -> Optional[dict]:
+        """변경 시 증분 갱신 후 이번 갱신 정보 반환, 변경 없으면 None, 파일이 없으면 {"missing": True}."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return {"missing": True}
+        sig = (st.st_mtime_ns, st.st_size)
+        if sig == self.sig:
+            return None
+        self.sig = sig
+
+        t0 = time.perf_counter()
+        t1 = clock() if prof else 0.0
+        lines = read_text_safely(self.path).splitlines()
+        if prof:
+            prof.add("read_decode", t1)
+            t1 = clock()
+        new_hashes = [line_hash(l) if l.strip() else None for l in lines]
+        if prof:
+            prof.add("line_hash", t1, calls=len(lines))
+
+        old_cnt = Counter(h for h in self.hashes if h is not None)
+        new_cnt = Counter(h for h in new_hashes if h is not None)
+        removed = old_cnt - new_cnt
+        added = new_cnt - old_cnt
+
+        for h, k in removed.items():
+            res = self.cache[h]
+            for _ in range(k):
+                self._apply(res, -1)
+
+        rechecked = 0
+        for ln, (line, h) in enumerate(zip(lines, new_hashes), 1):
+            if h is None or h not in added:
+                continue
+            res = self.cache.get(h)
+            if res is None:
+                _, problems, nbad = check_line(line, prof=prof, **opts)
+                res = LineResult(problems, nbad, count_line(line.strip(), prof))
+                self.cache[h] = res
+                rechecked += 1
+            for _ in range(added.pop(h)):
+                self._apply(res, +1)
+
+        self.hashes = new_hashes
+        # 더 이상 쓰이지 않는 캐시 정리
+        if len(self.cache) > 2 * max(1, len(new_cnt)):
+            self.cache = {h: self.cache[h] for h in new_cnt}
+
+        return {
+            "rechecked": rechecked,
+            "changed": sum(removed.values()) + sum((new_cnt - old_cnt).values()),
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2),
+        }
+
+    def problems(self) -> List[str]:
+        out = []
+        for ln, h in enumerate(self.hashes, 1):
+            if h is None:
+                continue
+            for p in self.cache[h].problems:
+                out.append(f"[L{ln}] {p['msg']}")
+        return out
+
+    def status(self) -> dict:
+        return {
+            "path": self.path,
+            "lines": self.total,
+            "problems": self.bad,
+            "entities": self.total_entities,
+            "bad_lines": self.bad_lines,
+            "avg_entities": round(self.total_entities / (self.total - self.bad_lines), 2)
+                            if self.total > self.bad_lines else 0,
+        }
+
+def collect_files(paths: List[str]) -> List[str]:
+    """디렉터리면 *.jsonl(.gz/.zst 포함) 전부, 파일이면 그대로."""
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            out.extend(sorted(f for ext in ("*.jsonl", "*.jsonl.gz", "*.jsonl.zst")
+                              for f in glob.glob(os.path.join(p, ext))))
+        else:
+            out.append(p)
+    return out
+
+def write_status(path: str, states: List[FileState]):
+    """상태 JSON을 임시 파일에 쓰고 교체(읽는 쪽이 반쯤 쓴 파일을 보지 않도록)."""
+    payload = {
+        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": [st.status() for st in states],
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def main():
+    ap = argparse.ArgumentParser(description="Watch JSONL shards and re-validate/re-count changed lines on save")
+    ap.add_argument("paths", nargs="*", default=["."], help="감시할 JSONL 파일 또는 디렉터리(기본: 현재 디렉터리)")
+    ap.add_argument("--interval", type=float, default=0.25, help="폴링 주기(초)")
+    ap.add_argument("--status-json", type=str, default=None, help="갱신 때마다 상태를 기록할 JSON 파일 경로")
+    ap.add_argument("--show-problems", type=int, default=20, help="갱신 시 출력할 문제 메시지 최대 개수")
+    ap.add_argument("--once", action="store_true", help="한 번만 검사하고 종료")
+    add_check_args(ap)
+    add_profile_args(ap)
+    args = ap.parse_args()
+
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except Exception:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    opts = check_opts(args)
+    prof = make_profiler(args, "watch")
+    states: Dict[str, FileState] = {}
+    status_abs = os.path.abspath(args.status_json) if args.status_json else None
+
+    try:
+        while True:
+            current = set()
+            for path in collect_files(args.paths):
+                if status_abs and os.path.abspath(path) == status_abs:
+                    continue
+                current.add(path)
+                if path not in states:
+                    states[path] = FileState(path)
+            changed = False
+            for path in [p for p in states if p not in current]:
+                del states[path]
+                changed = True
+                print(f"[watch] {path}: no longer matched, dropped")
+            for st in list(states.values()):
+                info = st.refresh(opts, prof)
+                if info is None:
+                    continue
+                if info.get("missing"):
+                    del states[st.path]
+                    if st.sig is not None:
+                        changed = True
+                        print(f"[watch] {st.path}: missing, dropped")
+                    continue
+                changed = True
+                s = st.status()
+                print(
+                    f"[watch] {st.path}: lines={s['lines']} problems={s['problems']} "
+                    f"entities={s['entities']} bad_lines={s['bad_lines']} "
+                    f"(changed={info['changed']} rechecked={info['rechecked']} {info['elapsed_ms']}ms)"
+                )
+                if args.show_problems > 0:
+                    for p in st.problems()[:args.show_problems]:
+                        print("  " + p)
+            if changed:
+                if args.status_json:
+                    write_status(args.status_json, list(states.values()))
+                sys.stdout.flush()
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    if prof:
+        prof.emit(args.profile_out)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())